@@ -0,0 +1,107 @@
+"""Tendencias del historial completo, calculadas con columnas (pandas/numpy)
+
+TrendAnalytics se construye una vez por versión de datos (como RollupIndex) y
+calcula en una sola pasada vectorizada las series que muestran los gráficos:
+
+- ganancia neta acumulada en ventanas móviles de 7 y 30 días de calendario
+- ganancia por milla, diaria y de los últimos 30 días
+- ratio de gastos (gastos / ingresos %), diario y de los últimos 30 días
+- promedios por día de la semana (solo días trabajados)
+
+Las ventanas son de calendario: un día sin registro cuenta como 0, no se salta.
+"""
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from storage import DailyRecord
+
+# Ventanas móviles en días de calendario; los ratios móviles usan la más larga
+ROLLING_WINDOWS = (7, 30)
+RATIO_WINDOW = 30
+
+WEEKDAY_NAMES = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+
+# Campos del registro que entran en las series
+_FIELDS = ('total_gross', 'total_expenses', 'net_profit', 'miles_driven')
+
+
+def _ratio(numerator: pd.Series, denominator: pd.Series, scale: float = 1.0) -> pd.Series:
+    # 0 donde el denominador es 0 (días sin millas o sin ingresos)
+    values = np.divide(numerator.to_numpy() * scale, denominator.to_numpy(),
+                       out=np.zeros(len(numerator)), where=denominator.to_numpy() > 0)
+    return pd.Series(values, index=numerator.index)
+
+
+class TrendAnalytics:
+    """Series de tendencia y promedios por día de la semana de todo el historial
+
+    `daily` tiene una fila por día de calendario entre el primer y el último
+    registro (índice DatetimeIndex), con los valores del día, las sumas móviles
+    y los ratios. Las consultas solo recortan esas columnas ya calculadas.
+    """
+
+    def __init__(self, records: Iterable[DailyRecord] = (), version: int = 0):
+        self.version = version
+        records = list(records)
+        dates = pd.to_datetime([r.date for r in records], format='%Y-%m-%d', errors='coerce')
+        frame = pd.DataFrame(
+            {field: np.fromiter((getattr(r, field) for r in records), dtype=np.float64, count=len(records))
+             for field in _FIELDS},
+            index=dates
+        )
+        frame = frame[frame.index.notna()].sort_index()
+        frame['worked'] = 1.0
+        if not frame.empty:
+            # Días sin registro = 0, para que las ventanas sean de calendario
+            calendar = pd.date_range(frame.index[0], frame.index[-1], freq='D')
+            frame = frame[~frame.index.duplicated(keep='last')].reindex(calendar, fill_value=0.0)
+        self.daily = self._compute_daily(frame)
+        self.weekdays = self._compute_weekdays(frame)
+
+    @staticmethod
+    def _compute_daily(frame: pd.DataFrame) -> pd.DataFrame:
+        daily = pd.DataFrame(index=frame.index)
+        daily['net_profit'] = frame['net_profit']
+        daily['total_gross'] = frame['total_gross']
+        daily['total_expenses'] = frame['total_expenses']
+        daily['miles_driven'] = frame['miles_driven']
+        daily['worked'] = frame['worked'].astype(bool)
+        daily['profit_per_mile'] = _ratio(frame['net_profit'], frame['miles_driven'])
+        daily['expense_ratio'] = _ratio(frame['total_expenses'], frame['total_gross'], 100.0)
+        # Sumas móviles con cumsum: una resta por ventana en lugar de recorrer cada ventana
+        cumulative = frame[list(_FIELDS)].cumsum()
+        for window in ROLLING_WINDOWS:
+            sums = cumulative - cumulative.shift(window, fill_value=0.0)
+            daily[f'net_{window}d'] = sums['net_profit']
+            if window == RATIO_WINDOW:
+                daily[f'profit_per_mile_{window}d'] = _ratio(sums['net_profit'], sums['miles_driven'])
+                daily[f'expense_ratio_{window}d'] = _ratio(sums['total_expenses'], sums['total_gross'], 100.0)
+        return daily
+
+    @staticmethod
+    def _compute_weekdays(frame: pd.DataFrame) -> pd.DataFrame:
+        worked = frame[frame['worked'] > 0]
+        grouped = worked[list(_FIELDS)].groupby(worked.index.dayofweek)
+        averages = grouped.mean().reindex(range(7), fill_value=0.0)
+        averages['days'] = grouped.size().reindex(range(7), fill_value=0).astype(int)
+        averages['profit_per_mile'] = _ratio(grouped['net_profit'].sum().reindex(range(7), fill_value=0.0),
+                                             grouped['miles_driven'].sum().reindex(range(7), fill_value=0.0))
+        averages.index = pd.Index(WEEKDAY_NAMES, name='weekday')
+        return averages
+
+    def series(self, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """Series diarias entre start y end (ISO, None = sin límite), en orden de fecha"""
+        return self.daily.loc[start:end]
+
+    def weekday_averages(self) -> pd.DataFrame:
+        """Promedio de ingresos, gastos, ganancia y millas por día de la semana (lunes primero)"""
+        return self.weekdays
+
+    def latest(self) -> Dict:
+        """Valores de las ventanas móviles en el último día registrado (vacío si no hay datos)"""
+        if self.daily.empty:
+            return {}
+        last = self.daily.iloc[-1]
+        return {column: float(last[column]) for column in self.daily.columns if column != 'worked'}
@@ -0,0 +1,84 @@
+"""Benchmark: tendencias con bucles de Python vs. TrendAnalytics (analytics.py)
+
+- bucle: sumas móviles de 7/30 días y promedios por día de la semana recorriendo
+  los registros en cada ejecución del script
+- construir: TrendAnalytics, una vez por versión de los datos
+- recortar: lo que cuesta cada ejecución con las series ya calculadas (último año)
+
+Uso:
+    python benchmarks/bench_analytics.py [días ...]
+"""
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from analytics import TrendAnalytics  # noqa: E402
+from storage import DailyRecord, FIELDS  # noqa: E402
+
+
+def make_records(n: int, seed: int = 7) -> list:
+    """n días desde 2015 (uno de cada siete sin trabajar), por fecha descendente como get_all_records()"""
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    records = []
+    for i in range(n):
+        if i % 7 == 6:
+            continue
+        values = dict.fromkeys(FIELDS, 0.0)
+        gross, expenses = rng.uniform(50, 400), rng.uniform(20, 120)
+        values.update(date=(start + timedelta(days=i)).isoformat(), additional_income=[], additional_expenses=[],
+                      odo_start=0, odo_end=0, miles_driven=float(rng.randint(60, 250)),
+                      total_gross=gross, total_expenses=expenses, net_profit=gross - expenses)
+        records.append(DailyRecord(*(values[f] for f in FIELDS)))
+    return records[::-1]
+
+
+def python_loop(records: list) -> tuple:
+    """Lo mismo que TrendAnalytics, día por día"""
+    by_day = {r.date: r for r in records}
+    first, last = date.fromisoformat(min(by_day)), date.fromisoformat(max(by_day))
+    nets, rolling = [], {7: [], 30: []}
+    weekday = [[0.0, 0] for _ in range(7)]
+    day = first
+    while day <= last:
+        record = by_day.get(day.isoformat())
+        nets.append(record.net_profit if record else 0.0)
+        for window in rolling:
+            rolling[window].append(sum(nets[-window:]))
+        if record:
+            weekday[day.weekday()][0] += record.net_profit
+            weekday[day.weekday()][1] += 1
+        day += timedelta(days=1)
+    return rolling, [total / count if count else 0.0 for total, count in weekday]
+
+
+def bench(fn, *args, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(sizes):
+    print(f"{'días':>8} {'bucle':>12} {'construir':>12} {'recortar':>12}")
+    for n in sizes:
+        records = make_records(n)
+        analytics = TrendAnalytics(records)
+        rolling, weekday = python_loop(records)
+        assert abs(analytics.daily['net_30d'].iloc[-1] - rolling[30][-1]) < 1e-6
+        assert all(abs(a - b) < 1e-6 for a, b in zip(analytics.weekday_averages()['net_profit'], weekday))
+        start = (analytics.daily.index[-1] - timedelta(days=364)).date().isoformat()
+        loop = bench(python_loop, records)
+        build = bench(TrendAnalytics, records)
+        cut = bench(analytics.series, start)
+        print(f"{n:>8} {loop * 1000:>10.1f}ms {build * 1000:>10.1f}ms {cut * 1000:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [365, 365 * 3, 365 * 10])
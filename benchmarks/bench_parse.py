@@ -0,0 +1,63 @@
+"""Benchmark: parseo fila a fila vs. parseo vectorizado de la salida de get_all_values()
+
+- columnas: parse_columns(), columnas tipadas (lo que usan resúmenes y análisis)
+- registros: parse_rows(), mismas columnas convertidas a diccionarios por fila
+
+Uso:
+    python benchmarks/bench_parse.py [filas ...]
+"""
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from storage import parse_columns, parse_rows, row_to_record  # noqa: E402
+
+
+def make_rows(n: int, seed: int = 7) -> list:
+    """Genera n filas con el formato de la hoja (todo strings, algunas celdas vacías o inválidas)"""
+    rng = random.Random(seed)
+    start = date(2015, 1, 1)
+    rows = []
+    for i in range(n):
+        odo = 10000 + i * 120
+        extras = json.dumps([{'name': 'Bono', 'amount': 25.0}]) if i % 10 == 0 else '[]'
+        row = [
+            (start + timedelta(days=i)).isoformat(),
+            f"{rng.uniform(50, 300):.2f}", f"{rng.uniform(0, 150):.2f}", '' if i % 7 else '20',
+            extras, str(odo), str(odo + 120), '120', '3.43', '10.63', '12.5',
+            'n/a' if i % 50 == 0 else '4', '[]', '12.0', '250.0', '27.13', '222.87', '200', '10.85'
+        ]
+        if i % 13 == 0:
+            row = row[:12]  # gspread recorta las celdas vacías al final de la fila
+        rows.append(row)
+    return rows
+
+
+def bench(fn, rows, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(sizes):
+    print(f"{'filas':>8} {'fila a fila':>12} {'columnas':>12} {'registros':>12} {'speedup col/reg':>16}")
+    for n in sizes:
+        rows = make_rows(n)
+        loop = bench(lambda rs: [row_to_record(r) for r in rs], rows)
+        cols = bench(parse_columns, rows)
+        recs = bench(parse_rows, rows)
+        assert parse_rows(rows) == [row_to_record(r) for r in rows]
+        print(f"{n:>8} {loop * 1000:>10.1f}ms {cols * 1000:>10.1f}ms {recs * 1000:>10.1f}ms "
+              f"{loop / cols:>7.1f}x/{loop / recs:.1f}x")
+
+
+if __name__ == '__main__':
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 50000])
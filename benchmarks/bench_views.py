@@ -0,0 +1,173 @@
+"""Benchmark: tiempo y llamadas a la API de las vistas Diario/Semanal/Mensual y de save_daily_record
+
+Ejecuta las mismas funciones de database.py que usa cada vista de la app contra
+una hoja en memoria (benchmarks/fake_gspread.py), con latencia y errores de cuota
+simulados, y mide para cada tamaño de hoja:
+
+- carga en frío: primera ejecución con el backend recién creado
+- carga en caliente: la ejecución siguiente (índice y cachés ya cargados)
+- copia en disco: proceso nuevo que arranca desde snapshot.py (hoja sin cambios)
+- guardar: save_daily_record de un día nuevo (append) y de un día existente (update),
+  hasta que el diario local queda replicado en la hoja; la copia en disco no se
+  reescribe al guardar (solo al sincronizar)
+
+Uso:
+    python benchmarks/bench_views.py [filas ...] [--latency 0.05] [--quota-error-rate 0.02]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import database as db  # noqa: E402
+from fake_gspread import FakeSpreadsheet  # noqa: E402
+from storage import CONFIG_HEADERS, DEFAULT_CONFIG, HEADERS, record_to_row  # noqa: E402
+
+
+def make_record(day: date, odo: int, rng: random.Random) -> dict:
+    uber, lyft, tips = rng.uniform(50, 300), rng.uniform(0, 150), rng.choice([0.0, 0.0, 20.0])
+    miles = rng.randint(60, 250)
+    gallons = miles / DEFAULT_CONFIG['mpg']
+    fuel = gallons * DEFAULT_CONFIG['gas_price']
+    food, misc, wear = rng.uniform(0, 25), rng.uniform(0, 15), miles * 0.1
+    gross = uber + lyft + tips
+    expenses = fuel + food + misc + wear
+    return {
+        'uber_earnings': uber, 'lyft_earnings': lyft, 'cash_tips': tips,
+        'additional_income': [], 'odo_start': odo, 'odo_end': odo + miles,
+        'miles_driven': miles, 'gallons_used': gallons, 'fuel_cost': fuel,
+        'food_cost': food, 'misc_cost': misc, 'additional_expenses': [],
+        'wear_and_tear': wear, 'total_gross': gross, 'total_expenses': expenses,
+        'net_profit': gross - expenses, 'meta_neta_objetivo': DEFAULT_CONFIG['meta_neta_objetivo'],
+        'expense_ratio': expenses / gross * 100 if gross else 0.0,
+    }
+
+def make_rows(n: int, end: date, seed: int = 7) -> list:
+    """n días consecutivos terminando en `end`, con el formato de las filas de la hoja"""
+    rng = random.Random(seed)
+    rows, odo = [], 10000
+    for i in range(n):
+        day = end - timedelta(days=n - 1 - i)
+        record = make_record(day, odo, rng)
+        odo = record['odo_end']
+        rows.append(record_to_row(record, day.isoformat()))
+    return rows
+
+
+# --- Lo que ejecuta cada vista de driver_profit_app.py en una ejecución del script ---
+def daily_view(today: date):
+    db.preload_page_data()
+    db.get_vehicle_config()
+    db.get_record_by_date(today.isoformat())
+    db.get_last_record(today.isoformat())
+    db.get_statistics()
+    db.get_all_records(limit=30)
+    db.get_analytics().series()
+
+def weekly_view(today: date):
+    db.preload_page_data()
+    config = db.get_vehicle_config()
+    week_start, _ = db.get_week_start_end(today)
+    weekly = db.get_weekly_summary(config['meta_neta_objetivo'], week_start)
+    db.get_records_between(weekly['week_start'], weekly['week_end'])
+
+def monthly_view(today: date):
+    db.preload_page_data()
+    config = db.get_vehicle_config()
+    db.get_first_record_date()
+    monthly = db.get_monthly_summary(config['meta_neta_objetivo'], today.year, today.month)
+    db.get_records_between(monthly['month_start'], monthly['month_end'])
+
+VIEWS = [('diario', daily_view), ('semanal', weekly_view), ('mensual', monthly_view)]
+
+
+def restart_app(sheet: FakeSpreadsheet, workdir: str) -> dict:
+    """Backend y cachés de database.py recién creados sobre la misma hoja (como un proceso nuevo)
+
+    El backend sale de db.get_driver_backend, igual que en la app (diario local,
+    copia en disco en `workdir`, limitador y reintentos); solo cambian la conexión
+    (la hoja en memoria) y los secrets.
+    """
+    settings = {
+        'spreadsheet': db.SHEET_NAME, 'worksheet_db': 'Driver_Finances_DB', 'worksheet_config': 'Config',
+        'journal_path': os.path.join(workdir, 'write_journal.jsonl'),
+        'snapshot_path': os.path.join(workdir, 'sheet_snapshot.arrow'),
+        # Sin límite local de cuota (mediría esperas, no la app) y con backoff corto para los 429 simulados
+        'read_per_minute': 1e9, 'write_per_minute': 1e9,
+        'max_retries': 8, 'retry_base_delay': 0.01, 'retry_max_delay': 0.1,
+    }
+    db.get_storage_settings = lambda driver_id=db.DEFAULT_DRIVER: dict(settings)
+    db.get_connection = lambda spreadsheet_name=db.SHEET_NAME: sheet
+    db.st.cache_resource.clear()
+    return settings
+
+def fresh_app(rows: list, latency: float, quota_error_rate: float, workdir: str) -> FakeSpreadsheet:
+    """Hoja en memoria nueva y backend/cachés de database.py recién creados (sin copia en disco previa)"""
+    sheet = FakeSpreadsheet(latency=latency, quota_error_rate=quota_error_rate)
+    sheet.seed(HEADERS, rows, [DEFAULT_CONFIG['mpg'], DEFAULT_CONFIG['gas_price'],
+                               DEFAULT_CONFIG['meta_neta_objetivo']], CONFIG_HEADERS)
+    restart_app(sheet, workdir)
+    return sheet
+
+def save_replicated(record: dict, day: str):
+    """save_daily_record y espera a que el diario local quede replicado en la hoja"""
+    db.save_daily_record(record, day)
+    while db.get_pending_writes():
+        time.sleep(0.001)
+
+def measure(sheet: FakeSpreadsheet, fn, *args) -> tuple:
+    sheet.reset_calls()
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0, dict(sheet.calls), sheet.quota_errors
+
+def report(n: int, scenario: str, result: tuple):
+    elapsed, calls, errors = result
+    detail = ', '.join(f"{m}={c}" for m, c in sorted(calls.items())) or '-'
+    print(f"{n:>7} {scenario:<18} {elapsed * 1000:>10.1f}ms {sum(calls.values()):>8} {errors:>5}  {detail}")
+
+
+def main(sizes, latency: float, quota_error_rate: float):
+    today = date.today()
+    print(f"latencia={latency * 1000:.0f}ms, errores 429={quota_error_rate:.0%}")
+    print(f"{'filas':>7} {'escenario':<18} {'tiempo':>12} {'llamadas':>8} {'429':>5}  detalle")
+    for n in sizes:
+        rows = make_rows(n, today)
+        for name, view in VIEWS:
+            with tempfile.TemporaryDirectory() as tmp:
+                sheet = fresh_app(rows, latency, quota_error_rate, tmp)
+                report(n, f"{name} (frío)", measure(sheet, view, today))
+                report(n, f"{name} (caliente)", measure(sheet, view, today))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sheet = fresh_app(rows, latency, quota_error_rate, tmp)
+            daily_view(today)  # La primera carga deja la copia en disco
+            restart_app(sheet, tmp)
+            report(n, "diario (disco)", measure(sheet, daily_view, today))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sheet = fresh_app(rows[:-1], latency, quota_error_rate, tmp)
+            daily_view(today)
+            odo = int(rows[-2][6])
+            snapshot_path = db.get_storage_settings()['snapshot_path']
+            saved_at = os.path.getmtime(snapshot_path)
+            new_record = make_record(today, odo, random.Random(n))
+            report(n, "guardar (nuevo)", measure(sheet, save_replicated, new_record, today.isoformat()))
+            new_record['food_cost'] += 5
+            report(n, "guardar (existente)", measure(sheet, save_replicated, new_record, today.isoformat()))
+            assert os.path.getmtime(snapshot_path) == saved_at, "la copia en disco se reescribió al guardar"
+            report(n, "diario tras guardar", measure(sheet, daily_view, today))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('sizes', nargs='*', type=int, default=[100, 1000, 10000])
+    parser.add_argument('--latency', type=float, default=0.0, help="segundos por llamada remota")
+    parser.add_argument('--quota-error-rate', type=float, default=0.0, help="probabilidad de 429 por llamada")
+    args = parser.parse_args()
+    main(args.sizes, args.latency, args.quota_error_rate)
@@ -0,0 +1,296 @@
+"""Hoja de cálculo en memoria con la misma superficie de gspread que usa la app
+
+FakeSpreadsheet / FakeWorksheet imitan los métodos de gspread.Spreadsheet y
+gspread.Worksheet que llaman storage.py y database.py, guardando las celdas como
+strings (igual que las devuelve get_all_values). Cada llamada remota:
+
+- se cuenta en `spreadsheet.calls` (por método),
+- espera `latency` segundos (latencia de red simulada),
+- puede fallar con un gspread.exceptions.APIError 429 (cuota excedida), al azar
+  con probabilidad `quota_error_rate` o de forma forzada con fail_next(n).
+
+Uso:
+    sheet = FakeSpreadsheet(latency=0.05, quota_error_rate=0.01)
+    sheet.seed(HEADERS, rows, config, CONFIG_HEADERS)  # filas de datos sin encabezado
+    backend = SheetsBackend(lambda: sheet)
+"""
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import gspread
+
+_CELL = re.compile(r'^([A-Z]*)(\d*)$')
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for ch in letters:
+        number = number * 26 + ord(ch) - ord('A') + 1
+    return number
+
+def parse_range(a1: str) -> Tuple[Optional[str], int, int, Optional[int], Optional[int]]:
+    """'Hoja'!A2:S10 -> (hoja, fila1, col1, fila2, col2); fila2/col2 None si el rango es abierto"""
+    title = None
+    if '!' in a1:
+        title, a1 = a1.rsplit('!', 1)
+        title = title.strip("'")
+    start, _, end = a1.partition(':')
+    col1, row1 = _CELL.match(start).groups()
+    col2, row2 = _CELL.match(end or start).groups()
+    return (title, int(row1 or 1), _column_number(col1 or 'A'),
+            int(row2) if row2 else None, _column_number(col2) if col2 else None)
+
+def _cell(value) -> str:
+    # Sheets devuelve todo como texto formateado; los enteros en float se muestran sin '.0'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return '' if value is None else str(value)
+
+
+class _FakeResponse:
+    """Respuesta HTTP mínima para construir un gspread.exceptions.APIError"""
+
+    def __init__(self, code: int, message: str, status: str):
+        self.status_code = code
+        self._error = {'code': code, 'message': message, 'status': status}
+        self.text = message
+
+    def json(self) -> Dict:
+        return {'error': self._error}
+
+def api_error(code: int, message: str, status: str) -> gspread.exceptions.APIError:
+    return gspread.exceptions.APIError(_FakeResponse(code, message, status))
+
+
+def quota_error() -> gspread.exceptions.APIError:
+    return api_error(429, "Quota exceeded for quota metric 'Read requests' (simulado)", 'RESOURCE_EXHAUSTED')
+
+
+class FakeWorksheet:
+    """Pestaña en memoria: lista de filas de strings, sin celdas vacías al final de cada fila"""
+
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, rows: int = 1000, cols: int = 26):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.data: List[List[str]] = []
+
+    def _remote(self, method: str):
+        self.spreadsheet._remote(method)
+
+    def _trimmed(self, row: List[str]) -> List[str]:
+        row = list(row)
+        while row and row[-1] == '':
+            row.pop()
+        return row
+
+    def _set_row(self, row_num: int, first_col: int, values: List):
+        if row_num > self.row_count:
+            # Igual que la API: update/batch_update no agregan filas a la cuadrícula
+            raise api_error(400, f"Range ('{self.title}'!A{row_num}) exceeds grid limits. "
+                                 f"Max rows: {self.row_count}, max columns: {self.col_count}", 'INVALID_ARGUMENT')
+        self.spreadsheet._touch()
+        while len(self.data) < row_num:
+            self.data.append([])
+        row = self.data[row_num - 1]
+        while len(row) < first_col - 1 + len(values):
+            row.append('')
+        for offset, value in enumerate(values):
+            row[first_col - 1 + offset] = _cell(value)
+        self.data[row_num - 1] = self._trimmed(row)
+
+    def _read(self, row1: int, col1: int, row2: Optional[int], col2: Optional[int]) -> List[List[str]]:
+        last_row = min(row2 or len(self.data), len(self.data))
+        rows = [self.data[i][col1 - 1:col2] for i in range(row1 - 1, last_row)]
+        # Igual que la API: se recortan las filas vacías del final
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    # --- Lecturas ---
+    def get_all_values(self) -> List[List[str]]:
+        self._remote('get_all_values')
+        width = max((len(r) for r in self.data), default=0)
+        return [r + [''] * (width - len(r)) for r in self.data]
+
+    def get(self, range_name: str) -> List[List[str]]:
+        self._remote('get')
+        _, row1, col1, row2, col2 = parse_range(range_name)
+        return self._read(row1, col1, row2, col2)
+
+    def row_values(self, row: int) -> List[str]:
+        self._remote('row_values')
+        return list(self.data[row - 1]) if row <= len(self.data) else []
+
+    def col_values(self, col: int) -> List[str]:
+        self._remote('col_values')
+        values = [r[col - 1] if len(r) >= col else '' for r in self.data]
+        while values and values[-1] == '':
+            values.pop()
+        return values
+
+    def find(self, query: str, in_column: Optional[int] = None):
+        self._remote('find')
+        for row_num, row in enumerate(self.data, start=1):
+            for col_num, value in enumerate(row, start=1):
+                if value == query and in_column in (None, col_num):
+                    return gspread.cell.Cell(row_num, col_num, value)
+        return None
+
+    # --- Escrituras ---
+    def update(self, range_name: str, values: List[List], **kwargs):
+        self._remote('update')
+        _, row1, col1, _, _ = parse_range(range_name)
+        for offset, row in enumerate(values):
+            self._set_row(row1 + offset, col1, row)
+        return {'updatedRange': f"'{self.title}'!{range_name}", 'updatedRows': len(values)}
+
+    def batch_update(self, data: List[Dict], **kwargs):
+        self._remote('batch_update')
+        for item in data:
+            _, row1, col1, _, _ = parse_range(item['range'])
+            for offset, row in enumerate(item['values']):
+                self._set_row(row1 + offset, col1, row)
+        return {'totalUpdatedRows': sum(len(item['values']) for item in data)}
+
+    def _append(self, rows: List[List]) -> Dict:
+        # La API agrega después de la última fila con datos
+        last = len(self.data)
+        while last and not self.data[last - 1]:
+            last -= 1
+        first, end = last + 1, last + len(rows)
+        # append sí agranda la cuadrícula si hace falta
+        self.row_count = max(self.row_count, end)
+        for offset, values in enumerate(rows, start=1):
+            self._set_row(last + offset, 1, values)
+        return {'updates': {'updatedRange': f"'{self.title}'!A{first}:S{end}", 'updatedRows': len(rows)}}
+
+    def append_row(self, values: List, **kwargs):
+        self._remote('append_row')
+        return self._append([values])
+
+    def append_rows(self, values: List[List], **kwargs):
+        self._remote('append_rows')
+        return self._append(values)
+
+    def delete_rows(self, start_index: int, end_index: Optional[int] = None):
+        self._remote('delete_rows')
+        self.spreadsheet._touch()
+        deleted = len(self.data[start_index - 1:end_index or start_index])
+        del self.data[start_index - 1:end_index or start_index]
+        self.row_count -= deleted
+
+    def add_rows(self, rows: int):
+        self._remote('add_rows')
+        self.row_count += rows
+
+    def resize(self, rows: Optional[int] = None, cols: Optional[int] = None):
+        self._remote('resize')
+        self.row_count = rows if rows is not None else self.row_count
+        self.col_count = cols if cols is not None else self.col_count
+        del self.data[self.row_count:]
+
+
+class FakeSpreadsheet:
+    """Spreadsheet en memoria con latencia y errores de cuota configurables"""
+
+    def __init__(self, latency: float = 0.0, quota_error_rate: float = 0.0, seed: int = 0,
+                 worksheet_db: str = "Driver_Finances_DB", worksheet_config: str = "Config"):
+        self.latency = latency
+        self.quota_error_rate = quota_error_rate
+        self.calls: Counter = Counter()
+        self.quota_errors = 0
+        self._forced_errors: List[gspread.exceptions.APIError] = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._worksheets: Dict[str, FakeWorksheet] = {}
+        self.worksheet_db = worksheet_db
+        self.worksheet_config = worksheet_config
+        # Contador de modificaciones: hace de modifiedTime de Drive
+        self._revision = 0
+
+    def _remote(self, method: str):
+        with self._lock:
+            self.calls[method] += 1
+            error = self._forced_errors.pop(0) if self._forced_errors else None
+            if error is None and self.quota_error_rate > 0 and self._rng.random() < self.quota_error_rate:
+                error = quota_error()
+            if error is not None and error.code == 429:
+                self.quota_errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if error is not None:
+            raise error
+
+    def _touch(self):
+        self._revision += 1
+
+    def fail_next(self, count: int = 1, error: Optional[Callable[[], gspread.exceptions.APIError]] = None):
+        """Las próximas `count` llamadas remotas fallan con 429 (o con el error que construye `error`)"""
+        with self._lock:
+            self._forced_errors.extend((error or quota_error)() for _ in range(count))
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+            self.quota_errors = 0
+
+    # --- Superficie de gspread.Spreadsheet ---
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self._remote('worksheet')
+        try:
+            return self._worksheets[title]
+        except KeyError:
+            raise gspread.exceptions.WorksheetNotFound(title)
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        self._remote('add_worksheet')
+        ws = FakeWorksheet(self, title, rows, cols)
+        self._worksheets[title] = ws
+        return ws
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        self._remote('worksheets')
+        return list(self._worksheets.values())
+
+    def get_lastUpdateTime(self) -> str:
+        self._remote('get_lastUpdateTime')
+        return f"2025-01-01T00:00:00.{self._revision:06d}Z"
+
+    def values_batch_get(self, ranges: List[str], params: Optional[Dict] = None) -> Dict:
+        self._remote('values_batch_get')
+        value_ranges = []
+        for a1 in ranges:
+            title, row1, col1, row2, col2 = parse_range(a1)
+            ws = self._worksheets.get(title)
+            values = ws._read(row1, col1, row2, col2) if ws else []
+            entry = {'range': a1}
+            if values:
+                entry['values'] = values
+            value_ranges.append(entry)
+        return {'valueRanges': value_ranges}
+
+    # --- Preparación de datos (no cuenta como llamada remota) ---
+    def seed(self, headers: List[str], rows: List[List], config: Optional[List] = None,
+             config_headers: Optional[List[str]] = None):
+        """Crea las pestañas con encabezados, filas de datos y (opcional) la fila de configuración"""
+        self._touch()
+        db = self._worksheets.setdefault(self.worksheet_db, FakeWorksheet(self, self.worksheet_db, cols=20))
+        db.data = [db._trimmed([_cell(v) for v in headers])]
+        db.data.extend(db._trimmed([_cell(v) for v in row]) for row in rows)
+        db.row_count = max(db.row_count, len(db.data))
+        cfg = self._worksheets.setdefault(self.worksheet_config, FakeWorksheet(self, self.worksheet_config, 10, 10))
+        cfg.data = []
+        if config_headers:
+            cfg.data.append([_cell(v) for v in config_headers])
+            if config:
+                cfg.data.append([_cell(v) for v in config])
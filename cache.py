@@ -0,0 +1,44 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class RangeCache:
+    """Caché de resultados derivados, indexada por clave y por el rango de fechas del que dependen
+
+    Cada entrada declara el rango [start, end] de fechas ISO ('YYYY-MM-DD') que
+    la afecta (None = sin límite). Al guardar o borrar un día solo se descartan
+    las entradas cuyo rango contiene esa fecha; el resto sigue en caché.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[Optional[str], Optional[str], float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, start: Optional[str], end: Optional[str],
+                       compute: Callable[[], Any]) -> Any:
+        """Devuelve el valor en caché o lo calcula (las excepciones no se guardan)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] <= self.ttl:
+                return entry[3]
+        value = compute()
+        with self._lock:
+            self._entries[key] = (start, end, now, value)
+        return value
+
+    def invalidate_date(self, date: str):
+        """Descarta las entradas cuyo rango incluye la fecha dada"""
+        with self._lock:
+            stale = [
+                key for key, (start, end, _, _) in self._entries.items()
+                if (start is None or start <= date) and (end is None or date <= end)
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
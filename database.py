@@ -1,56 +1,99 @@
+import time
+_IMPORT_STARTED = time.perf_counter()  # Para el informe de arranque (ver IMPORT_SECONDS al final)
+
 import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
-import json
+from typing import Optional, List, Dict, TYPE_CHECKING
 from calendar import monthrange
+import os
+import threading
+from storage import StorageBackend, DailyRecord, DEFAULT_CONFIG, create_backend, record_to_row, row_to_record
+from write_behind import WriteBehindQueue
+from journal import JournaledBackend, WriteJournal
+from snapshot import SnapshotStore
+from importer import ImportFormatError, aggregate_earnings, build_rows
+from exporter import DEFAULT_CHUNK_SIZE, export_records
+from cache import RangeCache
+from rollups import RollupIndex
+from analytics import TrendAnalytics
+from sheets_client import (
+    QuotaExceededError, QuotaLimiter, api_error_type, is_quota_error, READ_REQUESTS_PER_MINUTE, WRITE_REQUESTS_PER_MINUTE
+)
+from instrumentation import CallRecorder, SessionCalls
+
+if TYPE_CHECKING:
+    import gspread
 
-# Nombre de la hoja de cálculo y pestañas
+# Nombre de la hoja de cálculo y pestañas (valores por defecto de cada conductor)
 SHEET_NAME = "App_Uber_2025"
 WORKSHEET_DB = "Driver_Finances_DB"
 WORKSHEET_CONFIG = "Config"
 
+# Conductor usado cuando no hay sección [drivers] en los secrets
+DEFAULT_DRIVER = "default"
+
+# Diario local de guardados pendientes de replicar en Google Sheets
+JOURNAL_PATH = "write_journal.jsonl"
+
+# Copia en disco de la hoja ya parseada, para arrancar sin descargarla
+SNAPSHOT_PATH = "sheet_snapshot.arrow"
+
 # --- CONEXIÓN CON GOOGLE SHEETS (CON CACHÉ) ---
-@st.cache_resource(ttl=300)  # Cache por 5 minutos
-def get_connection():
-    """Conecta con Google Sheets usando los secretos de Streamlit (con caché)"""
+@st.cache_resource
+def get_gspread_client() -> "gspread.Client":
+    """Autoriza la cuenta de servicio una sola vez por proceso (compartida por todos los conductores)
+
+    gspread y google-auth tardan en importarse: se cargan aquí, la primera vez
+    que hace falta la conexión, y no al arrancar la app.
+    """
+    started = time.perf_counter()
+    import gspread
+    from google.oauth2.service_account import Credentials
+    get_call_recorder().record_import('google', time.perf_counter() - started)
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive"
+    ]
+    
+    # Cargar credenciales desde st.secrets
+    credentials_dict = dict(st.secrets["gcp_service_account"])
+    # Arreglar el formato de la llave privada
+    if "private_key" in credentials_dict:
+        credentials_dict["private_key"] = credentials_dict["private_key"].replace("\\n", "\n")
+    
+    creds = Credentials.from_service_account_info(credentials_dict, scopes=scopes)
+    return gspread.authorize(creds)
+
+@st.cache_resource(ttl=300)  # Una conexión por hoja de cálculo, cacheada 5 minutos
+def get_connection(spreadsheet_name: str = SHEET_NAME):
+    """Abre la hoja de cálculo indicada reutilizando el cliente autorizado (con caché)"""
     try:
-        scopes = [
-            "https://www.googleapis.com/auth/spreadsheets",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        
-        # Cargar credenciales desde st.secrets
-        credentials_dict = dict(st.secrets["gcp_service_account"])
-        # Arreglar el formato de la llave privada
-        if "private_key" in credentials_dict:
-            credentials_dict["private_key"] = credentials_dict["private_key"].replace("\\n", "\n")
-        
-        creds = Credentials.from_service_account_info(credentials_dict, scopes=scopes)
-        client = gspread.authorize(creds)
+        client = get_gspread_client()
+        import gspread
         
         # Abrir la hoja de cálculo por nombre
         try:
-            sheet = client.open(SHEET_NAME)
+            started = time.perf_counter()
+            sheet = client.open(spreadsheet_name)
+            get_call_recorder().observe('open', 'read', time.perf_counter() - started)
             # Verificar que realmente obtuvimos un objeto Spreadsheet
             if sheet is None:
                 raise Exception("No se pudo obtener el objeto Spreadsheet")
             return sheet
         except gspread.exceptions.SpreadsheetNotFound:
-            st.error(f"❌ No se encontró el Google Sheet '{SHEET_NAME}'. Por favor:")
+            st.error(f"❌ No se encontró el Google Sheet '{spreadsheet_name}'. Por favor:")
             st.info("1. Crea un Google Sheet con ese nombre exacto\n2. Compártelo con el email de la cuenta de servicio\n3. Verifica que tenga permisos de 'Editor'")
             return None
         except gspread.exceptions.APIError as api_error:
             error_str = str(api_error)
             # Manejar error 429 (Quota exceeded)
-            if "429" in error_str or "Quota exceeded" in error_str:
+            if is_quota_error(api_error):
                 st.error("⚠️ **Límite de solicitudes excedido**")
                 st.warning("Has excedido el límite de solicitudes a Google Sheets API. Por favor espera unos minutos antes de intentar de nuevo.")
                 st.info("**Solución:**\n1. Espera 1-2 minutos antes de recargar\n2. La aplicación usa caché para reducir las llamadas\n3. Evita hacer clic múltiples veces rápidamente")
                 return None
             elif "Response" in error_str or "200" in error_str:
-                st.error(f"❌ Error de acceso al Google Sheet '{SHEET_NAME}'")
+                st.error(f"❌ Error de acceso al Google Sheet '{spreadsheet_name}'")
                 st.warning("El Sheet existe pero puede haber un problema de permisos o acceso.")
                 st.info("**Solución:**\n1. Verifica que el Google Sheet 'App_Uber_2025' existe\n2. Compártelo con el email de la cuenta de servicio (Editor)\n3. El email de la cuenta está en tus secrets de Streamlit (campo 'client_email')")
             else:
@@ -65,7 +108,7 @@ def get_connection():
                 st.info("**Posibles causas:**\n1. El Google Sheet no existe o tiene otro nombre\n2. La cuenta de servicio no tiene permisos\n3. El Sheet no está compartido correctamente")
                 st.info("**Solución:**\n1. Verifica que existe un Google Sheet llamado exactamente 'App_Uber_2025'\n2. Compártelo con el email de la cuenta de servicio\n3. Dale permisos de 'Editor'")
             else:
-                st.error(f"Error al abrir la hoja '{SHEET_NAME}': {error_str}")
+                st.error(f"Error al abrir la hoja '{spreadsheet_name}': {error_str}")
                 st.info("Verifica que el Google Sheet existe y está compartido con la cuenta de servicio")
             return None
     except KeyError as e:
@@ -80,172 +123,366 @@ def get_connection():
             st.info(f"Detalles: {error_msg}")
             st.info("Verifica:\n1. Que los secrets de Streamlit estén configurados correctamente\n2. Que el Google Sheet 'App_Uber_2025' exista\n3. Que la cuenta de servicio tenga permisos de acceso")
         else:
-            st.error(f"Error al conectar con Google Sheets '{SHEET_NAME}': {error_msg}")
+            st.error(f"Error al conectar con Google Sheets '{spreadsheet_name}': {error_msg}")
         return None
 
+# --- CONDUCTORES ---
+def get_driver_settings() -> Dict[str, Dict]:
+    """Lee la sección [drivers] de los secrets: id del conductor -> su hoja/pestañas o archivo SQLite"""
+    drivers = {}
+    try:
+        drivers = {str(driver_id): dict(settings) for driver_id, settings in st.secrets.get("drivers", {}).items()}
+    except Exception:
+        pass  # Sin secrets: un único conductor con la hoja por defecto
+    return drivers or {DEFAULT_DRIVER: {}}
+
+def list_drivers() -> List[str]:
+    return list(get_driver_settings())
+
+def get_driver_name(driver_id: str) -> str:
+    """Nombre para mostrar del conductor (campo 'name', o su id)"""
+    return str(get_driver_settings().get(driver_id, {}).get('name', driver_id))
+
+def current_driver() -> str:
+    """Conductor de la sesión actual (st.session_state['driver_id'], o el primero configurado)"""
+    drivers = get_driver_settings()
+    try:
+        driver_id = st.session_state.get('driver_id')
+    except Exception:
+        driver_id = None  # Fuera de una sesión de Streamlit (p. ej. hilos de escritura diferida)
+    return driver_id if driver_id in drivers else next(iter(drivers))
+
+# --- BACKEND DE ALMACENAMIENTO ---
+def get_storage_settings(driver_id: str = DEFAULT_DRIVER) -> Dict:
+    """Lee la sección [storage] de los secrets (o variables de entorno) y la completa con la del conductor"""
+    settings = {}
+    try:
+        settings = dict(st.secrets.get("storage", {}))
+    except Exception:
+        pass  # Sin secrets: se usa Google Sheets por defecto
+    if os.environ.get("DRIVER_STORAGE_BACKEND"):
+        settings['backend'] = os.environ["DRIVER_STORAGE_BACKEND"]
+    if os.environ.get("DRIVER_SQLITE_PATH"):
+        settings['sqlite_path'] = os.environ["DRIVER_SQLITE_PATH"]
+    if os.environ.get("DRIVER_JOURNAL_PATH"):
+        settings['journal_path'] = os.environ["DRIVER_JOURNAL_PATH"]
+    if os.environ.get("DRIVER_SNAPSHOT_PATH"):
+        settings['snapshot_path'] = os.environ["DRIVER_SNAPSHOT_PATH"]
+    drivers = get_driver_settings()
+    driver = drivers.get(driver_id, {})
+    for key, default in (('sqlite_path', 'driver_finances.db'), ('journal_path', JOURNAL_PATH),
+                         ('snapshot_path', SNAPSHOT_PATH)):
+        if key not in driver and len(drivers) > 1:
+            # Varios conductores sin archivo propio: un archivo por conductor
+            root, ext = os.path.splitext(settings.get(key, default))
+            settings[key] = f"{root}_{driver_id}{ext}"
+    settings.update(driver)
+    settings.setdefault('spreadsheet', SHEET_NAME)
+    settings.setdefault('worksheet_db', WORKSHEET_DB)
+    settings.setdefault('worksheet_config', WORKSHEET_CONFIG)
+    return settings
+
+@st.cache_resource
+def get_quota_limiter() -> QuotaLimiter:
+    """Limitador de cuota compartido: la cuota de Google es por cuenta de servicio, no por hoja"""
+    settings = get_storage_settings()
+    return QuotaLimiter(
+        read_per_minute=float(settings.get('read_per_minute', READ_REQUESTS_PER_MINUTE)),
+        write_per_minute=float(settings.get('write_per_minute', WRITE_REQUESTS_PER_MINUTE))
+    )
+
+def _enabled(settings: Dict, key: str) -> bool:
+    # Opciones activadas por defecto que se apagan con false/0/no
+    return str(settings.get(key, True)).lower() not in ('false', '0', 'no')
+
+@st.cache_resource
+def get_driver_backend(driver_id: str) -> StorageBackend:
+    """Devuelve el backend de almacenamiento del conductor (una instancia por conductor y proceso)"""
+    settings = get_storage_settings(driver_id)
+    spreadsheet_name = settings['spreadsheet']
+    snapshot = None
+    if _enabled(settings, 'snapshot'):
+        # Arranques en frío desde disco; se revalida con la fecha de modificación del Google Sheet
+        snapshot = SnapshotStore(settings.get('snapshot_path', SNAPSHOT_PATH), settings['worksheet_db'])
+    backend = create_backend(settings, sheet_provider=lambda: get_connection(spreadsheet_name),
+                             limiter=get_quota_limiter(), snapshot=snapshot)
+    client = getattr(backend, 'client', None)
+    if backend.name == 'sheets' and _enabled(settings, 'journal'):
+        # Guardados confirmados en el diario local y replicados a Google Sheets en segundo plano
+        backend = JournaledBackend(backend, WriteJournal(settings.get('journal_path', JOURNAL_PATH)))
+    if client is not None:
+        client.add_observer(get_call_recorder().observe)
+    return backend
+
+def get_backend() -> StorageBackend:
+    """Devuelve el backend del conductor de la sesión actual"""
+    return get_driver_backend(current_driver())
+
+# --- INSTRUMENTACIÓN DE LLAMADAS A LA API ---
+def get_debug_settings() -> Dict:
+    """Lee la sección [debug] de los secrets (o variables de entorno): panel y log de llamadas"""
+    settings = {}
+    try:
+        settings = dict(st.secrets.get("debug", {}))
+    except Exception:
+        pass
+    if os.environ.get("DRIVER_DEBUG_PANEL"):
+        settings['panel'] = os.environ["DRIVER_DEBUG_PANEL"].lower() in ('1', 'true', 'yes')
+    if os.environ.get("DRIVER_API_LOG"):
+        settings['log_path'] = os.environ["DRIVER_API_LOG"]
+    return settings
+
+def debug_panel_enabled() -> bool:
+    return bool(get_debug_settings().get('panel', False))
+
+@st.cache_resource
+def get_call_recorder() -> CallRecorder:
+    """Registro de llamadas remotas (uno por proceso, con desglose por sesión y ejecución)"""
+    recorder = CallRecorder(log_path=get_debug_settings().get('log_path'))
+    recorder.record_import('database', IMPORT_SECONDS)
+    return recorder
+
+def _session_calls() -> SessionCalls:
+    if '_api_calls' not in st.session_state:
+        st.session_state['_api_calls'] = SessionCalls()
+    return st.session_state['_api_calls']
+
+def begin_rerun():
+    """Llamar al inicio del script: las llamadas siguientes se cuentan para esta ejecución"""
+    get_call_recorder().begin_rerun(_session_calls())
+
+def end_rerun() -> Dict:
+    """Llamar al final del script: cierra el conteo de la ejecución y lo devuelve"""
+    return get_call_recorder().end_rerun(_session_calls())
+
+def mark_startup(name: str):
+    """Marca un hito de la ejecución en curso ('shell' = primer pintado, 'data' = datos cargados)"""
+    get_call_recorder().mark(_session_calls(), name)
+
+def get_call_stats() -> Dict:
+    """Llamadas de la ejecución en curso, de la sesión y del proceso (para el panel de depuración)"""
+    session = _session_calls()
+    return {
+        'rerun': session.rerun,
+        'current': session.current.snapshot(),
+        'session': session.total.snapshot(),
+        'process': get_call_recorder().process.snapshot(),
+        'history': list(session.history),
+        'marks': dict(session.marks),
+        'imports': dict(get_call_recorder().imports),
+    }
+
+@st.cache_resource
+def get_summary_cache(driver_id: str) -> RangeCache:
+    """Caché de listas y resúmenes derivados, con invalidación por fecha (una por conductor)"""
+    return RangeCache(ttl=60)
+
+def _summary_cache() -> RangeCache:
+    return get_summary_cache(current_driver())
+
+def invalidate_date(date: str):
+    """Descarta solo los resultados en caché que dependen de la fecha modificada"""
+    _summary_cache().invalidate_date(date)
+
+def clear_cache():
+    """Descarta todas las cachés de datos del conductor (resúmenes e índice en memoria del backend)"""
+    _summary_cache().clear()
+    try:
+        get_backend().invalidate()
+    except Exception:
+        pass
+
+@st.cache_resource
+def _rollup_holder(driver_id: str) -> Dict:
+    return {'index': None, 'lock': threading.Lock()}
+
+def get_rollups() -> RollupIndex:
+    """Acumulados diarios/semanales/mensuales; se reconstruyen solo si cambió la versión de los datos"""
+    holder = _rollup_holder(current_driver())
+    backend = get_backend()
+    with holder['lock']:
+        version = backend.current_version()
+        index = holder['index']
+        if index is None or index.version != version:
+            index = RollupIndex(backend.scan_records(), version=version)
+            holder['index'] = index
+        return index
+
+@st.cache_resource
+def _analytics_holder(driver_id: str) -> Dict:
+    return {'analytics': None, 'lock': threading.Lock()}
+
+def get_analytics() -> TrendAnalytics:
+    """Tendencias de todo el historial (ventanas móviles, ratios y días de la semana)
+
+    Se calculan una vez por versión de los datos y se comparten entre sesiones;
+    mientras no se guarde ni borre nada, cada ejecución solo recorta las series.
+    """
+    holder = _analytics_holder(current_driver())
+    backend = get_backend()
+    with holder['lock']:
+        version = backend.current_version()
+        analytics = holder['analytics']
+        if analytics is None or analytics.version != version:
+            analytics = TrendAnalytics(backend.scan_records(), version=version)
+            holder['analytics'] = analytics
+        return analytics
+
+def _peek_rollups() -> Optional[RollupIndex]:
+    # Índice ya construido (si no existe todavía no hace falta actualizarlo)
+    return _rollup_holder(current_driver())['index']
+
 def init_worksheets():
-    """Inicializa las hojas si no existen y crea los encabezados"""
+    """Inicializa las hojas si no existen y crea los encabezados (una sola vez por proceso)"""
     try:
-        sheet = get_connection()
-        if sheet is None:
-            return
-        
-        # Inicializar hoja de configuración
-        try:
-            ws_config = sheet.worksheet(WORKSHEET_CONFIG)
-            # Verificar si tiene datos
-            if not ws_config.row_values(1):
-                ws_config.update('A1:C1', [['MPG', 'Gas Price', 'Meta Neta Objetivo']])
-            if not ws_config.row_values(2):
-                ws_config.update('A2:C2', [[35.0, 3.10, 200.0]])
-        except gspread.exceptions.WorksheetNotFound:
-            ws_config = sheet.add_worksheet(title=WORKSHEET_CONFIG, rows=10, cols=10)
-            # Crear encabezados
-            ws_config.update('A1:C1', [['MPG', 'Gas Price', 'Meta Neta Objetivo']])
-            # Valores por defecto
-            ws_config.update('A2:C2', [[35.0, 3.10, 200.0]])
-        
-        # Inicializar hoja de registros
-        try:
-            ws_db = sheet.worksheet(WORKSHEET_DB)
-            # Verificar si tiene encabezados
-            headers = ws_db.row_values(1)
-            if not headers or len(headers) < 17:
-                # Crear encabezados si no existen
-                headers = [
-                    'Fecha', 'Uber Earnings', 'Lyft Earnings', 'Cash Tips', 'Additional Income',
-                    'Odo Start', 'Odo End', 'Miles Driven', 'Gallons Used', 'Fuel Cost',
-                    'Food Cost', 'Misc Cost', 'Additional Expenses', 'Wear And Tear',
-                    'Total Gross', 'Total Expenses', 'Net Profit', 'Meta Neta Objetivo', 'Expense Ratio'
-                ]
-                ws_db.update('A1:S1', [headers])
-        except gspread.exceptions.WorksheetNotFound:
-            ws_db = sheet.add_worksheet(title=WORKSHEET_DB, rows=1000, cols=20)
-            # Crear encabezados
-            headers = [
-                'Fecha', 'Uber Earnings', 'Lyft Earnings', 'Cash Tips', 'Additional Income',
-                'Odo Start', 'Odo End', 'Miles Driven', 'Gallons Used', 'Fuel Cost',
-                'Food Cost', 'Misc Cost', 'Additional Expenses', 'Wear And Tear',
-                'Total Gross', 'Total Expenses', 'Net Profit', 'Meta Neta Objetivo', 'Expense Ratio'
-            ]
-            ws_db.update('A1:S1', [headers])
+        get_backend().ensure_schema()
     except Exception as e:
         pass  # Se manejará cuando se use
 
+def reverify_worksheets():
+    """Vuelve a verificar las hojas y encabezados aunque ya se hayan verificado"""
+    try:
+        get_backend().reverify_schema()
+    except Exception as e:
+        st.error(f"Error verificando las hojas: {e}")
+
+def preload_page_data():
+    """Carga en un solo viaje de red los datos de la página (configuración y registros)
+
+    Con Google Sheets, la primera carga usa un único values_batch_get para ambas
+    pestañas; después get_vehicle_config, get_record_by_date, get_last_record,
+    get_all_records y get_statistics se sirven desde memoria.
+    """
+    try:
+        get_backend().preload()
+    except Exception as e:
+        pass  # Cada función volverá a intentar su propia lectura
+
 # --- CONFIGURACIÓN DEL VEHÍCULO (Pestaña 'Config') ---
+CONFIG_WRITE_DELAY = 2.0  # Segundos que se agrupan los cambios del sidebar antes de escribir
+
+def _write_config(driver_id: str, config: Dict):
+    # Se ejecuta en el hilo de la cola, sin sesión: el conductor viene en la clave
+    get_driver_backend(driver_id).update_config(
+        config['mpg'], config['gas_price'], config['meta_neta_objetivo'], config.get('effective_from')
+    )
+
+@st.cache_resource
+def get_config_writer() -> WriteBehindQueue:
+    """Cola de escritura diferida para la configuración (una por proceso, con una clave por conductor)"""
+    return WriteBehindQueue(_write_config, delay=CONFIG_WRITE_DELAY)
+
+def _pending_config() -> Optional[Dict]:
+    """Configuración del conductor actual aún en la cola de escritura (sin la fecha de vigencia)"""
+    pending = get_config_writer().pending(current_driver())
+    if pending is None:
+        return None
+    return {key: pending[key] for key in DEFAULT_CONFIG}
+
 def get_vehicle_config() -> Dict:
-    """Obtiene la configuración del vehículo desde Google Sheets"""
+    """Obtiene la configuración del vehículo (incluye cambios aún pendientes de escribir)
+
+    El backend la mantiene en memoria y solo relee la pestaña 'Config' cuando se
+    cambia desde la app o tras `config_ttl` (por defecto una hora).
+    """
+    pending = _pending_config()
+    if pending is not None:
+        return pending
     try:
-        sheet = get_connection()
-        if sheet is None:
-            return {'mpg': 35.0, 'gas_price': 3.10, 'meta_neta_objetivo': 200.0}
-        ws = sheet.worksheet(WORKSHEET_CONFIG)
-        
-        # Leer valores de la fila 2 (A2, B2, C2)
-        vals = ws.row_values(2)
-        
-        # Si la hoja está vacía, devolver valores por defecto
-        if not vals or len(vals) < 3:
-            return {'mpg': 35.0, 'gas_price': 3.10, 'meta_neta_objetivo': 200.0}
-            
-        return {
-            'mpg': float(vals[0]) if vals[0] else 35.0,
-            'gas_price': float(vals[1]) if len(vals) > 1 and vals[1] else 3.10,
-            'meta_neta_objetivo': float(vals[2]) if len(vals) > 2 and vals[2] else 200.0
-        }
+        return get_backend().get_config()
     except Exception as e:
-        return {'mpg': 35.0, 'gas_price': 3.10, 'meta_neta_objetivo': 200.0}
+        return dict(DEFAULT_CONFIG)
 
-def update_vehicle_config(mpg: float, gas_price: float, meta_neta_objetivo: float):
-    """Actualiza la configuración del vehículo en Google Sheets"""
+def get_cached_vehicle_config() -> Optional[Dict]:
+    """Configuración disponible sin conectarse (memoria o copia en disco); None si hay que leer la hoja
+
+    Permite dibujar la barra lateral antes de autorizar la cuenta de servicio y
+    abrir el Google Sheet.
+    """
+    pending = _pending_config()
+    if pending is not None:
+        return pending
+    try:
+        return get_backend().cached_config()
+    except Exception as e:
+        return None
+
+def get_config_for_date(date: str) -> Dict:
+    """Configuración vigente en una fecha (YYYY-MM-DD), para recalcular días pasados
+
+    Cada cambio desde la barra lateral rige desde el día en que se hizo; los días
+    anteriores conservan los valores de entonces.
+    """
+    # Una sola lectura: la cola puede escribirla y vaciarse entre dos llamadas
+    pending = get_config_writer().pending(current_driver())
+    if pending is not None and date >= pending['effective_from']:
+        return {key: pending[key] for key in DEFAULT_CONFIG}
+    try:
+        return get_backend().get_config_for_date(date)
+    except Exception as e:
+        return get_vehicle_config()
+
+def get_config_history() -> List[Dict]:
+    """Cambios de configuración del conductor actual, del más antiguo al más reciente
+
+    Returns:
+        [{'effective_from', 'mpg', 'gas_price', 'meta_neta_objetivo'}]
+    """
     try:
-        sheet = get_connection()
-        if sheet is None:
-            return
-        ws = sheet.worksheet(WORKSHEET_CONFIG)
-        # Actualizar celdas específicas
-        ws.update('A2:C2', [[mpg, gas_price, meta_neta_objetivo]])
+        return get_backend().get_config_history()
     except Exception as e:
-        st.error(f"Error actualizando configuración: {e}")
+        return []
+
+def update_vehicle_config(mpg: float, gas_price: float, meta_neta_objetivo: float):
+    """Encola la actualización de la configuración; solo se escribe el último valor de la ventana
+
+    El cambio queda registrado en el historial como vigente desde hoy.
+    """
+    get_config_writer().submit(current_driver(), {
+        'mpg': mpg,
+        'gas_price': gas_price,
+        'meta_neta_objetivo': meta_neta_objetivo,
+        'effective_from': datetime.now().date().isoformat()
+    })
+
+def get_config_write_error() -> Optional[str]:
+    """Error de la última escritura fallida de la configuración del conductor (None si no hay)"""
+    return get_config_writer().last_error(current_driver())
+
+def flush_vehicle_config():
+    """Escribe de inmediato la configuración pendiente"""
+    get_config_writer().flush()
 
 # --- GESTIÓN DE REGISTROS (Pestaña 'Driver_Finances_DB') ---
 def save_daily_record(data: Dict, record_date: Optional[str] = None) -> bool:
-    """Guarda un registro diario en Google Sheets"""
+    """Guarda un registro diario en el backend de almacenamiento"""
     try:
         if record_date is None:
             record_date = datetime.now().date().isoformat()
         
-        sheet = get_connection()
-        if sheet is None:
-            return False
+        backend = get_backend()
         
         # Inicializar hojas si es necesario
         init_worksheets()
         
-        ws = sheet.worksheet(WORKSHEET_DB)
-        
-        # Verificar que los encabezados existan
-        headers = ws.row_values(1)
-        if not headers or len(headers) < 19:
-            # Crear encabezados si no existen
-            headers = [
-                'Fecha', 'Uber Earnings', 'Lyft Earnings', 'Cash Tips', 'Additional Income',
-                'Odo Start', 'Odo End', 'Miles Driven', 'Gallons Used', 'Fuel Cost',
-                'Food Cost', 'Misc Cost', 'Additional Expenses', 'Wear And Tear',
-                'Total Gross', 'Total Expenses', 'Net Profit', 'Meta Neta Objetivo', 'Expense Ratio'
-            ]
-            ws.update('A1:S1', [headers])
-        
-        # Convertir listas a JSON
-        additional_income_json = json.dumps(data.get('additional_income', []))
-        additional_expenses_json = json.dumps(data.get('additional_expenses', []))
+        # Preparar la fila de datos (orden estricto de columnas A:S)
+        row_data = record_to_row(data, record_date)
+        version_before = backend.current_version()
+        backend.upsert_record(record_date, row_data)
         
-        # Preparar la fila de datos (orden estricto de columnas)
-        row_data = [
-            record_date,                                    # A: Fecha
-            float(data.get('uber_earnings', 0)),          # B: Uber
-            float(data.get('lyft_earnings', 0)),          # C: Lyft
-            float(data.get('cash_tips', 0)),               # D: Propinas
-            additional_income_json,                         # E: Ingresos Extra (JSON)
-            int(data.get('odo_start', 0)),                 # F: Odo Inicio
-            int(data.get('odo_end', 0)),                   # G: Odo Fin
-            float(data.get('miles_driven', 0)),            # H: Millas
-            float(data.get('gallons_used', 0)),            # I: Galones
-            float(data.get('fuel_cost', 0)),               # J: Costo Gasolina
-            float(data.get('food_cost', 0)),               # K: Comida
-            float(data.get('misc_cost', 0)),               # L: Varios
-            additional_expenses_json,                       # M: Gastos Extra (JSON)
-            float(data.get('wear_and_tear', 0)),           # N: Desgaste
-            float(data.get('total_gross', 0)),             # O: Bruto Total
-            float(data.get('total_expenses', 0)),          # P: Gastos Total
-            float(data.get('net_profit', 0)),              # Q: Neto Final
-            float(data.get('meta_neta_objetivo', 0)),     # R: Meta del día
-            float(data.get('expense_ratio', 0))           # S: Ratio
-        ]
-        
-        # Buscar si ya existe la fecha (Columna A)
-        # find() devuelve None si no encuentra la celda, no lanza excepción
-        cell = ws.find(record_date, in_column=1)
-        if cell is not None:
-            # Si existe, actualizamos esa fila
-            row_num = cell.row
-            # Actualizar toda la fila de una vez (más eficiente)
-            range_name = f'A{row_num}:S{row_num}'
-            ws.update(range_name, [row_data])
-        else:
-            # Si no existe, agregamos nueva fila
-            ws.append_row(row_data)
-        
-        # Limpiar caché después de guardar para que se vean los cambios inmediatamente
-        st.cache_data.clear()
+        # Invalidar solo los resúmenes que incluyen esta fecha y actualizar los acumulados
+        invalidate_date(record_date)
+        rollups = _peek_rollups()
+        if rollups is not None:
+            rollups.set_day(row_to_record(row_data), version_before, backend.data_version)
         
         return True
-    except gspread.exceptions.APIError as api_error:
-        error_str = str(api_error)
-        if "429" in error_str or "Quota exceeded" in error_str:
-            st.error("⚠️ Límite de solicitudes excedido. Espera unos minutos e intenta de nuevo.")
-        else:
-            st.error(f"❌ Error de API al guardar: {error_str}")
+    except QuotaExceededError:
+        # El cliente ya reintentó con backoff; la cuota sigue agotada
+        st.error("⚠️ Límite de solicitudes excedido. Espera unos minutos e intenta de nuevo.")
+        return False
+    except api_error_type() as api_error:
+        st.error(f"❌ Error de API al guardar: {api_error}")
         return False
     except Exception as e:
         st.error(f"❌ Error guardando registro: {e}")
@@ -253,278 +490,132 @@ def save_daily_record(data: Dict, record_date: Optional[str] = None) -> bool:
         st.error(f"Detalles: {traceback.format_exc()}")
         return False
 
-def get_record_by_date(date: str) -> Optional[Dict]:
-    """Obtiene un registro por fecha específica"""
+def import_earnings_csv(lines, platform: Optional[str] = None, filename: str = '') -> Dict:
+    """Importa un CSV de ganancias de Uber/Lyft con una sola escritura masiva
+
+    Suma los viajes por día en una pasada y escribe todos los días juntos
+    (batch_update para los existentes y append_rows para los nuevos).
+
+    Returns:
+        {'platform', 'days', 'new', 'updated', 'trips', 'skipped'}
+
+    Raises:
+        ImportFormatError: Si el CSV no tiene columnas de fecha y ganancias reconocibles
+    """
+    result = aggregate_earnings(lines, platform, filename)
+    days = result['days']
+    if not days:
+        return dict(result, days=0, new=0, updated=0)
+    backend = get_backend()
+    init_worksheets()
+    existing = {r.date: r for r in backend.get_records_between(min(days), max(days)) if r.date in days}
+    # Los días nuevos llevan la meta que regía en su fecha
+    meta_by_day = {day: get_config_for_date(day)['meta_neta_objetivo'] for day in days if day not in existing}
+    backend.upsert_records(build_rows(days, result['platform'], existing, meta_by_day))
+    # Cambian muchos días a la vez: los acumulados se reconstruyen en la próxima consulta
+    _summary_cache().clear()
+    return dict(result, days=len(days), new=len(days) - len(existing), updated=len(existing))
+
+def export_history(out, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Exporta todo el historial del conductor actual a CSV o Parquet, por bloques
+
+    Args:
+        out: Ruta o archivo abierto (texto para CSV, binario para Parquet)
+        fmt: 'csv' o 'parquet'
+        chunk_size: Filas leídas de la hoja por llamada
+
+    Returns:
+        Número de registros exportados
+    """
+    return export_records(get_backend().iter_records(chunk_size), out, fmt)
+
+def get_pending_writes() -> int:
+    """Guardados y borrados del diario local que aún no se replicaron en Google Sheets"""
     try:
-        sheet = get_connection()
-        if sheet is None:
-            return None
-        
-        # Inicializar hojas si es necesario
-        init_worksheets()
-        
-        ws = sheet.worksheet(WORKSHEET_DB)
-        
-        # find() devuelve None si no encuentra la celda
-        cell = ws.find(date, in_column=1)
-        if cell is None:
-            return None
-        
-        row_values = ws.row_values(cell.row)
-        
-        # Mapear la lista de valores a un diccionario
-        # gspread devuelve todo como strings, hay que convertir
-        additional_income = []
-        additional_expenses = []
-        
-        try:
-            if len(row_values) > 4 and row_values[4]:
-                additional_income = json.loads(row_values[4])
-        except:
-            pass
-            
-        try:
-            if len(row_values) > 12 and row_values[12]:
-                additional_expenses = json.loads(row_values[12])
-        except:
-            pass
-        
-        def safe_float(val, default=0.0):
-            try:
-                if val is None or val == '' or (isinstance(val, str) and not val.strip()):
-                    return default
-                return float(str(val).strip())
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_int(val, default=0):
-            try:
-                if val is None or val == '' or (isinstance(val, str) and not val.strip()):
-                    return default
-                return int(float(str(val).strip()))
-            except (ValueError, TypeError):
-                return default
-        
+        return get_backend().pending_count()
+    except Exception as e:
+        return 0
+
+def get_sync_status() -> Dict:
+    """Estado de la réplica del diario local: pendientes, fallidas y últimos errores
+
+    Returns:
+        {'pending', 'failed', 'last_error' (transitorio, se reintenta),
+         'last_failure' (operación descartada), 'failed_path'}
+    """
+    try:
+        backend = get_backend()
         return {
-            'date': row_values[0] if len(row_values) > 0 else '',
-            'uber_earnings': safe_float(row_values[1] if len(row_values) > 1 else 0),
-            'lyft_earnings': safe_float(row_values[2] if len(row_values) > 2 else 0),
-            'cash_tips': safe_float(row_values[3] if len(row_values) > 3 else 0),
-            'additional_income': additional_income,
-            'odo_start': safe_int(row_values[5] if len(row_values) > 5 else 0),
-            'odo_end': safe_int(row_values[6] if len(row_values) > 6 else 0),
-            'miles_driven': safe_float(row_values[7] if len(row_values) > 7 else 0),
-            'gallons_used': safe_float(row_values[8] if len(row_values) > 8 else 0),
-            'fuel_cost': safe_float(row_values[9] if len(row_values) > 9 else 0),
-            'food_cost': safe_float(row_values[10] if len(row_values) > 10 else 0),
-            'misc_cost': safe_float(row_values[11] if len(row_values) > 11 else 0),
-            'additional_expenses': additional_expenses,
-            'wear_and_tear': safe_float(row_values[13] if len(row_values) > 13 else 0),
-            'total_gross': safe_float(row_values[14] if len(row_values) > 14 else 0),
-            'total_expenses': safe_float(row_values[15] if len(row_values) > 15 else 0),
-            'net_profit': safe_float(row_values[16] if len(row_values) > 16 else 0),
-            'meta_neta_objetivo': safe_float(row_values[17] if len(row_values) > 17 else 0),
-            'expense_ratio': safe_float(row_values[18] if len(row_values) > 18 else 0)
+            'pending': backend.pending_count(),
+            'failed': backend.failed_count(),
+            'last_error': getattr(backend, 'last_error', None),
+            'last_failure': getattr(backend, 'last_failure', None),
+            'failed_path': getattr(getattr(backend, 'journal', None), 'failed_path', None),
         }
     except Exception as e:
-        return None
+        return {'pending': 0, 'failed': 0, 'last_error': None, 'last_failure': None, 'failed_path': None}
 
-def get_last_record() -> Optional[Dict]:
-    """Obtiene el último registro ingresado para sacar el odómetro final"""
+def get_record_by_date(date: str) -> Optional[DailyRecord]:
+    """Obtiene un registro por fecha específica (servido desde el índice en memoria del backend)"""
     try:
-        sheet = get_connection()
-        if sheet is None:
-            return None
-        ws = sheet.worksheet(WORKSHEET_DB)
-        all_rows = ws.get_all_values()
-        
-        if len(all_rows) < 2:  # Solo encabezados o vacía
-            return None
-        
-        # Buscar el último registro con datos (saltando encabezado)
-        for i in range(len(all_rows) - 1, 0, -1):
-            row = all_rows[i]
-            if len(row) > 6 and row[0] and row[6]:  # Tiene fecha y odómetro final
-                try:
-                    return {
-                        'odo_end': int(float(row[6])),
-                        'date': row[0]
-                    }
-                except:
-                    continue
+        return get_backend().get_record(date)
+    except Exception as e:
         return None
+
+def get_last_record(before: Optional[str] = None) -> Optional[Dict]:
+    """Obtiene el registro más reciente anterior a `before` (ISO) para sacar el odómetro final"""
+    try:
+        return get_backend().get_last_record(before)
     except Exception as e:
         return None
 
-@st.cache_data(ttl=60)  # Cache por 1 minuto para reducir llamadas a la API
-def get_all_records(limit: int = 30) -> List[Dict]:
+def get_all_records(limit: int = 30) -> List[DailyRecord]:
     """Obtiene todos los registros, ordenados por fecha descendente (con caché)"""
-    try:
-        sheet = get_connection()
-        if sheet is None:
-            return []
-        
+    def load():
         # Inicializar hojas si es necesario
         init_worksheets()
-        
-        ws = sheet.worksheet(WORKSHEET_DB)
-        
-        # Obtener todos los registros, saltando el encabezado
-        all_rows = ws.get_all_values()
-        
-        if len(all_rows) < 2:
-            return []
-        
-        records = []
-        headers = [h.strip() if isinstance(h, str) else str(h) for h in all_rows[0]]  # Limpiar espacios en encabezados
-        
-        # Mapeo de nombres de columnas (normalizados)
-        column_map = {
-            'Fecha': 'date',
-            'Uber Earnings': 'uber_earnings',
-            'Lyft Earnings': 'lyft_earnings',
-            'Cash Tips': 'cash_tips',
-            'Additional Income': 'additional_income',
-            'Odo Start': 'odo_start',
-            'Odo End': 'odo_end',
-            'Miles Driven': 'miles_driven',
-            'Gallons Used': 'gallons_used',
-            'Fuel Cost': 'fuel_cost',
-            'Food Cost': 'food_cost',
-            'Misc Cost': 'misc_cost',
-            'Additional Expenses': 'additional_expenses',
-            'Wear And Tear': 'wear_and_tear',
-            'Total Gross': 'total_gross',
-            'Total Expenses': 'total_expenses',
-            'Net Profit': 'net_profit',
-            'Meta Neta Objetivo': 'meta_neta_objetivo',
-            'Expense Ratio': 'expense_ratio'
-        }
-        
-        # Función auxiliar para convertir valores
-        def safe_convert_float(val, default=0.0):
-            try:
-                if val is None or val == '' or (isinstance(val, str) and not val.strip()):
-                    return default
-                return float(str(val).strip())
-            except (ValueError, TypeError):
-                return default
-        
-        def safe_convert_int(val, default=0):
-            try:
-                if val is None or val == '' or (isinstance(val, str) and not val.strip()):
-                    return default
-                return int(float(str(val).strip()))
-            except (ValueError, TypeError):
-                return default
-        
-        # Procesar filas (saltando encabezado)
-        for row in all_rows[1:]:
-            if not row or not row[0]:  # Si no hay fecha, saltar
-                continue
-                
-            try:
-                record = {}
-                # Usar índices de columna como respaldo si los encabezados no coinciden
-                # Orden esperado: Fecha, Uber, Lyft, Cash Tips, Additional Income, Odo Start, Odo End,
-                # Miles Driven, Gallons Used, Fuel Cost, Food Cost, Misc Cost, Additional Expenses,
-                # Wear And Tear, Total Gross, Total Expenses, Net Profit, Meta Neta Objetivo, Expense Ratio
-                
-                # Leer por índice directamente (más confiable)
-                if len(row) > 0:
-                    record['date'] = str(row[0]).strip() if row[0] else ''
-                if len(row) > 1:
-                    record['uber_earnings'] = safe_convert_float(row[1], 0.0)
-                if len(row) > 2:
-                    record['lyft_earnings'] = safe_convert_float(row[2], 0.0)
-                if len(row) > 3:
-                    record['cash_tips'] = safe_convert_float(row[3], 0.0)
-                if len(row) > 4:
-                    try:
-                        record['additional_income'] = json.loads(row[4]) if row[4] and str(row[4]).strip() else []
-                    except:
-                        record['additional_income'] = []
-                if len(row) > 5:
-                    record['odo_start'] = safe_convert_int(row[5], 0)
-                if len(row) > 6:
-                    record['odo_end'] = safe_convert_int(row[6], 0)
-                if len(row) > 7:
-                    record['miles_driven'] = safe_convert_float(row[7], 0.0)
-                if len(row) > 8:
-                    record['gallons_used'] = safe_convert_float(row[8], 0.0)
-                if len(row) > 9:
-                    record['fuel_cost'] = safe_convert_float(row[9], 0.0)
-                if len(row) > 10:
-                    record['food_cost'] = safe_convert_float(row[10], 0.0)
-                if len(row) > 11:
-                    record['misc_cost'] = safe_convert_float(row[11], 0.0)
-                if len(row) > 12:
-                    try:
-                        record['additional_expenses'] = json.loads(row[12]) if row[12] and str(row[12]).strip() else []
-                    except:
-                        record['additional_expenses'] = []
-                if len(row) > 13:
-                    record['wear_and_tear'] = safe_convert_float(row[13], 0.0)
-                if len(row) > 14:
-                    record['total_gross'] = safe_convert_float(row[14], 0.0)
-                if len(row) > 15:
-                    record['total_expenses'] = safe_convert_float(row[15], 0.0)
-                if len(row) > 16:
-                    record['net_profit'] = safe_convert_float(row[16], 0.0)
-                if len(row) > 17:
-                    record['meta_neta_objetivo'] = safe_convert_float(row[17], 0.0)
-                if len(row) > 18:
-                    record['expense_ratio'] = safe_convert_float(row[18], 0.0)
-                
-                if record.get('date'):  # Solo agregar si tiene fecha
-                    records.append(record)
-            except Exception as e:
-                continue
-        
-        # Ordenar por fecha descendente
-        try:
-            records.sort(key=lambda x: x.get('date', ''), reverse=True)
-        except:
-            pass
-        
-        return records[:limit]
+        return get_backend().get_records_between(None, None, limit)
+    try:
+        # Depende de todas las fechas: se invalida con cualquier guardado o borrado
+        return _summary_cache().get_or_compute(('records', limit), None, None, load)
+    except Exception as e:
+        return []
+
+def _as_iso(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else value.isoformat()
+
+def get_records_between(start, end) -> List[DailyRecord]:
+    """Obtiene los registros entre dos fechas (incluidas), ordenados por fecha descendente
+
+    Args:
+        start: Fecha inicial (date o 'YYYY-MM-DD'; None = desde el primer registro)
+        end: Fecha final (date o 'YYYY-MM-DD'; None = hasta el último registro)
+    """
+    start_str, end_str = _as_iso(start), _as_iso(end)
+    
+    def load():
+        return get_backend().get_records_between(start_str, end_str)
+    try:
+        # Solo un guardado o borrado dentro del rango invalida esta entrada
+        return _summary_cache().get_or_compute(('between', start_str, end_str), start_str, end_str, load)
     except Exception as e:
         return []
 
+def get_first_record_date() -> Optional[datetime.date]:
+    """Fecha del registro más antiguo (None si no hay registros)"""
+    try:
+        records = get_backend().scan_records()
+        return datetime.strptime(records[-1].date, '%Y-%m-%d').date() if records else None
+    except Exception as e:
+        return None
+
 def get_statistics() -> Dict:
     """Obtiene estadísticas agregadas de todos los registros - usa datos cacheados"""
     try:
-        # Usar get_all_records que ya tiene caché
-        records = get_all_records(limit=365)
-        
-        if not records:
-            return {
-                'total_days': 0,
-                'total_income': 0.0,
-                'total_expenses': 0.0,
-                'total_profit': 0.0,
-                'avg_daily_profit': 0.0,
-                'total_miles': 0.0,
-                'total_fuel_cost': 0.0
-            }
-        
-        total_income = sum(float(r.get('total_gross', 0)) for r in records)
-        total_expenses = sum(float(r.get('total_expenses', 0)) for r in records)
-        total_profit = sum(float(r.get('net_profit', 0)) for r in records)
-        total_miles = sum(float(r.get('miles_driven', 0)) for r in records)
-        total_fuel_cost = sum(float(r.get('fuel_cost', 0)) for r in records)
-        
-        count = len(records)
-        
-        return {
-            'total_days': count,
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'total_profit': total_profit,
-            'avg_daily_profit': total_profit / count if count > 0 else 0.0,
-            'total_miles': total_miles,
-            'total_fuel_cost': total_fuel_cost
-        }
+        # Depende de todas las fechas: se invalida con cualquier guardado o borrado
+        return _summary_cache().get_or_compute(('statistics',), None, None, _compute_statistics)
     except Exception as e:
         return {
             'total_days': 0,
@@ -536,6 +627,29 @@ def get_statistics() -> Dict:
             'total_fuel_cost': 0.0
         }
 
+def _compute_statistics() -> Dict:
+    # Todo el historial (antes se limitaba a los últimos 365 registros), sin copiar los registros
+    records = get_backend().scan_records()
+    
+    # Los campos ya vienen como float desde el parseo: sin conversiones por registro
+    total_income = sum(r.total_gross for r in records)
+    total_expenses = sum(r.total_expenses for r in records)
+    total_profit = sum(r.net_profit for r in records)
+    total_miles = sum(r.miles_driven for r in records)
+    total_fuel_cost = sum(r.fuel_cost for r in records)
+    
+    count = len(records)
+    
+    return {
+        'total_days': count,
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'total_profit': total_profit,
+        'avg_daily_profit': total_profit / count if count > 0 else 0.0,
+        'total_miles': total_miles,
+        'total_fuel_cost': total_fuel_cost
+    }
+
 def get_week_start_end(date: datetime.date) -> tuple:
     """Obtiene el lunes y domingo de la semana que contiene la fecha dada"""
     # weekday() devuelve 0=lunes, 6=domingo
@@ -545,16 +659,13 @@ def get_week_start_end(date: datetime.date) -> tuple:
     return week_start, week_end
 
 def get_weekly_summary(meta_diaria: float, week_start_date: Optional[datetime.date] = None) -> Dict:
-    """Obtiene el resumen semanal (lunes a domingo) - usa datos cacheados
+    """Obtiene el resumen semanal (lunes a domingo) - consulta O(1) a los acumulados precalculados
     
     Args:
         meta_diaria: Meta diaria de ganancia neta
         week_start_date: Fecha del lunes de la semana (si None, usa la semana actual)
     """
     try:
-        # Usar get_all_records que ya tiene caché
-        records = get_all_records(limit=100)
-        
         # Calcular semana actual si no se especifica
         if week_start_date is None:
             today = datetime.now().date()
@@ -563,32 +674,14 @@ def get_weekly_summary(meta_diaria: float, week_start_date: Optional[datetime.da
             week_start = week_start_date
             week_end = week_start + timedelta(days=6)
         
-        total_income = 0.0
-        total_expenses = 0.0
-        total_profit = 0.0
-        total_miles = 0.0
-        days_count = 0
-        
-        for r in records:
-            try:
-                r_date = datetime.strptime(r.get('date', ''), '%Y-%m-%d').date()
-                if week_start <= r_date <= week_end:
-                    total_income += float(r.get('total_gross', 0))
-                    total_expenses += float(r.get('total_expenses', 0))
-                    total_profit += float(r.get('net_profit', 0))
-                    total_miles += float(r.get('miles_driven', 0))
-                    days_count += 1
-            except:
-                continue
+        totals = get_rollups().week(week_start)
         
         meta_semanal = meta_diaria * 7
         
+        total_profit = totals['total_profit']
+        
         return {
-            'days': days_count,
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'total_profit': total_profit,
-            'total_miles': total_miles,
+            **totals,
             'meta_semanal': meta_semanal,
             'diferencia_meta': total_profit - meta_semanal,
             'porcentaje_meta': (total_profit / meta_semanal * 100) if meta_semanal > 0 else 0.0,
@@ -620,7 +713,7 @@ def get_month_start_end(year: int, month: int) -> tuple:
     return month_start, month_end
 
 def get_monthly_summary(meta_diaria: float, year: Optional[int] = None, month: Optional[int] = None) -> Dict:
-    """Obtiene el resumen mensual del mes especificado - usa datos cacheados
+    """Obtiene el resumen mensual del mes especificado - consulta O(1) a los acumulados precalculados
     
     Args:
         meta_diaria: Meta diaria de ganancia neta
@@ -628,9 +721,6 @@ def get_monthly_summary(meta_diaria: float, year: Optional[int] = None, month: O
         month: Mes (1-12, si None, usa el mes actual)
     """
     try:
-        # Usar get_all_records que ya tiene caché
-        records = get_all_records(limit=100)
-        
         # Calcular mes actual si no se especifica
         if year is None or month is None:
             today = datetime.now().date()
@@ -642,32 +732,14 @@ def get_monthly_summary(meta_diaria: float, year: Optional[int] = None, month: O
         # Calcular días del mes para la meta
         days_in_month = (month_end - month_start).days + 1
         
-        total_income = 0.0
-        total_expenses = 0.0
-        total_profit = 0.0
-        total_miles = 0.0
-        days_count = 0
-        
-        for r in records:
-            try:
-                r_date = datetime.strptime(r.get('date', ''), '%Y-%m-%d').date()
-                if month_start <= r_date <= month_end:
-                    total_income += float(r.get('total_gross', 0))
-                    total_expenses += float(r.get('total_expenses', 0))
-                    total_profit += float(r.get('net_profit', 0))
-                    total_miles += float(r.get('miles_driven', 0))
-                    days_count += 1
-            except:
-                continue
+        totals = get_rollups().month(year, month)
         
         meta_mensual = meta_diaria * days_in_month
         
+        total_profit = totals['total_profit']
+        
         return {
-            'days': days_count,
-            'total_income': total_income,
-            'total_expenses': total_expenses,
-            'total_profit': total_profit,
-            'total_miles': total_miles,
+            **totals,
             'meta_mensual': meta_mensual,
             'diferencia_meta': total_profit - meta_mensual,
             'porcentaje_meta': (total_profit / meta_mensual * 100) if meta_mensual > 0 else 0.0,
@@ -703,17 +775,18 @@ def get_monthly_summary(meta_diaria: float, year: Optional[int] = None, month: O
 def delete_record(date: str) -> bool:
     """Elimina un registro por fecha"""
     try:
-        sheet = get_connection()
-        if sheet is None:
-            return False
-        ws = sheet.worksheet(WORKSHEET_DB)
-        # find() devuelve None si no encuentra la celda
-        cell = ws.find(date, in_column=1)
-        if cell is None:
-            return False
-        ws.delete_rows(cell.row)
-        # Limpiar caché después de eliminar
-        st.cache_data.clear()
-        return True
+        backend = get_backend()
+        version_before = backend.current_version()
+        deleted = backend.delete_record(date)
+        if deleted:
+            # Invalidar solo los resúmenes que incluyen esta fecha y actualizar los acumulados
+            invalidate_date(date)
+            rollups = _peek_rollups()
+            if rollups is not None:
+                rollups.remove_day(date, version_before, backend.data_version)
+        return deleted
     except Exception as e:
         return False
+
+# Tiempo que tardó en importarse este módulo (con storage, pandas, etc.; sin el cliente de Google)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
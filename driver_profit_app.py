@@ -1,11 +1,17 @@
 import streamlit as st
 import database as db
 from datetime import datetime, timedelta
+import io
 import json
+import os
+import tempfile
 
 # Configuración de la página
 st.set_page_config(page_title="Tablero de Rentabilidad - Uber/Lyft", page_icon="🚗", layout="centered")
 
+# Contar las llamadas a Google Sheets de esta ejecución (panel de depuración / log JSON)
+db.begin_rerun()
+
 # Título y Estilo
 st.title("🚗 Control de Meta Neta Diaria")
 st.markdown("---")
@@ -15,12 +21,26 @@ st.markdown("---")
 if 'view_option' not in st.session_state:
     st.session_state.view_option = "📅 Diario"
 
-# Cargar configuración del vehículo desde Google Sheets
-try:
-    vehicle_config = db.get_vehicle_config()
-except Exception as e:
-    vehicle_config = {'mpg': 35.0, 'gas_price': 3.10, 'meta_neta_objetivo': 200.0}
-    # Si hay error, se mostrará en get_connection()
+# --- SELECTOR DE CONDUCTOR (solo si hay varios en [drivers]) ---
+drivers = db.list_drivers()
+if len(drivers) > 1:
+    def _on_driver_change():
+        # La fecha en edición y los ingresos/gastos adicionales del formulario son del conductor anterior
+        for key in ('editing_date', 'last_loaded_date', 'additional_income', 'additional_expenses'):
+            st.session_state.pop(key, None)
+    st.sidebar.selectbox("👤 Conductor", drivers, format_func=db.get_driver_name,
+                         key='driver_id', on_change=_on_driver_change)
+
+# Configuración del vehículo desde memoria o la copia en disco, sin esperar a Google Sheets
+vehicle_config = db.get_cached_vehicle_config()
+if vehicle_config is None:
+    # Primer arranque sin copia local (o configuración vencida): leer configuración y registros en un solo viaje de red
+    db.preload_page_data()
+    try:
+        vehicle_config = db.get_vehicle_config()
+    except Exception as e:
+        vehicle_config = {'mpg': 35.0, 'gas_price': 3.10, 'meta_neta_objetivo': 200.0}
+        # Si hay error, se mostrará en get_connection()
 
 # --- BARRA LATERAL: CONFIGURACIÓN DEL VEHÍCULO ---
 st.sidebar.header("⚙️ Configuración del Auto")
@@ -35,10 +55,88 @@ gas_price = st.sidebar.number_input("Precio Gasolina ($/galón)", value=float(ve
 # Meta Neta Deseada
 meta_neta_objetivo = st.sidebar.number_input("Meta Neta Diaria ($)", value=float(vehicle_config['meta_neta_objetivo']), step=10.0)
 
-# Guardar configuración cuando cambie
+# Guardar configuración cuando cambie (se encola y se escribe agrupada, sin bloquear el render)
 if mpg != vehicle_config['mpg'] or gas_price != vehicle_config['gas_price'] or meta_neta_objetivo != vehicle_config['meta_neta_objetivo']:
     db.update_vehicle_config(mpg, gas_price, meta_neta_objetivo)
 
+config_write_error = db.get_config_write_error()
+if config_write_error:
+    st.sidebar.warning(f"⚠️ No se pudo guardar la configuración, se reintentará: {config_write_error}")
+
+# La estructura de la página ya está dibujada; ahora sí se conecta y se cargan los registros
+db.mark_startup('shell')
+db.preload_page_data()
+db.mark_startup('data')
+
+# Guardados confirmados en el diario local que aún se están replicando en Google Sheets
+sync_status = db.get_sync_status()
+if sync_status['pending']:
+    st.sidebar.caption(f"⏳ {sync_status['pending']} cambio(s) guardado(s) localmente, sincronizando con Google Sheets...")
+    if sync_status['last_error']:
+        st.sidebar.caption(f"Último error (se reintentará): {sync_status['last_error']}")
+if sync_status['failed']:
+    st.sidebar.error(f"❌ {sync_status['failed']} cambio(s) rechazado(s) por Google Sheets, guardados en "
+                     f"{sync_status['failed_path']}. Último error: {sync_status['last_failure'] or '-'}")
+
+# --- IMPORTAR GANANCIAS DESDE CSV (Uber/Lyft) ---
+with st.sidebar.expander("📥 Importar ganancias (CSV)"):
+    st.caption("Sube el CSV de ganancias exportado de Uber o Lyft. Se suman los viajes por día y se actualiza la ganancia de esa plataforma.")
+    import_file = st.file_uploader("Archivo CSV", type=["csv"], key="import_file")
+    import_platform = st.selectbox("Plataforma", ["Detectar", "Uber", "Lyft"], key="import_platform")
+    if import_file is not None and st.button("Importar", key="import_button", use_container_width=True):
+        try:
+            lines = io.TextIOWrapper(import_file, encoding='utf-8-sig', newline='')
+            platform = None if import_platform == "Detectar" else import_platform.lower()
+            result = db.import_earnings_csv(lines, platform, import_file.name)
+            if result['days']:
+                st.success(f"✅ {result['trips']} viajes de {result['platform'].title()} en {result['days']} días "
+                           f"({result['new']} nuevos, {result['updated']} actualizados)")
+            else:
+                st.warning("No se encontraron viajes con fecha y monto en el archivo")
+            if result['skipped']:
+                st.caption(f"Se omitieron {result['skipped']} filas sin fecha o monto válidos")
+        except db.ImportFormatError as e:
+            st.error(f"❌ {e}")
+        except Exception as e:
+            st.error(f"❌ Error importando el archivo: {e}")
+
+# --- EXPORTAR HISTORIAL (CSV/Parquet) ---
+def discard_export_file():
+    """Borra el archivo temporal de la exportación anterior (ya descargado o reemplazado)"""
+    export_file = st.session_state.pop('export_file', None)
+    if export_file:
+        try:
+            os.remove(export_file['path'])
+        except OSError:
+            pass
+
+with st.sidebar.expander("📤 Exportar historial"):
+    st.caption("Descarga todos tus registros. Los ingresos y gastos adicionales se exportan como total y detalle.")
+    export_format = st.selectbox("Formato", ["CSV", "Parquet"], key="export_format")
+    if st.button("Preparar archivo", key="export_button", use_container_width=True):
+        fmt = export_format.lower()
+        discard_export_file()
+        # Se escribe por bloques a un archivo temporal; en memoria solo queda el bloque actual
+        with tempfile.NamedTemporaryFile(suffix=f'.{fmt}', delete=False) as tmp:
+            export_path = tmp.name
+        try:
+            count = db.export_history(export_path, fmt)
+            st.session_state.export_file = {'path': export_path, 'format': fmt, 'count': count}
+        except Exception as e:
+            os.remove(export_path)
+            st.error(f"❌ Error exportando el historial: {e}")
+    export_file = st.session_state.get('export_file')
+    if export_file and os.path.exists(export_file['path']):
+        st.caption(f"{export_file['count']} registros listos")
+        with open(export_file['path'], 'rb') as f:
+            st.download_button(
+                "⬇️ Descargar", f, file_name=f"historial_{datetime.now().strftime('%Y%m%d')}.{export_file['format']}",
+                mime="text/csv" if export_file['format'] == 'csv' else "application/octet-stream",
+                key="export_download", use_container_width=True,
+                # Streamlit ya tiene el contenido: el temporal se borra al descargarlo
+                on_click=discard_export_file,
+            )
+
 # --- SELECTOR DE FECHA ---
 st.sidebar.markdown("---")
 st.sidebar.header("📅 Seleccionar Fecha")
@@ -112,7 +210,6 @@ elif selected_record:
     with col_del1:
         if st.button("🔄 Limpiar registro", key="clear_record"):
             db.delete_record(selected_date_str)
-            st.cache_data.clear()
             st.rerun()
     with col_del2:
         if st.button("📋 Cargar en formulario", key="load_record"):
@@ -201,12 +298,11 @@ if view_option == "📆 Semanal":
         st.sidebar.progress(min(weekly['porcentaje_meta'] / 100, 1.0))
         st.sidebar.caption(f"Progreso: {weekly['porcentaje_meta']:.1f}%")
     except Exception as e:
-        error_str = str(e)
-        if "429" in error_str or "Quota exceeded" in error_str:
+        if db.is_quota_error(e):
             st.sidebar.error("⚠️ Límite de solicitudes excedido")
             st.sidebar.warning("Espera 1-2 minutos y recarga la página")
             if st.sidebar.button("🔄 Limpiar caché y reintentar", key="clear_cache_weekly"):
-                st.cache_data.clear()
+                db.clear_cache()
                 st.rerun()
         else:
             st.sidebar.error(f"Error cargando datos semanales: {e}")
@@ -219,8 +315,10 @@ elif view_option == "📅 Mensual":
     current_year = today.year
     current_month = today.month
     
-    # Selector de año y mes
-    years_list = list(range(current_year - 1, current_year + 1))
+    # Selector de año y mes (desde el año del primer registro guardado)
+    first_record_date = db.get_first_record_date()
+    first_year = min(first_record_date.year, current_year - 1) if first_record_date else current_year - 1
+    years_list = list(range(first_year, current_year + 1))
     months_list = [
         (1, "Enero"), (2, "Febrero"), (3, "Marzo"), (4, "Abril"),
         (5, "Mayo"), (6, "Junio"), (7, "Julio"), (8, "Agosto"),
@@ -263,34 +361,39 @@ elif view_option == "📅 Mensual":
         st.sidebar.progress(min(monthly['porcentaje_meta'] / 100, 1.0))
         st.sidebar.caption(f"Progreso: {monthly['porcentaje_meta']:.1f}%")
     except Exception as e:
-        error_str = str(e)
-        if "429" in error_str or "Quota exceeded" in error_str:
+        if db.is_quota_error(e):
             st.sidebar.error("⚠️ Límite de solicitudes excedido")
             st.sidebar.warning("Espera 1-2 minutos y recarga la página")
             if st.sidebar.button("🔄 Limpiar caché y reintentar", key="clear_cache_monthly"):
-                st.cache_data.clear()
+                db.clear_cache()
                 st.rerun()
         else:
             st.sidebar.error(f"Error cargando datos mensuales: {e}")
 
-# Mostrar formulario solo si está en modo Diario
-if view_option == "📅 Diario":
+# --- FORMULARIO DIARIO ---
+# Es un fragmento: al escribir en sus campos solo se vuelve a ejecutar esta función
+# (los cálculos son locales), no el script entero con las consultas de la barra
+# lateral y del historial. Guardar hace un st.rerun() completo para refrescar todo.
+@st.fragment
+def daily_form(selected_record, selected_date, selected_date_str, is_editing_mode, editing_date_str,
+               odo_start_value, odo_end_value, mpg, gas_price, meta_neta_objetivo):
     # --- SECCIÓN 1: INGRESOS ---
     st.header("1. Ingresos Brutos")
     col1, col2, col3 = st.columns(3)
     with col1:
-        uber_earnings = st.number_input("Ganancia Uber ($)", min_value=0.0, step=1.0, value=float(selected_record['uber_earnings']) if selected_record else 0.0)
+        uber_earnings = st.number_input("Ganancia Uber ($)", min_value=0.0, step=1.0, value=selected_record.uber_earnings if selected_record else 0.0)
     with col2:
-        lyft_earnings = st.number_input("Ganancia Lyft ($)", min_value=0.0, step=1.0, value=float(selected_record['lyft_earnings']) if selected_record else 0.0)
+        lyft_earnings = st.number_input("Ganancia Lyft ($)", min_value=0.0, step=1.0, value=selected_record.lyft_earnings if selected_record else 0.0)
     with col3:
-        cash_tips = st.number_input("Efectivo/Propina ($)", min_value=0.0, step=1.0, value=float(selected_record['cash_tips']) if selected_record else 0.0)
+        cash_tips = st.number_input("Efectivo/Propina ($)", min_value=0.0, step=1.0, value=selected_record.cash_tips if selected_record else 0.0)
 
     # Inicializar lista de ingresos adicionales en session_state
     if 'additional_income' not in st.session_state:
         st.session_state.additional_income = []
 
-    # Usar la fecha seleccionada como clave para saber cuándo recargar
-    if 'last_loaded_date' not in st.session_state or st.session_state.last_loaded_date != selected_date_str:
+    # Usar la fecha seleccionada como clave para saber cuándo recargar (ingresos y gastos adicionales)
+    reload_extras = st.session_state.get('last_loaded_date') != selected_date_str
+    if reload_extras:
         # Cargar ingresos adicionales desde el registro seleccionado si existe
         if selected_record and selected_record.get('additional_income'):
             if isinstance(selected_record['additional_income'], list):
@@ -320,7 +423,7 @@ if view_option == "📅 Diario":
             with col_delete:
                 if st.button("🗑️", key=f"delete_income_{idx}"):
                     st.session_state.additional_income.pop(idx)
-                    st.rerun()
+                    st.rerun(scope="fragment")
 
     # Formulario para agregar nuevo ingreso
     with st.expander("➕ Agregar Nuevo Ingreso"):
@@ -336,7 +439,7 @@ if view_option == "📅 Diario":
                     'name': new_income_name,
                     'amount': float(new_income_amount)
                 })
-                st.rerun()
+                st.rerun(scope="fragment")
             elif new_income_name == "":
                 st.warning("⚠️ Ingresa una descripción para el ingreso")
             elif new_income_amount <= 0:
@@ -355,27 +458,6 @@ if view_option == "📅 Diario":
     st.markdown("---")
     st.header("2. Cálculo de Combustible")
 
-    # Obtener el valor inicial del odómetro
-    # Si hay un registro para la fecha seleccionada, usar ese valor
-    # Si no hay registro, usar el valor final del último registro guardado
-    if selected_record:
-        odo_start_value = int(selected_record['odo_start']) if selected_record.get('odo_start') else 0
-        odo_end_value = int(selected_record['odo_end']) if selected_record.get('odo_end') else 0
-    else:
-        # No hay registro para esta fecha, obtener el último registro
-        try:
-            last_record = db.get_last_record()
-            if last_record and last_record.get('odo_end'):
-                # Usar el odómetro final del último registro como inicial del nuevo
-                odo_start_value = int(last_record['odo_end'])
-                odo_end_value = 0
-            else:
-                odo_start_value = 0
-                odo_end_value = 0
-        except:
-            odo_start_value = 0
-            odo_end_value = 0
-
     odo_col1, odo_col2 = st.columns(2)
     with odo_col1:
         odo_start = st.number_input("Odómetro INICIAL", min_value=0, value=odo_start_value, step=1)
@@ -404,15 +486,15 @@ if view_option == "📅 Diario":
     st.header("3. Otros Gastos Operativos")
 
     # Gastos básicos
-    food_cost = st.number_input("Comida / Café ($)", min_value=0.0, step=1.0, value=float(selected_record['food_cost']) if selected_record else 0.0)
-    misc_cost = st.number_input("Peajes / Lavado / Otros ($)", min_value=0.0, step=1.0, value=float(selected_record['misc_cost']) if selected_record else 0.0)
+    food_cost = st.number_input("Comida / Café ($)", min_value=0.0, step=1.0, value=selected_record.food_cost if selected_record else 0.0)
+    misc_cost = st.number_input("Peajes / Lavado / Otros ($)", min_value=0.0, step=1.0, value=selected_record.misc_cost if selected_record else 0.0)
 
     # Inicializar lista de gastos adicionales en session_state
     # Usar la fecha seleccionada como clave para saber cuándo recargar
     if 'additional_expenses' not in st.session_state:
         st.session_state.additional_expenses = []
 
-    if 'last_loaded_date' not in st.session_state or st.session_state.last_loaded_date != selected_date_str:
+    if reload_extras:
         # Cargar gastos adicionales desde el registro seleccionado si existe
         if selected_record and selected_record.get('additional_expenses'):
             if isinstance(selected_record['additional_expenses'], list):
@@ -441,7 +523,7 @@ if view_option == "📅 Diario":
             with col_delete:
                 if st.button("🗑️", key=f"delete_{idx}"):
                     st.session_state.additional_expenses.pop(idx)
-                    st.rerun()
+                    st.rerun(scope="fragment")
 
     # Formulario para agregar nuevo gasto
     with st.expander("➕ Agregar Nuevo Gasto"):
@@ -457,7 +539,7 @@ if view_option == "📅 Diario":
                     'name': new_expense_name,
                     'amount': float(new_expense_amount)
                 })
-                st.rerun()
+                st.rerun(scope="fragment")
             elif new_expense_name == "":
                 st.warning("⚠️ Ingresa una descripción para el gasto")
             elif new_expense_amount <= 0:
@@ -580,24 +662,63 @@ if view_option == "📅 Diario":
             }
             # Usar siempre la fecha original cuando se está editando
             if db.save_daily_record(record_data, date_to_save):
+                # Con el diario local el guardado se confirma en disco y se replica después
+                saved_where = ("localmente, pendiente de sincronizar con Google Sheets"
+                               if db.get_pending_writes() else "en Google Sheets")
                 if is_editing:
-                    st.success(f"✅ Cambios del {fecha_label_btn} guardados exitosamente en Google Sheets!")
+                    st.success(f"✅ Cambios del {fecha_label_btn} guardados {saved_where}")
                     # Limpiar modo edición después de guardar exitosamente
                     if 'editing_date' in st.session_state:
                         del st.session_state.editing_date
                 else:
-                    st.success(f"✅ Registro del {fecha_label_btn} guardado exitosamente en Google Sheets!")
-                # Limpiar caché y recargar
-                st.cache_data.clear()
+                    st.success(f"✅ Registro del {fecha_label_btn} guardado {saved_where}")
+                # Recargar (save_daily_record ya invalidó los resúmenes de esta fecha)
                 st.rerun()
             else:
                 st.error("❌ Error al guardar el registro")
 
+
+# Mostrar formulario solo si está en modo Diario
+if view_option == "📅 Diario":
+    # Obtener el valor inicial del odómetro
+    # Si hay un registro para la fecha seleccionada, usar ese valor
+    # Si no hay registro, usar el valor final del día anterior más cercano (sirve para días atrasados)
+    if selected_record:
+        odo_start_value = int(selected_record['odo_start']) if selected_record.get('odo_start') else 0
+        odo_end_value = int(selected_record['odo_end']) if selected_record.get('odo_end') else 0
+    else:
+        # No hay registro para esta fecha, obtener el último registro anterior a ella
+        try:
+            last_record = db.get_last_record(selected_date_str)
+            if last_record and last_record.get('odo_end'):
+                # Usar el odómetro final del último registro como inicial del nuevo
+                odo_start_value = int(last_record['odo_end'])
+                odo_end_value = 0
+            else:
+                odo_start_value = 0
+                odo_end_value = 0
+        except:
+            odo_start_value = 0
+            odo_end_value = 0
+
+    # Los días pasados se calculan con la configuración que regía ese día
+    day_mpg, day_gas_price, day_meta = mpg, gas_price, meta_neta_objetivo
+    if selected_date < datetime.now().date():
+        day_config = db.get_config_for_date(selected_date_str)
+        if (day_config['mpg'], day_config['gas_price'], day_config['meta_neta_objetivo']) != (mpg, gas_price, meta_neta_objetivo):
+            day_mpg, day_gas_price, day_meta = day_config['mpg'], day_config['gas_price'], day_config['meta_neta_objetivo']
+            st.caption(f"⚙️ Configuración vigente el {selected_date.strftime('%d/%m/%Y')}: "
+                       f"{day_mpg} MPG, ${day_gas_price:.2f}/galón, meta ${day_meta:.2f}")
+
+    # Valores iniciales desde los datos; lo que se escriba después solo reejecuta el fragmento
+    daily_form(selected_record, selected_date, selected_date_str, is_editing_mode, editing_date_str,
+               odo_start_value, odo_end_value, day_mpg, day_gas_price, day_meta)
+
     # --- HISTORIAL Y ESTADÍSTICAS (solo visible en modo Diario) ---
     st.markdown("---")
     st.header("📈 Historial y Estadísticas")
 
-    tab1, tab2 = st.tabs(["📊 Estadísticas", "📅 Historial"])
+    tab1, tab2, tab3 = st.tabs(["📊 Estadísticas", "📅 Historial", "📉 Tendencias"])
 
     with tab1:
         try:
@@ -624,23 +745,22 @@ if view_option == "📅 Diario":
             if records:
                 st.subheader("Últimos 30 Registros")
                 for record in records:
-                    record_date = record.get('date', '')
-                    with st.expander(f"📅 {record_date} - Ganancia Neta: ${float(record.get('net_profit', 0)):.2f}"):
+                    record_date = record.date
+                    with st.expander(f"📅 {record_date} - Ganancia Neta: ${record.net_profit:.2f}"):
                         col_h1, col_h2, col_h3 = st.columns(3)
-                        col_h1.metric("Ingreso Bruto", f"${float(record.get('total_gross', 0)):.2f}")
-                        col_h2.metric("Gastos", f"${float(record.get('total_expenses', 0)):.2f}")
-                        col_h3.metric("Ganancia Neta", f"${float(record.get('net_profit', 0)):.2f}")
+                        col_h1.metric("Ingreso Bruto", f"${record.total_gross:.2f}")
+                        col_h2.metric("Gastos", f"${record.total_expenses:.2f}")
+                        col_h3.metric("Ganancia Neta", f"${record.net_profit:.2f}")
                         
                         col_h4, col_h5 = st.columns(2)
-                        col_h4.write(f"**Millas:** {float(record.get('miles_driven', 0)):.1f} mi")
-                        col_h5.write(f"**Combustible:** ${float(record.get('fuel_cost', 0)):.2f}")
+                        col_h4.write(f"**Millas:** {record.miles_driven:.1f} mi")
+                        col_h5.write(f"**Combustible:** ${record.fuel_cost:.2f}")
                         
                         # Botones de acción
                         col_btn1, col_btn2 = st.columns([1, 1])
                         with col_btn1:
                             if st.button(f"🗑️ Eliminar", key=f"delete_{record_date}"):
                                 db.delete_record(record_date)
-                                st.cache_data.clear()
                                 st.rerun()
                         with col_btn2:
                             if st.button(f"✏️ Modificar", key=f"edit_{record_date}", type="primary"):
@@ -654,6 +774,45 @@ if view_option == "📅 Diario":
         except Exception as e:
             st.error(f"Error cargando historial: {e}")
 
+    with tab3:
+        try:
+            analytics = db.get_analytics()
+            if not analytics.daily.empty:
+                trend_range = st.radio("Periodo", ["Últimos 90 días", "Último año", "Todo"],
+                                       horizontal=True, key="trend_range")
+                days_back = {"Últimos 90 días": 90, "Último año": 365}.get(trend_range)
+                start = (analytics.daily.index[-1] - timedelta(days=days_back - 1)).date().isoformat() if days_back else None
+                series = analytics.series(start)
+
+                latest = analytics.latest()
+                trend_col1, trend_col2, trend_col3, trend_col4 = st.columns(4)
+                trend_col1.metric("Neto 7 días", f"${latest['net_7d']:.2f}")
+                trend_col2.metric("Neto 30 días", f"${latest['net_30d']:.2f}")
+                trend_col3.metric("Ganancia/Milla (30 días)", f"${latest['profit_per_mile_30d']:.2f}")
+                trend_col4.metric("Ratio de Gastos (30 días)", f"{latest['expense_ratio_30d']:.1f}%")
+
+                st.subheader("Ganancia Neta Móvil")
+                st.line_chart(series[['net_7d', 'net_30d']].rename(columns={'net_7d': '7 días', 'net_30d': '30 días'}))
+                st.subheader("Ganancia por Milla (30 días)")
+                st.line_chart(series[['profit_per_mile_30d']].rename(columns={'profit_per_mile_30d': '$/milla'}))
+                st.subheader("Ratio de Gastos (30 días, %)")
+                st.line_chart(series[['expense_ratio_30d']].rename(columns={'expense_ratio_30d': 'Gastos %'}))
+
+                st.subheader("Promedio por Día de la Semana")
+                weekdays = analytics.weekday_averages()
+                st.bar_chart(weekdays[['net_profit']].rename(columns={'net_profit': 'Ganancia neta promedio'}))
+                st.dataframe(
+                    weekdays.rename(columns={
+                        'total_gross': 'Ingreso', 'total_expenses': 'Gastos', 'net_profit': 'Ganancia Neta',
+                        'miles_driven': 'Millas', 'days': 'Días', 'profit_per_mile': '$/Milla'
+                    }).round(2),
+                    use_container_width=True
+                )
+            else:
+                st.info("No hay registros aún. Guarda tu primer registro para ver tendencias.")
+        except Exception as e:
+            st.error(f"Error cargando tendencias: {e}")
+
 # Mostrar sección de historial y estadísticas para Semanal y Mensual
 elif view_option in ["📆 Semanal", "📅 Mensual"]:
     st.header("📈 Historial y Estadísticas")
@@ -708,27 +867,16 @@ elif view_option in ["📆 Semanal", "📅 Mensual"]:
             st.markdown("---")
             st.subheader("📅 Registros de la Semana")
             
-            week_records = []
-            try:
-                all_records = db.get_all_records(limit=100)
-                for record in all_records:
-                    try:
-                        r_date = datetime.strptime(record.get('date', ''), '%Y-%m-%d').date()
-                        if weekly['week_start'] <= r_date <= weekly['week_end']:
-                            week_records.append(record)
-                    except:
-                        continue
-            except:
-                pass
+            week_records = db.get_records_between(weekly['week_start'], weekly['week_end'])
             
             if week_records:
                 for record in week_records:
-                    record_date = record.get('date', '')
-                    with st.expander(f"📅 {record_date} - Ganancia Neta: ${float(record.get('net_profit', 0)):.2f}"):
+                    record_date = record.date
+                    with st.expander(f"📅 {record_date} - Ganancia Neta: ${record.net_profit:.2f}"):
                         col_h1, col_h2, col_h3 = st.columns(3)
-                        col_h1.metric("Ingreso Bruto", f"${float(record.get('total_gross', 0)):.2f}")
-                        col_h2.metric("Gastos", f"${float(record.get('total_expenses', 0)):.2f}")
-                        col_h3.metric("Ganancia Neta", f"${float(record.get('net_profit', 0)):.2f}")
+                        col_h1.metric("Ingreso Bruto", f"${record.total_gross:.2f}")
+                        col_h2.metric("Gastos", f"${record.total_expenses:.2f}")
+                        col_h3.metric("Ganancia Neta", f"${record.net_profit:.2f}")
                         
                         # Botón de modificar en la esquina inferior derecha
                         col_btn1, col_btn2 = st.columns([3, 1])
@@ -742,13 +890,12 @@ elif view_option in ["📆 Semanal", "📅 Mensual"]:
             else:
                 st.info("No hay registros para esta semana aún.")
         except Exception as e:
-            error_str = str(e)
-            if "429" in error_str or "Quota exceeded" in error_str:
+            if db.is_quota_error(e):
                 st.error("⚠️ **Límite de solicitudes excedido**")
                 st.warning("Has excedido el límite de solicitudes a Google Sheets API. Por favor espera 1-2 minutos antes de intentar de nuevo.")
                 st.info("💡 **Sugerencia:** La aplicación usa caché para reducir las llamadas. Evita hacer clic múltiples veces rápidamente.")
                 if st.button("🔄 Limpiar caché y reintentar", key="clear_cache_main_weekly"):
-                    st.cache_data.clear()
+                    db.clear_cache()
                     st.rerun()
             else:
                 st.error(f"Error cargando datos semanales: {e}")
@@ -810,31 +957,20 @@ elif view_option in ["📆 Semanal", "📅 Mensual"]:
             st.markdown("---")
             st.subheader("📅 Registros del Mes")
             
-            month_records = []
-            try:
-                all_records = db.get_all_records(limit=100)
-                for record in all_records:
-                    try:
-                        r_date = datetime.strptime(record.get('date', ''), '%Y-%m-%d').date()
-                        if monthly['month_start'] <= r_date <= monthly['month_end']:
-                            month_records.append(record)
-                    except:
-                        continue
-            except:
-                pass
+            month_records = db.get_records_between(monthly['month_start'], monthly['month_end'])
             
             if month_records:
                 for record in month_records:
-                    record_date = record.get('date', '')
-                    with st.expander(f"📅 {record_date} - Ganancia Neta: ${float(record.get('net_profit', 0)):.2f}"):
+                    record_date = record.date
+                    with st.expander(f"📅 {record_date} - Ganancia Neta: ${record.net_profit:.2f}"):
                         col_h1, col_h2, col_h3 = st.columns(3)
-                        col_h1.metric("Ingreso Bruto", f"${float(record.get('total_gross', 0)):.2f}")
-                        col_h2.metric("Gastos", f"${float(record.get('total_expenses', 0)):.2f}")
-                        col_h3.metric("Ganancia Neta", f"${float(record.get('net_profit', 0)):.2f}")
+                        col_h1.metric("Ingreso Bruto", f"${record.total_gross:.2f}")
+                        col_h2.metric("Gastos", f"${record.total_expenses:.2f}")
+                        col_h3.metric("Ganancia Neta", f"${record.net_profit:.2f}")
                         
                         col_h4, col_h5 = st.columns(2)
-                        col_h4.write(f"**Millas:** {float(record.get('miles_driven', 0)):.1f} mi")
-                        col_h5.write(f"**Combustible:** ${float(record.get('fuel_cost', 0)):.2f}")
+                        col_h4.write(f"**Millas:** {record.miles_driven:.1f} mi")
+                        col_h5.write(f"**Combustible:** ${record.fuel_cost:.2f}")
                         
                         # Botón de modificar en la esquina inferior derecha
                         col_btn1, col_btn2 = st.columns([3, 1])
@@ -848,13 +984,40 @@ elif view_option in ["📆 Semanal", "📅 Mensual"]:
             else:
                 st.info("No hay registros para este mes aún.")
         except Exception as e:
-            error_str = str(e)
-            if "429" in error_str or "Quota exceeded" in error_str:
+            if db.is_quota_error(e):
                 st.error("⚠️ **Límite de solicitudes excedido**")
                 st.warning("Has excedido el límite de solicitudes a Google Sheets API. Por favor espera 1-2 minutos antes de intentar de nuevo.")
                 st.info("💡 **Sugerencia:** La aplicación usa caché para reducir las llamadas. Evita hacer clic múltiples veces rápidamente.")
                 if st.button("🔄 Limpiar caché y reintentar", key="clear_cache_main_monthly"):
-                    st.cache_data.clear()
+                    db.clear_cache()
                     st.rerun()
             else:
                 st.error(f"Error cargando datos mensuales: {e}")
+
+# --- PANEL DE DEPURACIÓN (opcional, [debug] panel = true en los secrets) ---
+rerun_calls = db.end_rerun()
+if db.debug_panel_enabled():
+    call_stats = db.get_call_stats()
+    with st.sidebar.expander("🛠️ Depuración: llamadas a la API"):
+        st.caption(f"Ejecución #{rerun_calls['rerun']} - render {rerun_calls['render_seconds'] * 1000:.0f} ms")
+        col_dbg1, col_dbg2, col_dbg3 = st.columns(3)
+        col_dbg1.metric("Esta ejecución", rerun_calls['calls'])
+        col_dbg2.metric("Sesión", call_stats['session']['calls'])
+        col_dbg3.metric("Proceso", call_stats['process']['calls'])
+        if rerun_calls['methods']:
+            st.table([
+                {'Método': name, 'Llamadas': m['calls'], 'Total (ms)': round(m['seconds'] * 1000, 1),
+                 'Máx (ms)': round(m['max'] * 1000, 1), 'Reintentos': m['retries'], 'Errores': m['errors']}
+                for name, m in rerun_calls['methods'].items()
+            ])
+        else:
+            st.caption("Sin llamadas remotas en esta ejecución (todo desde caché)")
+        # Importaciones (una vez por proceso) y hitos de esta ejecución
+        startup = [f"importar {name} {seconds * 1000:.0f} ms" for name, seconds in call_stats['imports'].items()]
+        mark_labels = {'shell': "primer pintado", 'data': "datos cargados"}
+        startup += [f"{mark_labels.get(name, name)} {seconds * 1000:.0f} ms"
+                    for name, seconds in call_stats['marks'].items()]
+        if startup:
+            st.caption("Arranque: " + ", ".join(startup))
+        if call_stats['history']:
+            st.caption("Llamadas por ejecución (últimas): " + ", ".join(str(h['calls']) for h in call_stats['history']))
@@ -0,0 +1,131 @@
+"""Exporta todo el historial de registros a CSV o Parquet, por bloques
+
+Los registros se leen del backend en bloques (storage.iter_records) y cada
+bloque se escribe y se descarta, así nunca se tiene toda la hoja en memoria.
+Las listas JSON de ingresos y gastos adicionales se aplanan en dos columnas:
+el total y el detalle ("Bono: 25.00; Peaje: 3.50").
+
+Uso:
+    python exporter.py historial.csv [--driver ID] [--chunk-size 500]
+    python exporter.py historial.parquet
+"""
+import argparse
+import csv
+import os
+import sys
+from typing import IO, Iterable, List, Union
+
+from storage import DailyRecord, FIELDS, INT_FIELDS, JSON_FIELDS
+
+FORMATS = ('csv', 'parquet')
+DEFAULT_CHUNK_SIZE = 500
+
+# Columnas exportadas: los campos JSON se reemplazan por <campo>_total y <campo>_detail
+EXPORT_COLUMNS: List[str] = []
+for _field in FIELDS:
+    if _field in JSON_FIELDS:
+        EXPORT_COLUMNS += [f'{_field}_total', f'{_field}_detail']
+    else:
+        EXPORT_COLUMNS.append(_field)
+
+
+def _flatten_items(items) -> tuple:
+    total, parts = 0.0, []
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict):
+            amount = float(item.get('amount', 0) or 0)
+            total += amount
+            parts.append(f"{item.get('name', '')}: {amount:.2f}")
+    return total, '; '.join(parts)
+
+def flatten_record(record: DailyRecord) -> list:
+    """Valores del registro en el orden de EXPORT_COLUMNS"""
+    values = []
+    for field in FIELDS:
+        value = getattr(record, field)
+        if field in JSON_FIELDS:
+            values.extend(_flatten_items(value))
+        else:
+            values.append(value)
+    return values
+
+def format_for(path: str) -> str:
+    """'csv' o 'parquet' según la extensión del archivo"""
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext not in FORMATS:
+        raise ValueError(f"Formato de exportación no soportado: '{ext or path}' (usa .csv o .parquet)")
+    return ext
+
+def write_csv(chunks: Iterable[List[DailyRecord]], out: IO[str]) -> int:
+    """Escribe los bloques en un archivo de texto CSV; devuelve el número de registros"""
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for chunk in chunks:
+        writer.writerows(flatten_record(r) for r in chunk)
+        count += len(chunk)
+    return count
+
+def _parquet_schema():
+    import pyarrow as pa
+    types = []
+    for column in EXPORT_COLUMNS:
+        if column == 'date' or column.endswith('_detail'):
+            types.append(pa.field(column, pa.string()))
+        elif column in INT_FIELDS:
+            types.append(pa.field(column, pa.int64()))
+        else:
+            types.append(pa.field(column, pa.float64()))
+    return pa.schema(types)
+
+def write_parquet(chunks: Iterable[List[DailyRecord]], out: Union[str, IO[bytes]]) -> int:
+    """Escribe cada bloque como un row group de Parquet; devuelve el número de registros"""
+    # pyarrow llega como dependencia de streamlit; se importa solo al exportar
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _parquet_schema()
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            columns = list(zip(*(flatten_record(r) for r in chunk)))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=f.type) for col, f in zip(columns, schema)], schema=schema
+            ))
+            count += len(chunk)
+    return count
+
+def export_records(chunks: Iterable[List[DailyRecord]], out, fmt: str) -> int:
+    """Escribe los registros en `out` (ruta o archivo abierto) en el formato indicado"""
+    if fmt == 'parquet':
+        return write_parquet(chunks, out)
+    if fmt == 'csv':
+        if isinstance(out, str):
+            with open(out, 'w', encoding='utf-8', newline='') as f:
+                return write_csv(chunks, f)
+        return write_csv(chunks, out)
+    raise ValueError(f"Formato de exportación no soportado: {fmt}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exporta el historial de registros a CSV o Parquet")
+    parser.add_argument('output', help="Archivo de salida (.csv o .parquet), o '-' para CSV por la salida estándar")
+    parser.add_argument('--driver', default=None, help="Id del conductor (sección [drivers] de los secrets)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Filas leídas por bloque")
+    args = parser.parse_args(argv)
+
+    # database lee la configuración de .streamlit/secrets.toml (o variables de entorno)
+    import database as db
+    driver_id = args.driver or db.list_drivers()[0]
+    chunks = db.get_driver_backend(driver_id).iter_records(args.chunk_size)
+    if args.output == '-':
+        count = write_csv(chunks, sys.stdout)
+    else:
+        count = export_records(chunks, args.output, format_for(args.output))
+    print(f"{count} registros exportados", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import csv
+import re
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from storage import DailyRecord, FIELDS, record_to_row
+
+PLATFORMS = ('uber', 'lyft')
+EARNINGS_FIELD = {'uber': 'uber_earnings', 'lyft': 'lyft_earnings'}
+
+# Encabezados (en minúsculas) que se buscan en orden, para la fecha y para el monto del viaje
+DATE_COLUMNS = (
+    'date', 'fecha', 'trip date', 'ride date', 'date/time', 'request time', 'trip request time',
+    'begin trip time', 'requested at', 'timestamp', 'time',
+)
+AMOUNT_COLUMNS = (
+    'total earnings', 'your earnings', 'earnings', 'driver earnings', 'total', 'net earnings',
+    'amount', 'ganancias', 'total pagado',
+)
+# Columnas que solo aparecen en un export de cada plataforma (para detectarla sola)
+PLATFORM_HINTS = {
+    'uber': ('trip uuid', 'uber'),
+    'lyft': ('ride id', 'lyft'),
+}
+
+DATE_FORMATS = (
+    '%Y-%m-%d', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%b %d, %Y', '%B %d, %Y', '%d %b %Y',
+)
+_TIME_SPLIT = re.compile(r'[T\s]')
+
+
+class ImportFormatError(ValueError):
+    """El CSV no tiene las columnas de fecha y monto esperadas"""
+
+
+def parse_date(value: str) -> Optional[str]:
+    """Fecha de un export ('2025-01-05 08:30:00 -0500', '01/05/2025 8:30 AM', 'Jan 5, 2025') a ISO"""
+    value = value.strip()
+    if not value:
+        return None
+    candidates = (value, _TIME_SPLIT.split(value, 1)[0], value.split(' at ')[0])
+    for candidate in candidates:
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(candidate, fmt).date().isoformat()
+            except ValueError:
+                continue
+    return None
+
+def parse_amount(value: str) -> Optional[float]:
+    """Monto de un export ('$1,234.50', '(12.00)', '-3.5') a float (None si no es un número)"""
+    text = value.strip().replace('$', '').replace(',', '').replace(' ', '')
+    negative = text.startswith('(') and text.endswith(')')
+    if negative:
+        text = text[1:-1]
+    try:
+        amount = float(text)
+    except ValueError:
+        return None
+    return -amount if negative else amount
+
+def _find_column(headers: List[str], names: Iterable[str]) -> Optional[int]:
+    for name in names:
+        if name in headers:
+            return headers.index(name)
+    return None
+
+def detect_platform(headers: List[str], filename: str = '') -> Optional[str]:
+    """Plataforma según el nombre del archivo o las columnas propias de cada export"""
+    name = filename.lower()
+    for platform in PLATFORMS:
+        if platform in name:
+            return platform
+    for platform, hints in PLATFORM_HINTS.items():
+        if any(hint in header for header in headers for hint in hints):
+            return platform
+    return None
+
+def aggregate_earnings(lines: Iterable[str], platform: Optional[str] = None, filename: str = '') -> Dict:
+    """Suma por día las ganancias de un CSV en una pasada, sin cargar el archivo en memoria
+
+    Args:
+        lines: Líneas del CSV (un archivo abierto en modo texto sirve)
+        platform: 'uber' o 'lyft' (None = detectar por nombre de archivo o columnas)
+        filename: Nombre del archivo, solo para detectar la plataforma
+
+    Returns:
+        {'platform', 'days': {fecha ISO: monto}, 'trips', 'skipped'}
+    """
+    reader = csv.reader(lines)
+    headers = []
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            headers = [cell.strip().lower().lstrip('\ufeff') for cell in row]
+            break
+    date_col = _find_column(headers, DATE_COLUMNS)
+    amount_col = _find_column(headers, AMOUNT_COLUMNS)
+    if date_col is None or amount_col is None:
+        raise ImportFormatError(
+            "No se encontraron las columnas de fecha y ganancias en el CSV "
+            f"(columnas: {', '.join(headers) or 'ninguna'})"
+        )
+    platform = platform or detect_platform(headers, filename)
+    if platform not in PLATFORMS:
+        raise ImportFormatError("No se pudo detectar si el CSV es de Uber o de Lyft")
+
+    days: Dict[str, float] = {}
+    trips = skipped = 0
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        day = parse_date(row[date_col]) if len(row) > date_col else None
+        amount = parse_amount(row[amount_col]) if len(row) > amount_col else None
+        if day is None or amount is None:
+            skipped += 1  # Filas de totales, subtítulos o incompletas
+            continue
+        days[day] = days.get(day, 0.0) + amount
+        trips += 1
+    return {'platform': platform, 'days': days, 'trips': trips, 'skipped': skipped}
+
+def _total(items: List) -> float:
+    return sum(float(item.get('amount', 0)) for item in items if isinstance(item, dict))
+
+def build_rows(days: Dict[str, float], platform: str, existing: Dict[str, DailyRecord],
+               meta_by_day: Dict[str, float]) -> List[List]:
+    """Filas A:S con las ganancias importadas; los días existentes conservan el resto de sus datos
+
+    Solo se reemplaza la columna de la plataforma (y los totales que dependen de
+    ella), así que importar dos veces el mismo archivo no duplica montos. Los días
+    nuevos toman la meta vigente en su fecha (`meta_by_day`).
+    """
+    field = EARNINGS_FIELD[platform]
+    rows = []
+    for day in sorted(days):
+        record = existing.get(day)
+        data = record.to_dict() if record is not None else {f: 0 for f in FIELDS[1:]}
+        if record is None:
+            data.update(additional_income=[], additional_expenses=[], meta_neta_objetivo=meta_by_day[day])
+        data[field] = round(days[day], 2)
+        # Mismos cálculos que el formulario diario
+        data['total_gross'] = (data['uber_earnings'] + data['lyft_earnings'] + data['cash_tips']
+                               + _total(data['additional_income']))
+        data['total_expenses'] = (data['fuel_cost'] + data['food_cost'] + data['misc_cost']
+                                  + _total(data['additional_expenses']))
+        data['net_profit'] = data['total_gross'] - data['total_expenses']
+        data['expense_ratio'] = (data['total_expenses'] / data['total_gross'] * 100) if data['total_gross'] > 0 else 0.0
+        rows.append(record_to_row(data, day))
+    return rows
@@ -0,0 +1,143 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CallStats:
+    """Conteo y tiempo acumulado de llamadas remotas por método"""
+
+    def __init__(self):
+        self.methods: Dict[str, Dict] = {}
+
+    def add(self, method: str, elapsed: float, attempts: int = 1, error: bool = False):
+        stats = self.methods.setdefault(method, {'calls': 0, 'seconds': 0.0, 'retries': 0, 'errors': 0, 'max': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += elapsed
+        stats['retries'] += max(attempts - 1, 0)
+        stats['errors'] += 1 if error else 0
+        stats['max'] = max(stats['max'], elapsed)
+
+    @property
+    def calls(self) -> int:
+        return sum(s['calls'] for s in self.methods.values())
+
+    @property
+    def seconds(self) -> float:
+        return sum(s['seconds'] for s in self.methods.values())
+
+    def snapshot(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'seconds': round(self.seconds, 4),
+            'methods': {name: dict(s, seconds=round(s['seconds'], 4), max=round(s['max'], 4))
+                        for name, s in sorted(self.methods.items())},
+        }
+
+
+class SessionCalls:
+    """Llamadas de una sesión de Streamlit: la ejecución (rerun) en curso y el total de la sesión"""
+
+    def __init__(self, history_size: int = 20):
+        self.session_id = uuid.uuid4().hex[:8]
+        self.rerun = 0
+        self.current = CallStats()
+        self.total = CallStats()
+        self.history: List[Dict] = []  # Resumen de las últimas ejecuciones terminadas
+        self.history_size = history_size
+        self.started = time.monotonic()
+        self.open = False
+        # Hitos de la ejecución en curso (segundos desde begin_rerun), p. ej. primer pintado
+        self.marks: Dict[str, float] = {}
+
+
+class CallRecorder:
+    """Registra cada llamada remota a Google Sheets por ejecución, por sesión y por proceso
+
+    La sesión activa se asocia al hilo que ejecuta el script (begin_rerun); las
+    llamadas hechas desde otros hilos (p. ej. escrituras diferidas) solo cuentan
+    en el total del proceso. Si hay `log_path`, cada llamada y cada ejecución
+    terminada se agregan como una línea JSON.
+    """
+
+    def __init__(self, log_path: Optional[str] = None):
+        self.log_path = log_path
+        self.process = CallStats()
+        # Importaciones costosas del proceso (segundos), medidas una sola vez
+        self.imports: Dict[str, float] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _write_log(self, entry: Dict):
+        if not self.log_path:
+            return
+        try:
+            line = json.dumps(entry, ensure_ascii=False)
+            with self._lock:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+        except Exception as e:
+            logger.warning("No se pudo escribir el log de llamadas: %s", e)
+
+    def active_session(self) -> Optional[SessionCalls]:
+        return getattr(self._local, 'session', None)
+
+    def observe(self, method: str, kind: str, elapsed: float, attempts: int = 1,
+                error: Optional[BaseException] = None):
+        """Punto de enganche para QuotaAwareClient: se llama al terminar cada llamada"""
+        session = self.active_session()
+        with self._lock:
+            self.process.add(method, elapsed, attempts, error is not None)
+            if session is not None:
+                session.current.add(method, elapsed, attempts, error is not None)
+                session.total.add(method, elapsed, attempts, error is not None)
+        entry = {'ts': round(time.time(), 3), 'event': 'call', 'method': method, 'kind': kind,
+                 'ms': round(elapsed * 1000, 2), 'attempts': attempts}
+        if error is not None:
+            entry['error'] = type(error).__name__
+        if session is not None:
+            entry['session'] = session.session_id
+            entry['rerun'] = session.rerun
+        self._write_log(entry)
+
+    def record_import(self, name: str, seconds: float):
+        """Tiempo de importación de un módulo (database, cliente de Google...); solo la primera vez"""
+        with self._lock:
+            if name in self.imports:
+                return
+            self.imports[name] = seconds
+        self._write_log({'ts': round(time.time(), 3), 'event': 'import', 'module': name,
+                         'ms': round(seconds * 1000, 2)})
+
+    def mark(self, session: SessionCalls, name: str):
+        """Registra un hito de la ejecución (la primera vez que se alcanza en ella)"""
+        session.marks.setdefault(name, round(time.monotonic() - session.started, 4))
+
+    def begin_rerun(self, session: SessionCalls):
+        """Empieza una ejecución del script; cierra la anterior si quedó abierta (st.rerun/st.stop)"""
+        if session.open:
+            self.end_rerun(session)
+        session.rerun += 1
+        session.current = CallStats()
+        session.marks = {}
+        session.started = time.monotonic()
+        session.open = True
+        self._local.session = session
+
+    def end_rerun(self, session: SessionCalls) -> Dict:
+        """Termina la ejecución en curso, la guarda en el historial y la escribe en el log"""
+        summary = session.current.snapshot()
+        summary.update({'rerun': session.rerun, 'render_seconds': round(time.monotonic() - session.started, 4),
+                        'marks': dict(session.marks)})
+        if session.open:
+            session.open = False
+            session.history.append(summary)
+            del session.history[:-session.history_size]
+            self._write_log(dict(summary, ts=round(time.time(), 3), event='rerun', session=session.session_id))
+        if self.active_session() is session:
+            self._local.session = None
+        return summary
@@ -0,0 +1,429 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sheets_client import is_transient_error
+from storage import DailyRecord, StorageBackend, row_to_record
+
+logger = logging.getLogger(__name__)
+
+UPSERT = "upsert"
+UPSERT_MANY = "upsert_many"
+DELETE = "delete"
+
+
+class WriteJournal:
+    """Diario local de escrituras, solo de agregado, con una línea JSON por operación
+
+    Cada operación (upsert o delete de un día, o upsert de varios) se escribe y se sincroniza a disco
+    (fsync) antes de confirmarse, así sobrevive a un reinicio del proceso. Cuando
+    una operación ya se aplicó en el backend remoto se agrega una línea {'ack': seq};
+    al quedar todo confirmado el archivo se vacía. Las operaciones que el remoto
+    rechaza de forma permanente pasan a `<path>.failed` (una línea JSON con el
+    error) para que no bloqueen las siguientes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.failed_path = f"{path}.failed"
+        self._lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self._seq = 0
+        self._load()
+        self.failed_count = self._count_failed()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        acked = set()
+        entries = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Última línea cortada por un cierre abrupto: nunca se confirmó al usuario
+                    logger.warning("Línea inválida en el diario %s, se ignora", self.path)
+                    continue
+                if 'ack' in entry:
+                    acked.add(entry['ack'])
+                else:
+                    entries.append(entry)
+                self._seq = max(self._seq, entry.get('seq', entry.get('ack', 0)))
+        self._pending = [e for e in entries if e['seq'] not in acked]
+
+    def _write(self, entry: Dict, sync: bool):
+        # Se abre en cada escritura: con cientos de conductores no quedan archivos abiertos
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+    def append(self, op: str, **fields) -> Dict:
+        """Agrega una operación (date/row, date o rows) y la sincroniza a disco antes de devolverla"""
+        with self._lock:
+            self._seq += 1
+            entry = {'seq': self._seq, 'op': op, 'ts': round(time.time(), 3), **fields}
+            self._write(entry, sync=True)
+            self._pending.append(entry)
+            return entry
+
+    def ack(self, seq: int):
+        """Marca la operación como aplicada en el remoto (sin fsync: repetirla es inofensivo)"""
+        with self._lock:
+            self._pending = [e for e in self._pending if e['seq'] != seq]
+            if self._pending:
+                self._write({'ack': seq}, sync=False)
+            else:
+                # Todo aplicado: vaciar el archivo para que no crezca sin límite
+                open(self.path, 'w').close()
+
+    def _count_failed(self) -> int:
+        if not os.path.exists(self.failed_path):
+            return 0
+        with open(self.failed_path, encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def fail(self, entry: Dict, error: str):
+        """Mueve la operación al archivo de fallidas (sincronizado a disco) y la quita de las pendientes"""
+        with self._lock:
+            with open(self.failed_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(dict(entry, error=error, failed_ts=round(time.time(), 3)), ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self.failed_count += 1
+        self.ack(entry['seq'])
+
+    def pending(self) -> List[Dict]:
+        with self._lock:
+            return list(self._pending)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+class ReplayWorker:
+    """Un solo hilo que replica los diarios de todos los conductores
+
+    Cada JournaledBackend se agenda con schedule(); el hilo atiende al que le
+    toca antes, de uno en uno. Un backend en espera de reintento (backoff) no se
+    adelanta aunque lleguen guardados nuevos. El hilo se crea con el primer
+    agendado, así un proceso con cientos de conductores tiene uno solo.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._due: Dict["JournaledBackend", float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, backend: "JournaledBackend", delay: float = 0.0):
+        with self._cond:
+            when = time.monotonic() + delay
+            # Si ya estaba agendado se respeta la hora más tardía (backoff pendiente)
+            self._due[backend] = max(when, self._due.get(backend, when))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="journal-replay", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _next(self) -> "JournaledBackend":
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._due:
+                    backend, when = min(self._due.items(), key=lambda item: item[1])
+                    if when <= now:
+                        del self._due[backend]
+                        return backend
+                    self._cond.wait(when - now)
+                else:
+                    self._cond.wait()
+
+    def _run(self):
+        while True:
+            backend = self._next()
+            delay = backend.replay_once()
+            if delay is not None:
+                self.schedule(backend, delay)
+
+
+# Réplica compartida por todos los diarios del proceso
+REPLAY_WORKER = ReplayWorker()
+
+
+class JournaledBackend(StorageBackend):
+    """Backend que confirma las escrituras en un diario local y las replica en segundo plano
+
+    save/delete solo escriben en el diario (rápido y durable); el hilo de
+    ReplayWorker (uno por proceso, para todos los conductores) aplica las
+    operaciones pendientes en orden sobre el backend remoto, reintentando con
+    backoff los errores transitorios (cuota, 5xx, red). Una operación que el
+    remoto rechaza de forma permanente pasa al archivo de fallidas del diario
+    (error en `last_failure`) y la réplica sigue con las demás. Las lecturas
+    combinan los datos del remoto con las operaciones aún pendientes. Las escrituras remotas son por fecha (upsert o
+    delete de ese día), así que repetir una operación no duplica filas.
+    """
+
+    def __init__(self, inner: StorageBackend, journal: WriteJournal,
+                 retry_delay: float = 1.0, max_retry_delay: float = 60.0,
+                 worker: Optional[ReplayWorker] = None):
+        self.inner = inner
+        self.journal = journal
+        self.name = inner.name
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        # Último error de la réplica (transitorio, se reintenta) y de la última operación descartada
+        self.last_error: Optional[str] = None
+        self.last_failure: Optional[str] = None
+        # Cambios locales (diario) y cambios remotos que solo reflejan una operación ya contada
+        self._local_changes = 0
+        self._replayed_changes = 0
+        self._lock = threading.Lock()
+        self._records: Dict[int, List[Tuple[str, Optional[DailyRecord]]]] = {}
+        self._retry_in = retry_delay
+        self.worker = worker or REPLAY_WORKER
+        if len(journal):
+            self._wake()
+
+    def __getattr__(self, name: str):
+        # client, etc. del backend remoto
+        return getattr(self.inner, name)
+
+    def _wake(self):
+        self.worker.schedule(self)
+
+    # --- Versión de los datos ---
+    @property
+    def data_version(self) -> int:
+        return self.inner.data_version - self._replayed_changes + self._local_changes
+
+    def current_version(self) -> int:
+        try:
+            self.inner.current_version()
+        except Exception as e:
+            logger.info("Sin acceso al remoto, se usa la copia local: %s", e)
+        return self.data_version
+
+    # --- Delegación ---
+    def init_schema(self):
+        self.inner.init_schema()
+
+    def ensure_schema(self):
+        self.inner.ensure_schema()
+
+    def reverify_schema(self):
+        self.inner.reverify_schema()
+
+    def invalidate(self):
+        self.inner.invalidate()
+
+    def request_sync(self):
+        self.inner.request_sync()
+
+    def preload(self):
+        self.inner.preload()
+
+    def get_config(self) -> Dict:
+        return self.inner.get_config()
+
+    def cached_config(self) -> Optional[Dict]:
+        return self.inner.cached_config()
+
+    def get_config_history(self) -> List[Dict]:
+        return self.inner.get_config_history()
+
+    def get_config_for_date(self, date: str) -> Dict:
+        return self.inner.get_config_for_date(date)
+
+    def update_config(self, mpg: float, gas_price: float, meta_neta_objetivo: float,
+                      effective_from: Optional[str] = None):
+        self.inner.update_config(mpg, gas_price, meta_neta_objetivo, effective_from)
+
+    # --- Escrituras: al diario ---
+    def upsert_record(self, record_date: str, row: List):
+        with self._lock:
+            self.journal.append(UPSERT, date=record_date, row=list(row))
+            self._local_changes += 1
+        self._wake()
+
+    def upsert_records(self, rows: List[List]):
+        """Una sola operación en el diario; al replicarse usa la carga masiva del remoto"""
+        if not rows:
+            return
+        with self._lock:
+            self.journal.append(UPSERT_MANY, rows=[list(row) for row in rows])
+            self._local_changes += 1
+        self._wake()
+
+    def delete_record(self, date: str) -> bool:
+        if self.get_record(date) is None:
+            return False
+        with self._lock:
+            self.journal.append(DELETE, date=date)
+            self._local_changes += 1
+        self._wake()
+        return True
+
+    def pending_count(self) -> int:
+        return len(self.journal)
+
+    def failed_count(self) -> int:
+        """Operaciones que el remoto rechazó y se movieron al archivo de fallidas"""
+        return self.journal.failed_count
+
+    # --- Lecturas: remoto + operaciones pendientes ---
+    def _entry_changes(self, entry: Dict) -> List[Tuple[str, Optional[DailyRecord]]]:
+        """(fecha, registro) de cada día que toca la operación (registro None = borrado)"""
+        seq = entry['seq']
+        if seq not in self._records:
+            if entry['op'] == DELETE:
+                changes = [(entry['date'], None)]
+            else:
+                rows = entry['rows'] if entry['op'] == UPSERT_MANY else [entry['row']]
+                changes = [(str(row[0]), row_to_record(row)) for row in rows]
+            self._records[seq] = changes
+        return self._records[seq]
+
+    def _changes(self) -> Dict[str, Optional[DailyRecord]]:
+        """Fecha -> registro pendiente (None = borrado pendiente); gana la última operación"""
+        changes = {}
+        for entry in self.journal.pending():
+            changes.update(self._entry_changes(entry))
+        return changes
+
+    def get_record(self, date: str) -> Optional[DailyRecord]:
+        changes = self._changes()
+        if date in changes:
+            record = changes[date]
+            return record.copy() if record else None
+        return self.inner.get_record(date)
+
+    def get_all_records(self) -> List[DailyRecord]:
+        return self.get_records_between(None, None)
+
+    def _changes_between(self, start: Optional[str], end: Optional[str]) -> Dict[str, Optional[DailyRecord]]:
+        return {d: r for d, r in self._changes().items()
+                if (start is None or start <= d) and (end is None or d <= end)}
+
+    def get_records_between(self, start: Optional[str], end: Optional[str],
+                            limit: Optional[int] = None) -> List[DailyRecord]:
+        if not self._changes_between(start, end):
+            return self.inner.get_records_between(start, end, limit)
+        # Con cambios pendientes en el rango se combina sin copiar y solo se copia lo que se devuelve
+        return [r.copy() for r in self.scan_records(start, end)[:limit]]
+
+    def scan_records(self, start: Optional[str] = None, end: Optional[str] = None) -> List[DailyRecord]:
+        changes = self._changes_between(start, end)
+        records = self.inner.scan_records(start, end)
+        if not changes:
+            return records
+        by_date = {r.date: r for r in records}
+        for date, record in changes.items():
+            if record is None:
+                by_date.pop(date, None)
+            else:
+                by_date[date] = record
+        return [by_date[d] for d in sorted(by_date, reverse=True)]
+
+    def iter_records(self, chunk_size: int = 500) -> Iterator[List[DailyRecord]]:
+        """Bloques del remoto con las operaciones pendientes aplicadas; los días nuevos al final"""
+        changes = self._changes()
+        seen = set()
+        for chunk in self.inner.iter_records(chunk_size):
+            merged = []
+            for record in chunk:
+                seen.add(record.date)
+                if record.date not in changes:
+                    merged.append(record)
+                elif changes[record.date] is not None:
+                    merged.append(changes[record.date].copy())
+            if merged:
+                yield merged
+        new = [r.copy() for d, r in sorted(changes.items()) if r is not None and d not in seen]
+        for start in range(0, len(new), chunk_size):
+            yield new[start:start + chunk_size]
+
+    def get_last_record(self, before: Optional[str] = None) -> Optional[Dict]:
+        changes = self._changes()
+        last = self.inner.get_last_record(before)
+        if not changes:
+            return last
+        # Si el día remoto tiene un cambio pendiente, seguir con el anterior (cada consulta es un bisect)
+        while last is not None and last['date'] in changes:
+            last = self.inner.get_last_record(last['date'])
+        pending = max((d for d, r in changes.items()
+                       if r is not None and r.odo_end > 0 and (before is None or d < before)), default=None)
+        if pending is not None and (last is None or pending > last['date']):
+            return {'odo_end': changes[pending].odo_end, 'date': pending}
+        return last
+
+    # --- Réplica en segundo plano ---
+    def _apply(self, entry: Dict, dates: Set[str]):
+        """Aplica en el remoto la parte de la operación que sigue vigente (días en `dates`)"""
+        self.inner.ensure_schema()
+        before = self.inner.data_version
+        if entry['op'] == UPSERT:
+            self.inner.upsert_record(entry['date'], entry['row'])
+        elif entry['op'] == UPSERT_MANY:
+            self.inner.upsert_records([row for row in entry['rows'] if str(row[0]) in dates])
+        else:
+            self.inner.delete_record(entry['date'])
+        if self.inner.data_version == before + 1:
+            # El remoto solo cambió por esta operación, que ya estaba contada como cambio local
+            with self._lock:
+                self._replayed_changes += 1
+
+    def replay_pending(self) -> int:
+        """Aplica en orden las operaciones pendientes; devuelve cuántas se aplicaron
+
+        Los días que tienen una operación posterior en el diario se saltan (la
+        última gana). Un error transitorio detiene la réplica y se lanza (se
+        reintentará en orden); uno permanente mueve la operación a las fallidas.
+        """
+        pending = self.journal.pending()
+        last_seq = {}
+        for entry in pending:
+            for date, _ in self._entry_changes(entry):
+                last_seq[date] = entry['seq']
+        for entry in pending:
+            dates = {date for date, _ in self._entry_changes(entry) if last_seq[date] == entry['seq']}
+            try:
+                if dates:
+                    self._apply(entry, dates)
+            except Exception as e:
+                if is_transient_error(e):
+                    raise
+                logger.error("El remoto rechazó la operación %s del diario, se mueve a %s: %s",
+                             entry['seq'], self.journal.failed_path, e)
+                self.last_failure = f"{entry.get('date') or entry['op']}: {e}"
+                with self._lock:
+                    self.journal.fail(entry, str(e))
+                    # Las lecturas dejan de mostrar el cambio descartado: es un cambio de datos
+                    self._local_changes += 1
+                self.inner.request_sync()
+            else:
+                self.journal.ack(entry['seq'])
+            self._records.pop(entry['seq'], None)
+        return len(pending)
+
+    def replay_once(self) -> Optional[float]:
+        """Una pasada de réplica (la llama ReplayWorker); devuelve en cuántos segundos reintentar o None"""
+        try:
+            self.replay_pending()
+        except Exception as e:
+            delay = self._retry_in
+            self.last_error = str(e)
+            logger.warning("No se pudo replicar el diario (%d pendientes), reintento en %.0fs: %s",
+                           len(self.journal), delay, e)
+            # Una escritura que falló pudo haberse aplicado: sincronizar (filas nuevas) antes de reintentar
+            self.inner.request_sync()
+            self._retry_in = min(delay * 2, self.max_retry_delay)
+            return delay
+        self.last_error = None
+        self._retry_in = self.retry_delay
+        return None
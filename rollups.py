@@ -0,0 +1,130 @@
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from storage import DailyRecord
+
+# Campos del registro que se acumulan y nombre del total en los resúmenes
+ROLLUP_FIELDS = (
+    ('total_gross', 'total_income'),
+    ('total_expenses', 'total_expenses'),
+    ('net_profit', 'total_profit'),
+    ('miles_driven', 'total_miles'),
+)
+
+
+def empty_totals() -> Dict:
+    totals = {'days': 0}
+    for _, name in ROLLUP_FIELDS:
+        totals[name] = 0.0
+    return totals
+
+
+class RollupIndex:
+    """Acumulados por día, semana ISO (lunes a domingo) y mes
+
+    Se construye una vez por versión de datos y se actualiza de forma incremental
+    con set_day()/remove_day(); cada resumen semanal o mensual es una consulta O(1).
+    Los acumulados de una semana o mes se recalculan a partir de sus días (como
+    máximo 31) en cada cambio, así no se arrastran errores de redondeo.
+    """
+
+    def __init__(self, records: Iterable[DailyRecord] = (), version: int = 0):
+        self._lock = threading.Lock()
+        self._days: Dict[str, Tuple[float, ...]] = {}
+        self._weeks: Dict[Tuple[int, int], Dict] = {}
+        self._months: Dict[Tuple[int, int], Dict] = {}
+        self._week_days: Dict[Tuple[int, int], Set[str]] = {}
+        self._month_days: Dict[Tuple[int, int], Set[str]] = {}
+        self.version = version
+        for record in records:
+            self._set_day(record, refresh=False)
+        for key in self._week_days:
+            self._refresh(self._weeks, self._week_days, key)
+        for key in self._month_days:
+            self._refresh(self._months, self._month_days, key)
+
+    @staticmethod
+    def _parse_date(value: str) -> Optional[date]:
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except (ValueError, TypeError):
+            return None
+
+    def _refresh(self, buckets: Dict, members: Dict, key: Tuple[int, int]):
+        days = members.get(key)
+        if not days:
+            buckets.pop(key, None)
+            members.pop(key, None)
+            return
+        totals = empty_totals()
+        totals['days'] = len(days)
+        for day in days:
+            for (_, name), value in zip(ROLLUP_FIELDS, self._days[day]):
+                totals[name] += value
+        buckets[key] = totals
+
+    def _remove_day(self, day: str, refresh: bool = True):
+        if self._days.pop(day, None) is None:
+            return
+        d = self._parse_date(day)
+        week_key, month_key = tuple(d.isocalendar())[:2], (d.year, d.month)
+        self._week_days[week_key].discard(day)
+        self._month_days[month_key].discard(day)
+        if refresh:
+            self._refresh(self._weeks, self._week_days, week_key)
+            self._refresh(self._months, self._month_days, month_key)
+
+    def _set_day(self, record: DailyRecord, refresh: bool = True):
+        day = record.date
+        d = self._parse_date(day)
+        if d is None:
+            return
+        self._remove_day(day, refresh=False)
+        self._days[day] = tuple(getattr(record, field) for field, _ in ROLLUP_FIELDS)
+        week_key, month_key = tuple(d.isocalendar())[:2], (d.year, d.month)
+        self._week_days.setdefault(week_key, set()).add(day)
+        self._month_days.setdefault(month_key, set()).add(day)
+        if refresh:
+            self._refresh(self._weeks, self._week_days, week_key)
+            self._refresh(self._months, self._month_days, month_key)
+
+    def _advance(self, from_version: int, to_version: int) -> bool:
+        # Solo se aplica el cambio si es exactamente el siguiente sobre la versión construida;
+        # si hubo otros cambios entre medio el índice queda obsoleto y se reconstruye
+        if self.version != from_version or to_version != from_version + 1:
+            self.version = -1
+            return False
+        self.version = to_version
+        return True
+
+    def set_day(self, record: DailyRecord, from_version: int, to_version: int):
+        """Agrega o reemplaza los valores de un día (cambio from_version -> to_version)"""
+        with self._lock:
+            if self._advance(from_version, to_version):
+                self._set_day(record)
+
+    def remove_day(self, day: str, from_version: int, to_version: int):
+        """Quita un día de los acumulados (cambio from_version -> to_version)"""
+        with self._lock:
+            if self._advance(from_version, to_version):
+                self._remove_day(day)
+
+    def day(self, day: str) -> Dict:
+        with self._lock:
+            values = self._days.get(day)
+        totals = empty_totals()
+        if values is not None:
+            totals['days'] = 1
+            for (_, name), value in zip(ROLLUP_FIELDS, values):
+                totals[name] = value
+        return totals
+
+    def week(self, week_start: date) -> Dict:
+        """Acumulados de la semana ISO que contiene la fecha dada"""
+        with self._lock:
+            return dict(self._weeks.get(tuple(week_start.isocalendar())[:2]) or empty_totals())
+
+    def month(self, year: int, month: int) -> Dict:
+        with self._lock:
+            return dict(self._months.get((year, month)) or empty_totals())
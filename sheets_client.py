@@ -0,0 +1,246 @@
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Cuotas de Google Sheets API por usuario y por minuto (lecturas y escrituras se cuentan aparte)
+READ_REQUESTS_PER_MINUTE = 60
+WRITE_REQUESTS_PER_MINUTE = 60
+
+READ = "read"
+WRITE = "write"
+
+
+class QuotaExceededError(Exception):
+    """Se agotaron los reintentos y Google Sheets sigue respondiendo 429 (cuota excedida)"""
+
+
+def api_error_type() -> type:
+    """gspread.exceptions.APIError; gspread (y google-auth) se importan al primer uso, no al arrancar"""
+    from gspread.exceptions import APIError
+    return APIError
+
+def error_status(error: Exception) -> Optional[int]:
+    """Código HTTP de un error de gspread (None si no es un error de la API)"""
+    if not isinstance(error, api_error_type()):
+        return None
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and code > 0:
+        return code
+    response = getattr(error, 'response', None)
+    return getattr(response, 'status_code', None)
+
+def is_quota_error(error: Exception) -> bool:
+    """True si el error es por cuota excedida (429), venga de gspread o ya envuelto"""
+    if isinstance(error, QuotaExceededError):
+        return True
+    return error_status(error) == 429 or "Quota exceeded" in str(error)
+
+def is_transient_error(error: Exception) -> bool:
+    """True si reintentar más tarde puede funcionar: cuota (429), error del servidor (5xx) o de red
+
+    Los demás (400 por una fila rechazada o fuera de la cuadrícula, 403, datos
+    inválidos...) fallarán igual en cada reintento.
+    """
+    if is_quota_error(error):
+        return True
+    status = error_status(error)
+    if status is not None:
+        return status >= 500
+    # ConnectionError/TimeoutError y las excepciones de requests derivan de OSError
+    return isinstance(error, OSError)
+
+
+class TokenBucket:
+    """Cubeta de tokens: `rate_per_minute` tokens por minuto con ráfagas de hasta `capacity`"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now: float) -> float:
+        """Toma un token y devuelve 0, o devuelve los segundos que faltan para que haya uno"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class QuotaLimiter:
+    """Limitador local con una cubeta para lecturas y otra para escrituras
+
+    Las escrituras tienen su propia cuota y además tienen prioridad: mientras
+    haya una escritura esperando, las lecturas (p. ej. las sincronizaciones en
+    segundo plano) esperan su turno. Tras un 429 todas las llamadas respetan la
+    pausa de backoff indicada con pause().
+    """
+
+    def __init__(self, read_per_minute: float = READ_REQUESTS_PER_MINUTE,
+                 write_per_minute: float = WRITE_REQUESTS_PER_MINUTE):
+        self._buckets = {READ: TokenBucket(read_per_minute), WRITE: TokenBucket(write_per_minute)}
+        self._cond = threading.Condition()
+        self._writes_waiting = 0
+        self._paused_until = 0.0
+
+    def acquire(self, kind: str):
+        with self._cond:
+            if kind == WRITE:
+                self._writes_waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if now < self._paused_until:
+                        self._cond.wait(self._paused_until - now)
+                        continue
+                    if kind == READ and self._writes_waiting:
+                        self._cond.wait(0.05)
+                        continue
+                    wait = self._buckets[kind].try_acquire(now)
+                    if wait <= 0:
+                        return
+                    self._cond.wait(wait)
+            finally:
+                if kind == WRITE:
+                    self._writes_waiting -= 1
+                    self._cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Detiene todas las llamadas durante `seconds` (después de un 429)"""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+
+class RetryPolicy:
+    """Reintentos con backoff exponencial y jitter completo ante 429 y errores 5xx"""
+
+    def __init__(self, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 32.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class QuotaAwareClient:
+    """Ejecuta las llamadas a gspread pasando por el limitador y la política de reintentos"""
+
+    def __init__(self, limiter: Optional[QuotaLimiter] = None, retry: Optional[RetryPolicy] = None):
+        self.limiter = limiter or QuotaLimiter()
+        self.retry = retry or RetryPolicy()
+        # Observadores observer(method, kind, elapsed, attempts, error) llamados al terminar cada llamada
+        self.observers: List[Callable] = []
+
+    def add_observer(self, observer: Callable):
+        if observer not in self.observers:
+            self.observers.append(observer)
+
+    def _notify(self, fn: Callable, kind: str, elapsed: float, attempts: int, error: Optional[BaseException]):
+        name = getattr(fn, '__name__', str(fn))
+        for observer in self.observers:
+            try:
+                observer(name, kind, elapsed, attempts, error)
+            except Exception as e:
+                logger.warning("Error en observador de llamadas: %s", e)
+
+    def call(self, kind: str, fn: Callable, *args, idempotent: bool = True, **kwargs) -> Any:
+        """Ejecuta fn respetando la cuota; el tiempo reportado incluye esperas y reintentos"""
+        start = time.perf_counter()
+        attempt = 0
+        error: Optional[BaseException] = None
+        try:
+            while True:
+                self.limiter.acquire(kind)
+                try:
+                    return fn(*args, **kwargs)
+                except api_error_type() as e:
+                    status = error_status(e)
+                    quota = is_quota_error(e)
+                    # Un 5xx en una escritura no idempotente (append) pudo haberse aplicado: no repetir
+                    retryable = quota or (status is not None and status >= 500 and idempotent)
+                    if not retryable or attempt >= self.retry.max_retries:
+                        if quota:
+                            raise QuotaExceededError(str(e)) from e
+                        raise
+                    delay = self.retry.delay(attempt)
+                    logger.info("Sheets %s (%s), reintento %d en %.1fs", getattr(fn, '__name__', fn), status, attempt + 1, delay)
+                    if quota:
+                        self.limiter.pause(delay)
+                    else:
+                        time.sleep(delay)
+                    attempt += 1
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.observers:
+                self._notify(fn, kind, time.perf_counter() - start, attempt + 1, error)
+
+    def wrap_spreadsheet(self, sheet) -> "QuotaAwareSpreadsheet":
+        return QuotaAwareSpreadsheet(sheet, self)
+
+
+# Métodos de gspread usados por la app, clasificados por cuota
+_WORKSHEET_READS = {'get_all_values', 'get', 'batch_get', 'col_values', 'row_values', 'find'}
+_WORKSHEET_WRITES = {'update', 'batch_update', 'delete_rows', 'append_rows', 'append_row', 'add_rows', 'resize'}
+_NON_IDEMPOTENT = {'append_row', 'append_rows'}
+
+
+class QuotaAwareWorksheet:
+    """Envoltorio de gspread.Worksheet: las llamadas remotas pasan por QuotaAwareClient"""
+
+    def __init__(self, worksheet, client: QuotaAwareClient):
+        self._worksheet = worksheet
+        self._client = client
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._worksheet, name)
+        if name in _WORKSHEET_READS or name in _WORKSHEET_WRITES:
+            kind = READ if name in _WORKSHEET_READS else WRITE
+            idempotent = name not in _NON_IDEMPOTENT
+
+            def call(*args, **kwargs):
+                return self._client.call(kind, attr, *args, idempotent=idempotent, **kwargs)
+            call.__name__ = name
+            return call
+        return attr
+
+
+class QuotaAwareSpreadsheet:
+    """Envoltorio de gspread.Spreadsheet que devuelve pestañas también envueltas"""
+
+    def __init__(self, sheet, client: QuotaAwareClient):
+        self._sheet = sheet
+        self._client = client
+
+    def worksheet(self, title: str) -> QuotaAwareWorksheet:
+        ws = self._client.call(READ, self._sheet.worksheet, title)
+        return QuotaAwareWorksheet(ws, self._client)
+
+    def add_worksheet(self, *args, **kwargs) -> QuotaAwareWorksheet:
+        ws = self._client.call(WRITE, self._sheet.add_worksheet, *args, idempotent=False, **kwargs)
+        return QuotaAwareWorksheet(ws, self._client)
+
+    def values_batch_get(self, *args, **kwargs):
+        return self._client.call(READ, self._sheet.values_batch_get, *args, **kwargs)
+
+    def last_update_time(self) -> str:
+        """Fecha de última modificación del archivo (Drive API), para revalidar copias locales"""
+        sheet = self._sheet
+
+        def lastUpdateTime():
+            # gspread 6 la consulta con get_lastUpdateTime(); en gspread 5 es una propiedad
+            getter = getattr(sheet, 'get_lastUpdateTime', None)
+            return getter() if getter else sheet.lastUpdateTime
+        return self._client.call(READ, lastUpdateTime)
+
+    def __getattr__(self, name: str):
+        return getattr(self._sheet, name)
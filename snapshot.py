@@ -0,0 +1,133 @@
+"""Copia en disco de la hoja ya parseada, para arrancar sin descargarla
+
+Guarda los registros de 'Driver_Finances_DB' (con su número de fila) y la
+configuración de 'Config' en un archivo Arrow IPC: columnas tipadas en binario
+que se leen con memory-map, sin volver a parsear texto. Junto a los datos se
+guarda la fecha de última modificación del Google Sheet (Drive API); al arrancar
+SheetsBackend solo usa la copia si esa fecha no cambió.
+
+pyarrow llega como dependencia de streamlit; se importa al leer o escribir.
+"""
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from storage import DailyRecord, FIELDS, INT_FIELDS, JSON_FIELDS, safe_json_list
+
+# Cambia si cambia el formato del archivo: las copias antiguas se ignoran
+SNAPSHOT_VERSION = "2"
+_EMPTY_JSON = ('', '[]')
+
+
+def _schema():
+    import pyarrow as pa
+    fields = [pa.field('row', pa.int64())]
+    for field in FIELDS:
+        if field == 'date' or field in JSON_FIELDS:
+            fields.append(pa.field(field, pa.string()))
+        elif field in INT_FIELDS:
+            fields.append(pa.field(field, pa.int64()))
+        else:
+            fields.append(pa.field(field, pa.float64()))
+    return pa.schema(fields)
+
+
+class SnapshotStore:
+    """Archivo con la última copia de una pestaña de registros y su configuración"""
+
+    def __init__(self, path: str, worksheet: str):
+        self.path = path
+        # La copia solo vale para la misma pestaña (cambiar worksheet_db la descarta)
+        self.worksheet = worksheet
+
+    def save(self, modified_time: str, loaded_at: float, index: Dict[str, DailyRecord],
+             rows: Dict[str, int], row_dates: List[str], config: Optional[Dict],
+             schema_verified: bool = False, config_history: Optional[Dict[str, Dict]] = None):
+        """Escribe la copia de forma atómica (archivo temporal + rename)
+
+        Args:
+            modified_time: Última modificación del Google Sheet cuando se leyeron los datos
+            loaded_at: Hora (time.time) de la última descarga completa de la hoja
+            index / rows / row_dates: Índice en memoria de SheetsBackend
+            config: Configuración del vehículo (None si no se ha leído)
+            schema_verified: Si las pestañas y encabezados ya se verificaron
+            config_history: Historial de configuración {fecha de vigencia: valores y fila}
+        """
+        import pyarrow as pa
+        schema = _schema()
+        dates = sorted(index, key=rows.__getitem__)
+        columns = [pa.array([rows[d] for d in dates], type=pa.int64())]
+        for field, arrow_field in zip(FIELDS, list(schema)[1:]):
+            values = [getattr(index[d], field) for d in dates]
+            if field in JSON_FIELDS:
+                values = [json.dumps(v) if v else '[]' for v in values]
+            columns.append(pa.array(values, type=arrow_field.type))
+        # Filas con una fecha repetida (no están en el índice, pero sí en el orden de la hoja)
+        duplicates = [(d, n) for n, d in enumerate(row_dates, start=2) if d and rows.get(d) != n]
+        metadata = {
+            'version': SNAPSHOT_VERSION,
+            'worksheet': self.worksheet,
+            'modified_time': modified_time,
+            'loaded_at': repr(loaded_at),
+            'row_count': str(len(row_dates)),
+            'duplicates': json.dumps(duplicates),
+            'config': json.dumps(config),
+            'config_history': json.dumps(config_history or {}),
+            'schema_verified': '1' if schema_verified else '0',
+        }
+        table = pa.Table.from_arrays(columns, schema=schema.with_metadata(metadata))
+        tmp_path = f"{self.path}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, self.path)
+
+    def _metadata(self, reader) -> Optional[Dict[str, str]]:
+        meta = {k.decode(): v.decode() for k, v in (reader.schema.metadata or {}).items()}
+        if meta.get('version') != SNAPSHOT_VERSION or meta.get('worksheet') != self.worksheet:
+            return None
+        return meta
+
+    def load_config(self) -> Optional[Dict]:
+        """Solo la configuración guardada (lee los metadatos, no las columnas)"""
+        if not os.path.exists(self.path):
+            return None
+        import pyarrow as pa
+        with pa.memory_map(self.path, 'r') as source:
+            meta = self._metadata(pa.ipc.open_file(source))
+        return json.loads(meta['config']) if meta else None
+
+    def load(self) -> Optional[Dict]:
+        """Lee la copia; None si no existe, es de otro formato o de otra pestaña
+
+        Returns:
+            {'modified_time', 'loaded_at', 'row_count', 'config', 'config_history',
+             'schema_verified', 'records': [(fila, DailyRecord)], 'duplicates': [(fecha, fila)]}
+        """
+        if not os.path.exists(self.path):
+            return None
+        import pyarrow as pa
+        with pa.memory_map(self.path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            meta = self._metadata(reader)
+            if meta is None:
+                return None
+            table = reader.read_all()
+            # Las columnas apuntan al archivo mapeado: se convierten antes de cerrarlo
+            columns = []
+            for field in FIELDS:
+                values = table.column(field).to_pylist()
+                if field in JSON_FIELDS:
+                    values = [[] if v in _EMPTY_JSON else safe_json_list(v) for v in values]
+                columns.append(values)
+            rows = table.column('row').to_pylist()
+        records: List[Tuple[int, DailyRecord]] = list(zip(rows, (DailyRecord(*values) for values in zip(*columns))))
+        return {
+            'modified_time': meta['modified_time'],
+            'loaded_at': float(meta['loaded_at']),
+            'row_count': int(meta['row_count']),
+            'config': json.loads(meta['config']),
+            'config_history': json.loads(meta.get('config_history') or '{}'),
+            'schema_verified': meta.get('schema_verified') == '1',
+            'records': records,
+            'duplicates': [tuple(d) for d in json.loads(meta['duplicates'])],
+        }
@@ -0,0 +1,1132 @@
+import bisect
+import csv
+import io
+import json
+import logging
+import math
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from typing import Optional, List, Dict, Callable, Iterator
+from sheets_client import (
+    QuotaAwareClient, QuotaLimiter, READ_REQUESTS_PER_MINUTE, RetryPolicy, WRITE_REQUESTS_PER_MINUTE
+)
+
+logger = logging.getLogger(__name__)
+
+# Encabezados de la pestaña 'Driver_Finances_DB' (orden estricto de columnas A:S)
+HEADERS = [
+    'Fecha', 'Uber Earnings', 'Lyft Earnings', 'Cash Tips', 'Additional Income',
+    'Odo Start', 'Odo End', 'Miles Driven', 'Gallons Used', 'Fuel Cost',
+    'Food Cost', 'Misc Cost', 'Additional Expenses', 'Wear And Tear',
+    'Total Gross', 'Total Expenses', 'Net Profit', 'Meta Neta Objetivo', 'Expense Ratio'
+]
+
+# Nombre interno de cada columna, en el mismo orden que HEADERS
+FIELDS = [
+    'date', 'uber_earnings', 'lyft_earnings', 'cash_tips', 'additional_income',
+    'odo_start', 'odo_end', 'miles_driven', 'gallons_used', 'fuel_cost',
+    'food_cost', 'misc_cost', 'additional_expenses', 'wear_and_tear',
+    'total_gross', 'total_expenses', 'net_profit', 'meta_neta_objetivo', 'expense_ratio'
+]
+INT_FIELDS = ('odo_start', 'odo_end')
+JSON_FIELDS = ('additional_income', 'additional_expenses')
+
+CONFIG_HEADERS = ['MPG', 'Gas Price', 'Meta Neta Objetivo']
+DEFAULT_CONFIG = {'mpg': 35.0, 'gas_price': 3.10, 'meta_neta_objetivo': 200.0}
+
+# Historial de la configuración: columnas E:H de 'Config', una fila por fecha de vigencia
+CONFIG_HISTORY_HEADERS = ['Vigente Desde', 'MPG', 'Gas Price', 'Meta Neta Objetivo']
+# Vigencia de la configuración que había antes del primer cambio registrado ("desde siempre")
+CONFIG_HISTORY_START = '1900-01-01'
+# Filas que se agregan a 'Config' cuando el historial llega al final de la cuadrícula
+CONFIG_GROW_ROWS = 50
+
+
+# --- CONVERSIÓN ENTRE FILAS Y REGISTROS ---
+_INT64_LIMIT = 2 ** 63
+_INT64_MIN = -_INT64_LIMIT
+
+def safe_float(val, default=0.0):
+    try:
+        if val is None or val == '' or (isinstance(val, str) and not val.strip()):
+            return default
+        result = float(str(val).strip())
+        # 'nan'/'inf' escritos a mano en la hoja se tratan como inválidos
+        return result if math.isfinite(result) else default
+    except (ValueError, TypeError):
+        return default
+
+def safe_int(val, default=0):
+    try:
+        if val is None or val == '' or (isinstance(val, str) and not val.strip()):
+            return default
+        result = int(float(str(val).strip()))
+        # Fuera del rango de int64 (lo que cabe en la columna vectorizada) se trata como inválido
+        return result if _INT64_MIN <= result < _INT64_LIMIT else default
+    except (ValueError, TypeError, OverflowError):
+        return default
+
+def safe_json_list(val) -> List:
+    try:
+        if val and str(val).strip():
+            return json.loads(val)
+    except (ValueError, TypeError):
+        pass
+    return []
+
+def record_to_row(data: Dict, record_date: str) -> List:
+    """Convierte un diccionario de registro en la fila que se guarda (columnas A:S)"""
+    row = [record_date]
+    for field in FIELDS[1:]:
+        if field in JSON_FIELDS:
+            row.append(json.dumps(data.get(field, [])))
+        elif field in INT_FIELDS:
+            row.append(int(data.get(field, 0)))
+        else:
+            row.append(float(data.get(field, 0)))
+    return row
+
+class DailyRecord:
+    """Registro diario con los campos ya tipados al parsear la fila
+
+    Usa __slots__ en lugar de un dict de 19 claves por fila: ocupa bastante menos
+    memoria con todo el historial cargado y los campos se leen como atributos
+    (record.net_profit) ya convertidos a float, int (odómetro) o lista (JSON).
+    Para el código que trabaja con diccionarios también admite record['campo'],
+    record.get('campo') y dict(record).
+    """
+
+    __slots__ = tuple(FIELDS)
+
+    def __init__(self, *values):
+        # Valores en el orden de FIELDS (columnas A:S)
+        for field, value in zip(FIELDS, values):
+            setattr(self, field, value)
+
+    def __getitem__(self, field: str):
+        if field not in _FIELD_SET:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default=None):
+        return getattr(self, field) if field in _FIELD_SET else default
+
+    def __contains__(self, field) -> bool:
+        return field in _FIELD_SET
+
+    def keys(self) -> List[str]:
+        return list(FIELDS)
+
+    def values(self) -> List:
+        return [getattr(self, field) for field in FIELDS]
+
+    def items(self) -> List[tuple]:
+        return list(zip(FIELDS, self.values()))
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def copy(self) -> "DailyRecord":
+        """Copia (incluidas las listas JSON) para que quien la reciba pueda modificarla"""
+        copied = DailyRecord(*self.values())
+        for field in JSON_FIELDS:
+            value = getattr(copied, field)
+            if isinstance(value, list):
+                setattr(copied, field, [dict(item) if isinstance(item, dict) else item for item in value])
+        return copied
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, DailyRecord):
+            return self.values() == other.values()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"DailyRecord({self.to_dict()!r})"
+
+_FIELD_SET = frozenset(FIELDS)
+
+def row_to_record(row: List) -> Optional[DailyRecord]:
+    """Convierte una fila (valores como strings o números) en un DailyRecord"""
+    if not row or not row[0]:
+        return None
+    date = str(row[0]).strip()
+    if not date:
+        return None
+    values = [date]
+    for idx, field in enumerate(FIELDS[1:], start=1):
+        val = row[idx] if len(row) > idx else None
+        if field in JSON_FIELDS:
+            values.append(safe_json_list(val))
+        elif field in INT_FIELDS:
+            values.append(safe_int(val))
+        else:
+            values.append(safe_float(val))
+    return DailyRecord(*values)
+
+_EMPTY_JSON = frozenset(['', '[]'])
+_NUMERIC_FIELDS = [f for f in FIELDS[1:] if f not in JSON_FIELDS]
+_NUMERIC_COLUMNS = [FIELDS.index(f) for f in _NUMERIC_FIELDS]
+_SEPARATOR = '\x1f'  # Separador de unidad ASCII: no aparece en celdas numéricas
+
+def _to_float_array(col) -> np.ndarray:
+    # Conversión columna a columna (camino de respaldo) con las mismas reglas que safe_float:
+    # float() de Python acepta '1_000' o dígitos de ancho completo, que pandas no reconoce
+    col = np.asarray(col, dtype=object)
+    try:
+        return col.astype(np.float64)
+    except (ValueError, TypeError):
+        return np.array([safe_float(v) for v in col.tolist()], dtype=np.float64)
+
+def _parse_numeric_block(rows: List[List]) -> Dict[str, np.ndarray]:
+    """Parsea todas las columnas numéricas de una vez con el lector CSV en C de pandas"""
+    text = '\n'.join(
+        _SEPARATOR.join([str(row[i]) if i < len(row) else '' for i in _NUMERIC_COLUMNS])
+        for row in rows
+    )
+    try:
+        # Una celda con saltos de línea o con el separador desalinearía las columnas
+        if ('\r' in text or text.count('\n') != len(rows) - 1
+                or text.count(_SEPARATOR) != (len(_NUMERIC_FIELDS) - 1) * len(rows)):
+            raise ValueError("Celdas con separadores")
+        # round_trip: mismo float que float() de Python (el parser por defecto difiere en el último bit)
+        frame = pd.read_csv(io.StringIO(text), sep=_SEPARATOR, header=None, names=_NUMERIC_FIELDS,
+                            index_col=False, skipinitialspace=True, quoting=csv.QUOTE_NONE,
+                            skip_blank_lines=False, engine='c', float_precision='round_trip')
+        if len(frame) != len(rows):
+            raise ValueError("Filas desalineadas")
+        # Una columna que no quedó numérica tiene texto que el lector de C no reconoce
+        # ('1_000', '１２', 'True'...): esa columna se convierte con las reglas de safe_float
+        columns = {
+            field: (frame[field].to_numpy(dtype=np.float64) if frame[field].dtype.kind in 'fiu'
+                    else _to_float_array(frame[field].to_numpy()))
+            for field in _NUMERIC_FIELDS
+        }
+    except (ValueError, pd.errors.ParserError):
+        # Alguna celda con saltos de línea o separadores: conversión columna a columna
+        cells = np.empty((len(rows), len(FIELDS)), dtype=object)
+        cells[:] = [list(row[:len(FIELDS)]) + [''] * (len(FIELDS) - len(row)) for row in rows]
+        columns = {field: _to_float_array(cells[:, i]) for field, i in zip(_NUMERIC_FIELDS, _NUMERIC_COLUMNS)}
+    # Vacíos, texto inválido e infinitos -> 0
+    return {field: np.where(np.isfinite(values), values, 0.0) for field, values in columns.items()}
+
+def parse_columns(rows: List[List]) -> pd.DataFrame:
+    """Convierte filas de get_all_values() (sin encabezado) en columnas tipadas con una pasada vectorizada
+
+    Devuelve un DataFrame con una columna por campo (float64, int64 para el odómetro,
+    listas para los JSON) y solo las filas con fecha; el índice es la posición de la
+    fila en `rows`. Los valores vacíos o inválidos se convierten en 0.
+    """
+    positions, valid_rows, dates = [], [], []
+    for pos, row in enumerate(rows):
+        date = str(row[0]).strip() if row and row[0] else ''
+        if date:
+            positions.append(pos)
+            valid_rows.append(row)
+            dates.append(date)
+    if not valid_rows:
+        return pd.DataFrame({field: [] for field in FIELDS})
+    numbers = _parse_numeric_block(valid_rows)
+    columns = {'date': dates}
+    for idx, field in enumerate(FIELDS[1:], start=1):
+        if field in JSON_FIELDS:
+            # Casi todas las celdas son '[]' o vacías: solo se decodifica lo que tiene contenido
+            columns[field] = [
+                [] if len(row) <= idx or row[idx] in _EMPTY_JSON else safe_json_list(row[idx])
+                for row in valid_rows
+            ]
+        elif field in INT_FIELDS:
+            # int(float(x)) trunca hacia cero; fuera del rango de int64 -> 0 (igual que safe_int)
+            values = np.trunc(numbers[field])
+            columns[field] = np.where(np.abs(values) < _INT64_LIMIT, values, 0.0).astype(np.int64)
+        else:
+            columns[field] = numbers[field]
+    return pd.DataFrame(columns, index=positions, columns=FIELDS)
+
+# Por debajo de este número de filas el parseo fila a fila es más rápido que montar columnas
+VECTORIZE_MIN_ROWS = 64
+
+def parse_rows(rows: List[List]) -> List[Optional[DailyRecord]]:
+    """Convierte filas de get_all_values() en registros (None en las filas sin fecha)"""
+    if len(rows) < VECTORIZE_MIN_ROWS:
+        return [row_to_record(row) for row in rows]
+    frame = parse_columns(rows)
+    values = [frame[field].tolist() for field in FIELDS]
+    records: List[Optional[DailyRecord]] = [None] * len(rows)
+    for pos, record_values in zip(frame.index.tolist(), zip(*values)):
+        records[pos] = DailyRecord(*record_values)
+    return records
+
+def copy_record(record: DailyRecord) -> DailyRecord:
+    """Copia un registro (incluidas las listas JSON) para que quien lo reciba pueda modificarlo"""
+    return record.copy()
+
+def config_from_row(vals: List) -> Dict:
+    """Convierte la fila 2 de 'Config' en el diccionario de configuración"""
+    if not vals or len(vals) < 3:
+        return dict(DEFAULT_CONFIG)
+    return {
+        'mpg': safe_float(vals[0], DEFAULT_CONFIG['mpg']),
+        'gas_price': safe_float(vals[1], DEFAULT_CONFIG['gas_price']),
+        'meta_neta_objetivo': safe_float(vals[2], DEFAULT_CONFIG['meta_neta_objetivo'])
+    }
+
+def config_history_from_rows(rows: List[List]) -> Dict[str, Dict]:
+    """Lee el historial de las columnas E:H de 'Config' (fila 1 = encabezados)
+
+    Returns:
+        {fecha de vigencia: {'row', 'mpg', 'gas_price', 'meta_neta_objetivo'}}; si una
+        fecha está repetida gana la última fila
+    """
+    history = {}
+    for row_num, row in enumerate(rows[1:], start=2):
+        vals = list(row[4:8])
+        date = str(vals[0]).strip() if vals else ''
+        if date:
+            history[date] = dict(config_from_row(vals[1:]), row=row_num)
+    return history
+
+def config_for_date(history: List[Dict], current: Dict, date: str) -> Dict:
+    """Configuración vigente en `date` según el historial (ordenado por 'effective_from')
+
+    Después del último cambio rige la configuración actual; antes del primero, la
+    más antigua conocida.
+    """
+    dates = [entry['effective_from'] for entry in history]
+    pos = bisect.bisect_right(dates, date)
+    if pos == len(history):
+        return {key: current[key] for key in DEFAULT_CONFIG}
+    entry = history[max(pos - 1, 0)]
+    return {key: entry[key] for key in DEFAULT_CONFIG}
+
+def _appended_row_number(response, default: int) -> int:
+    """Extrae el número de fila de la respuesta de append_row ('Hoja!A5:S5' -> 5)"""
+    try:
+        updated_range = response['updates']['updatedRange']
+        return int(''.join(ch for ch in updated_range.split('!')[-1].split(':')[0] if ch.isdigit()))
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+# --- INTERFAZ DE ALMACENAMIENTO ---
+class StorageBackend:
+    """Interfaz común para los backends de almacenamiento
+
+    Los métodos lanzan excepciones ante errores; database.py se encarga de
+    mostrarlos en la interfaz y devolver valores por defecto.
+    """
+
+    name = "base"
+    _schema_verified = False
+    # Se incrementa con cada cambio de los datos (carga, sincronización, guardado o borrado)
+    data_version = 0
+
+    def current_version(self) -> int:
+        """Versión de los datos después de refrescar la copia local si hace falta"""
+        return self.data_version
+
+    def init_schema(self):
+        """Crea las tablas/pestañas y encabezados si no existen"""
+        raise NotImplementedError
+
+    def ensure_schema(self):
+        """Verifica el esquema solo la primera vez en el proceso (memoizado)"""
+        if not self._schema_verified:
+            self.init_schema()
+            self._schema_verified = True
+
+    def reverify_schema(self):
+        """Fuerza una nueva verificación del esquema (p. ej. si alguien editó la hoja)"""
+        self._schema_verified = False
+        self.ensure_schema()
+
+    def invalidate(self):
+        """Descarta cualquier copia local de los datos (por defecto no hay ninguna)"""
+        pass
+
+    def request_sync(self):
+        """Pide que la próxima lectura compruebe el remoto (p. ej. tras una escritura con resultado incierto)"""
+        pass
+
+    def preload(self):
+        """Carga de una vez los datos que necesita una página (por defecto no hace nada)"""
+        pass
+
+    def pending_count(self) -> int:
+        """Escrituras confirmadas localmente que aún no llegan al almacenamiento remoto"""
+        return 0
+
+    def failed_count(self) -> int:
+        """Escrituras confirmadas localmente que el almacenamiento remoto rechazó"""
+        return 0
+
+    def get_config(self) -> Dict:
+        raise NotImplementedError
+
+    def cached_config(self) -> Optional[Dict]:
+        """Configuración que se puede devolver sin llamadas remotas (None si no la hay)"""
+        return None
+
+    def get_config_history(self) -> List[Dict]:
+        """Cambios de configuración [{'effective_from', 'mpg', 'gas_price', 'meta_neta_objetivo'}] por fecha"""
+        return []
+
+    def get_config_for_date(self, date: str) -> Dict:
+        """Configuración vigente en la fecha indicada (para recalcular días pasados)"""
+        return config_for_date(self.get_config_history(), self.get_config(), date)
+
+    def update_config(self, mpg: float, gas_price: float, meta_neta_objetivo: float,
+                      effective_from: Optional[str] = None):
+        """Cambia la configuración actual y la registra en el historial desde `effective_from` (hoy)"""
+        raise NotImplementedError
+
+    def upsert_record(self, record_date: str, row: List):
+        """Inserta o reemplaza la fila completa del día indicado"""
+        raise NotImplementedError
+
+    def upsert_records(self, rows: List[List]):
+        """Inserta o reemplaza varios días de una vez (por defecto, uno a uno)"""
+        for row in rows:
+            self.upsert_record(row[0], row)
+
+    def get_record(self, date: str) -> Optional[DailyRecord]:
+        raise NotImplementedError
+
+    def get_all_records(self) -> List[DailyRecord]:
+        """Devuelve todos los registros ordenados por fecha descendente"""
+        raise NotImplementedError
+
+    def get_records_between(self, start: Optional[str], end: Optional[str],
+                            limit: Optional[int] = None) -> List[DailyRecord]:
+        """Registros con start <= fecha <= end (ISO, None = sin límite), por fecha descendente
+
+        `limit` devuelve solo los `limit` más recientes del rango.
+        """
+        records = self.get_all_records()
+        dates = [r.date for r in reversed(records)]
+        lo = bisect.bisect_left(dates, start) if start else 0
+        hi = bisect.bisect_right(dates, end) if end else len(dates)
+        return records[len(records) - hi:len(records) - lo][:limit]
+
+    def scan_records(self, start: Optional[str] = None, end: Optional[str] = None) -> List[DailyRecord]:
+        """Como get_records_between, pero de solo lectura: quien llama no debe modificar los registros
+
+        Para agregaciones (estadísticas, resúmenes, tendencias); los backends con
+        copia en memoria devuelven sus registros sin copiarlos.
+        """
+        return self.get_records_between(start, end)
+
+    def iter_records(self, chunk_size: int = 500) -> Iterator[List[DailyRecord]]:
+        """Recorre todo el historial en bloques de hasta chunk_size registros (para exportar)"""
+        records = self.get_all_records()
+        for start in range(len(records) - 1, -1, -chunk_size):
+            yield records[max(start - chunk_size + 1, 0):start + 1][::-1]
+
+    def get_last_record(self, before: Optional[str] = None) -> Optional[Dict]:
+        """Devuelve {'date', 'odo_end'} del registro más reciente con odómetro final
+
+        Args:
+            before: Fecha ISO; solo se consideran los días anteriores (None = todos)
+        """
+        for record in self.get_all_records():
+            if (before is None or record.date < before) and record.odo_end > 0:
+                return {'odo_end': record.odo_end, 'date': record.date}
+        return None
+
+    def delete_record(self, date: str) -> bool:
+        raise NotImplementedError
+
+
+# --- BACKEND: GOOGLE SHEETS ---
+class SheetsBackend(StorageBackend):
+    """Almacenamiento en Google Sheets (pestañas 'Config' y 'Driver_Finances_DB')"""
+
+    name = "sheets"
+
+    def __init__(self, sheet_provider: Callable, worksheet_db: str = "Driver_Finances_DB",
+                 worksheet_config: str = "Config", index_ttl: float = 300.0,
+                 full_sync_interval: float = 3600.0, client: Optional[QuotaAwareClient] = None,
+                 snapshot=None, config_ttl: float = 3600.0):
+        # sheet_provider devuelve el objeto Spreadsheet (o None si no hay conexión)
+        self.sheet_provider = sheet_provider
+        # Todas las llamadas remotas pasan por el limitador de cuota con reintentos
+        self.client = client or QuotaAwareClient()
+        self.worksheet_db = worksheet_db
+        self.worksheet_config = worksheet_config
+        # Índice fecha -> registro construido con una sola lectura masiva (get_all_values)
+        # y mantenido al día en cada escritura. Pasados index_ttl segundos se sincroniza
+        # de forma incremental (solo filas nuevas); cada full_sync_interval se recarga entera
+        self.index_ttl = index_ttl
+        self.full_sync_interval = full_sync_interval
+        self._index: Optional[Dict[str, DailyRecord]] = None
+        # Índice fecha -> número de fila, para que un upsert sea un solo update/append_row
+        # (antes de escribir o borrar por número de fila se comprueba la fecha en la columna A)
+        self._rows: Dict[str, int] = {}
+        # Fecha de cada fila en el orden de la hoja (posición 0 = fila 2)
+        self._row_dates: List[str] = []
+        self._index_loaded_at = 0.0
+        self._full_loaded_at = 0.0
+        self._sorted_dates: List[str] = []
+        self._sorted_version = -1
+        # Fechas ordenadas de los días con odómetro final (None = construir en la próxima consulta)
+        self._odo_dates: Optional[List[str]] = None
+        # Configuración del vehículo y su historial (columnas E:H de 'Config'). Solo
+        # cambian con update_config; se releen de la hoja cada config_ttl segundos
+        # por si alguien la editó a mano. config_version sube cuando cambian
+        self.config_ttl = config_ttl
+        self.config_version = 0
+        self._config: Optional[Dict] = None
+        self._config_history: Dict[str, Dict] = {}
+        self._config_loaded_at = 0.0
+        self._lock = threading.RLock()
+        self._ws_cache: Dict[str, object] = {}
+        self._ws_cache_owner = None
+        self._wrapped_sheet = None
+        # Copia en disco de la hoja (snapshot.SnapshotStore) para arrancar sin descargarla.
+        # Se guarda tras una carga completa o una sincronización, no en cada escritura;
+        # _snapshot_dirty indica que la memoria tiene guardados propios que la copia no
+        self.snapshot = snapshot
+        self._snapshot_dirty = False
+
+    def _sheet(self):
+        sheet = self.sheet_provider()
+        if sheet is None:
+            raise ConnectionError("No hay conexión con Google Sheets")
+        if sheet is not self._ws_cache_owner:
+            # Conexión nueva (la caché de get_connection expiró): descartar las pestañas guardadas
+            self._ws_cache = {}
+            self._ws_cache_owner = sheet
+            self._wrapped_sheet = self.client.wrap_spreadsheet(sheet)
+        return self._wrapped_sheet
+
+    def _worksheet(self, title: str):
+        # sheet.worksheet() consulta los metadatos de la hoja en cada llamada: guardar el objeto
+        sheet = self._sheet()
+        ws = self._ws_cache.get(title)
+        if ws is None:
+            ws = sheet.worksheet(title)
+            self._ws_cache[title] = ws
+        return ws
+
+    def _ws_db(self):
+        return self._worksheet(self.worksheet_db)
+
+    def _ws_config(self):
+        return self._worksheet(self.worksheet_config)
+
+    def reverify_schema(self):
+        self._ws_cache = {}
+        super().reverify_schema()
+
+    def init_schema(self):
+        from gspread.exceptions import WorksheetNotFound
+        sheet = self._sheet()
+
+        # Inicializar hoja de configuración
+        try:
+            ws_config = sheet.worksheet(self.worksheet_config)
+            # Verificar si tiene datos
+            if not ws_config.row_values(1):
+                ws_config.update('A1:C1', [CONFIG_HEADERS])
+            if not ws_config.row_values(2):
+                ws_config.update('A2:C2', [[DEFAULT_CONFIG['mpg'], DEFAULT_CONFIG['gas_price'], DEFAULT_CONFIG['meta_neta_objetivo']]])
+        except WorksheetNotFound:
+            ws_config = sheet.add_worksheet(title=self.worksheet_config, rows=10, cols=10)
+            ws_config.update('A1:C1', [CONFIG_HEADERS])
+            ws_config.update('A2:C2', [[DEFAULT_CONFIG['mpg'], DEFAULT_CONFIG['gas_price'], DEFAULT_CONFIG['meta_neta_objetivo']]])
+        self._ws_cache[self.worksheet_config] = ws_config
+
+        # Inicializar hoja de registros
+        try:
+            ws_db = sheet.worksheet(self.worksheet_db)
+            headers = ws_db.row_values(1)
+            if not headers or len(headers) < len(HEADERS):
+                ws_db.update('A1:S1', [HEADERS])
+        except WorksheetNotFound:
+            ws_db = sheet.add_worksheet(title=self.worksheet_db, rows=1000, cols=20)
+            ws_db.update('A1:S1', [HEADERS])
+        self._ws_cache[self.worksheet_db] = ws_db
+
+    def _set_config(self, config: Dict, history: Optional[Dict[str, Dict]] = None):
+        if history is None:
+            history = self._config_history
+        if config != self._config or history != self._config_history:
+            self.config_version += 1
+        self._config = config
+        self._config_history = history
+        self._config_loaded_at = time.monotonic()
+
+    def _apply_config_rows(self, rows: List[List]):
+        # Fila 2 (A2:C2) = configuración actual; columnas E:H = historial
+        self._set_config(config_from_row(rows[1] if len(rows) > 1 else []), config_history_from_rows(rows))
+
+    def _ensure_config(self):
+        if self._config is None or time.monotonic() - self._config_loaded_at > self.config_ttl:
+            self._apply_config_rows(self._ws_config().get('A1:H'))
+
+    def get_config(self) -> Dict:
+        with self._lock:
+            self._ensure_config()
+            return dict(self._config)
+
+    def get_config_history(self) -> List[Dict]:
+        with self._lock:
+            self._ensure_config()
+            return [dict({key: entry[key] for key in DEFAULT_CONFIG}, effective_from=date)
+                    for date, entry in sorted(self._config_history.items())]
+
+    def cached_config(self) -> Optional[Dict]:
+        # Sin tomar el lock: otro hilo puede tenerlo durante una llamada remota larga
+        config = self._config
+        if config is not None:
+            # Vencido config_ttl, None: quien llama pasa por get_config, que relee 'Config'
+            if time.monotonic() - self._config_loaded_at > self.config_ttl:
+                return None
+            return dict(config)
+        if self.snapshot is None:
+            return None
+        try:
+            # Sin revalidar: sirve para el primer pintado, los datos se revalidan al cargar
+            return self.snapshot.load_config()
+        except Exception as e:
+            logger.warning("No se pudo leer la configuración de la copia local: %s", e)
+            return None
+
+    def update_config(self, mpg: float, gas_price: float, meta_neta_objetivo: float,
+                      effective_from: Optional[str] = None):
+        effective_from = effective_from or datetime.now().date().isoformat()
+        config = {'mpg': mpg, 'gas_price': gas_price, 'meta_neta_objetivo': meta_neta_objetivo}
+        with self._lock:
+            self._ensure_config()
+            history = dict(self._config_history)
+            next_row = max((entry['row'] for entry in history.values()), default=1) + 1
+            # Configuración actual e historial en un solo batch_update
+            data = [{'range': 'A2:C2', 'values': [[mpg, gas_price, meta_neta_objetivo]]}]
+            if not history:
+                # Primer cambio registrado: la configuración anterior rige "desde siempre"
+                data.append({'range': 'E1:H1', 'values': [CONFIG_HISTORY_HEADERS]})
+                previous = dict(self._config, row=next_row)
+                data.append({'range': f'E{next_row}:H{next_row}', 'values': [
+                    [CONFIG_HISTORY_START, previous['mpg'], previous['gas_price'], previous['meta_neta_objetivo']]
+                ]})
+                history[CONFIG_HISTORY_START] = previous
+                next_row += 1
+            row_num = history[effective_from]['row'] if effective_from in history else next_row
+            data.append({'range': f'E{row_num}:H{row_num}',
+                         'values': [[effective_from, mpg, gas_price, meta_neta_objetivo]]})
+            ws = self._ws_config()
+            # batch_update no agrega filas: la pestaña se crea con 10 y el historial crece
+            row_count = getattr(ws, 'row_count', None)
+            if row_count is not None and row_num > row_count:
+                ws.add_rows(max(row_num - row_count, CONFIG_GROW_ROWS))
+            ws.batch_update(data)
+            history[effective_from] = dict(config, row=row_num)
+            self._set_config(config, history)
+            self._snapshot_dirty = True
+
+    def preload(self):
+        """Carga en frío: 'Config' y 'Driver_Finances_DB' en un solo viaje con values_batch_get
+
+        Si hay una copia en disco y la hoja no cambió desde entonces, se usa esa
+        (una sola consulta de la fecha de modificación, sin leer la hoja).
+        """
+        with self._lock:
+            if self._index is None:
+                self._restore_snapshot()
+            if self._index is not None and self._config is not None:
+                return
+            modified_time = self._modified_time()
+            response = self._sheet().values_batch_get([
+                f"'{self.worksheet_config}'!A1:H",
+                f"'{self.worksheet_db}'!A1:S"
+            ])
+            config_rows, db_rows = [vr.get('values', []) for vr in response.get('valueRanges', [])]
+            self._apply_config_rows(config_rows)
+            self._apply_full_load(db_rows)
+            # Si los encabezados y la configuración ya están, el esquema queda verificado sin más llamadas
+            if (len(config_rows) > 1 and config_rows[0][:3] and config_rows[1][:3]
+                    and db_rows and len(db_rows[0]) >= len(HEADERS)):
+                self._schema_verified = True
+            self._save_snapshot(modified_time)
+
+    # --- Copia local de la hoja (índice en memoria) ---
+    def _load_index(self):
+        """Descarga completa de la hoja (primera carga, o cuando la sincronización no cuadra)"""
+        modified_time = self._modified_time()
+        self._apply_full_load(self._ws_db().get_all_values())
+        self._save_snapshot(modified_time)
+
+    def _apply_full_load(self, all_rows: List[List]):
+        self._index = {}
+        self._rows = {}
+        self._row_dates = []
+        self._odo_dates = None
+        self._merge_rows(2, all_rows[1:])
+        self._index_loaded_at = self._full_loaded_at = time.monotonic()
+        self.data_version += 1
+
+    def _merge_rows(self, first_row: int, rows: List):
+        """Incorpora filas leídas de la hoja a partir del número de fila indicado"""
+        for row_num, record in enumerate(parse_rows(rows), start=first_row):
+            date = record.date if record else ''
+            while len(self._row_dates) <= row_num - 2:
+                self._row_dates.append('')
+            self._row_dates[row_num - 2] = date
+            # Igual que find(): si una fecha está repetida gana la primera fila
+            if record and self._rows.get(date, row_num) >= row_num:
+                self._index[date] = record
+                self._rows[date] = row_num
+                self._update_odometer(date, record)
+
+    def _update_odometer(self, date: str, record: Optional[DailyRecord]):
+        """Mantiene al día el índice de odómetros tras guardar (record) o borrar (None) un día"""
+        if self._odo_dates is None:
+            return
+        pos = bisect.bisect_left(self._odo_dates, date)
+        present = pos < len(self._odo_dates) and self._odo_dates[pos] == date
+        if record is not None and record.odo_end > 0:
+            if not present:
+                self._odo_dates.insert(pos, date)
+        elif present:
+            del self._odo_dates[pos]
+
+    def _sync(self):
+        """Sincronización incremental: lee la columna de fechas y solo descarga las filas nuevas"""
+        ws = self._ws_db()
+        # Solo hace falta la fecha de modificación si hay guardados propios que llevar a la copia en disco
+        modified_time = self._modified_time() if self._snapshot_dirty else None
+        dates = [str(v).strip() for v in ws.col_values(1)[1:]]
+        known = list(self._row_dates)
+        while known and not known[-1]:
+            known.pop()
+        if (time.monotonic() - self._full_loaded_at > self.full_sync_interval
+                or dates[:len(known)] != known):
+            # Filas borradas/insertadas a mano, o toca la recarga completa periódica
+            # (que además recoge ediciones manuales en columnas distintas de la fecha)
+            self._load_index()
+            return
+        if len(dates) > len(known):
+            first_row = len(known) + 2
+            self._merge_rows(first_row, list(ws.get(f'A{first_row}:S{len(dates) + 1}')))
+            self.data_version += 1
+        self._index_loaded_at = time.monotonic()
+        self._save_snapshot(modified_time)
+
+    # --- Copia en disco (arranque en frío) ---
+    def _modified_time(self) -> Optional[str]:
+        """Última modificación del Google Sheet (None si no hay copia en disco que revalidar)"""
+        if self.snapshot is None:
+            return None
+        try:
+            return str(self._sheet().last_update_time())
+        except Exception as e:
+            logger.warning("No se pudo consultar la fecha de modificación de la hoja: %s", e)
+            return None
+
+    def _save_snapshot(self, modified_time: Optional[str]):
+        """Guarda el índice en disco, marcado con la fecha de modificación leída ANTES de los datos
+
+        Si alguien edita la hoja entre esa consulta y la lectura, la copia queda con
+        una fecha anterior a la real y el próximo arranque la descarta. Se llama tras
+        una carga completa o una sincronización incremental (que incluyen los guardados
+        propios anteriores), nunca en el camino de un guardado. Como la sincronización
+        no ve ediciones a mano dentro de filas existentes, la copia guarda la hora de
+        la última carga completa y al restaurarla la recarga periódica sigue su calendario.
+        """
+        if self.snapshot is None or modified_time is None or self._index is None:
+            return
+        try:
+            loaded_at = time.time() - (time.monotonic() - self._full_loaded_at)
+            self.snapshot.save(modified_time, loaded_at, self._index, self._rows, self._row_dates,
+                               self._config, self._schema_verified, self._config_history)
+            self._snapshot_dirty = False
+        except Exception as e:
+            logger.warning("No se pudo guardar la copia local de la hoja: %s", e)
+
+    def _restore_snapshot(self) -> bool:
+        """Carga el índice desde disco si la hoja no se modificó desde que se guardó"""
+        if self.snapshot is None:
+            return False
+        try:
+            snap = self.snapshot.load()
+            if snap is None or snap['modified_time'] != self._modified_time():
+                return False
+        except Exception as e:
+            logger.warning("Copia local de la hoja ilegible, se descarga de nuevo: %s", e)
+            return False
+        self._index, self._rows = {}, {}
+        self._row_dates = [''] * snap['row_count']
+        self._odo_dates = None
+        for row_num, record in snap['records']:
+            self._index[record.date] = record
+            self._rows[record.date] = row_num
+            self._row_dates[row_num - 2] = record.date
+        for date, row_num in snap['duplicates']:
+            self._row_dates[row_num - 2] = date
+        if snap['config'] is not None:
+            self._set_config(snap['config'], snap['config_history'])
+        self._schema_verified = self._schema_verified or snap['schema_verified']
+        # La recarga completa periódica sigue contando desde la última descarga real
+        now = time.monotonic()
+        self._index_loaded_at = now
+        self._full_loaded_at = now - max(time.time() - snap['loaded_at'], 0.0)
+        self.data_version += 1
+        return True
+
+    def _ensure_index(self) -> Dict[str, DailyRecord]:
+        if self._index is None:
+            if not self._restore_snapshot():
+                self._load_index()
+        elif time.monotonic() - self._index_loaded_at > self.index_ttl:
+            self._sync()
+        return self._index
+
+    def invalidate(self):
+        """Descarta el índice en memoria; la próxima lectura vuelve a descargar la hoja"""
+        with self._lock:
+            self._index = None
+            self._odo_dates = None
+
+    def request_sync(self):
+        """La próxima lectura hace la sincronización incremental (columna A y filas nuevas), sin recarga completa"""
+        with self._lock:
+            self._index_loaded_at = float('-inf')
+
+    def current_version(self) -> int:
+        with self._lock:
+            self._ensure_index()
+            return self.data_version
+
+    def _rows_match(self, ws, dates: List[str]) -> bool:
+        """True si la columna A de la hoja sigue teniendo esas fechas en las filas del índice"""
+        nums = [self._rows[d] for d in dates]
+        first = min(nums)
+        cells = ws.get(f'A{first}:A{max(nums)}')
+        actual = [str(row[0]).strip() if row else '' for row in cells]
+        return all(n - first < len(actual) and actual[n - first] == d for d, n in zip(dates, nums))
+
+    def _verify_rows(self, ws, dates: List[str]):
+        """Antes de escribir o borrar por número de fila, comprueba que el índice no quedó desfasado
+
+        Si alguien insertó o borró filas a mano desde la última sincronización, los
+        números de fila del índice apuntan a otros días: se recarga la hoja completa.
+        """
+        dates = [d for d in dates if d in self._rows]
+        if dates and not self._rows_match(ws, dates):
+            logger.info("Filas desplazadas en la hoja desde la última sincronización; se recarga el índice")
+            self._load_index()
+
+    def upsert_record(self, record_date: str, row: List):
+        with self._lock:
+            self._ensure_index()
+            ws = self._ws_db()
+            self._verify_rows(ws, [record_date])
+            row_num = self._rows.get(record_date)
+            if row_num is not None:
+                # Si existe, actualizamos toda la fila de una vez
+                ws.update(f'A{row_num}:S{row_num}', [row])
+            else:
+                response = ws.append_row(row)
+                row_num = _appended_row_number(response, len(self._row_dates) + 2)
+            self._merge_rows(row_num, [row])
+            self.data_version += 1
+            self._snapshot_dirty = True
+
+    def upsert_records(self, rows: List[List]):
+        """Carga masiva: un batch_update para los días existentes y un append_rows para los nuevos"""
+        latest = {row[0]: row for row in rows}  # Si un día viene repetido gana la última fila
+        if not latest:
+            return
+        with self._lock:
+            self._ensure_index()
+            ws = self._ws_db()
+            self._verify_rows(ws, list(latest))
+            updates = [(self._rows[date], row) for date, row in latest.items() if date in self._rows]
+            new_rows = [row for date, row in latest.items() if date not in self._rows]
+            if updates:
+                ws.batch_update([{'range': f'A{n}:S{n}', 'values': [row]} for n, row in updates])
+                for row_num, row in updates:
+                    self._merge_rows(row_num, [row])
+            if new_rows:
+                response = ws.append_rows(new_rows)
+                self._merge_rows(_appended_row_number(response, len(self._row_dates) + 2), new_rows)
+            self.data_version += 1
+            self._snapshot_dirty = True
+
+    def get_record(self, date: str) -> Optional[DailyRecord]:
+        with self._lock:
+            record = self._ensure_index().get(date)
+            return copy_record(record) if record else None
+
+    def get_all_records(self) -> List[DailyRecord]:
+        return self.get_records_between(None, None)
+
+    def _ensure_sorted_dates(self) -> List[str]:
+        # Fechas del índice ordenadas; se reordenan solo cuando cambia la versión de los datos
+        self._ensure_index()
+        if self._sorted_version != self.data_version:
+            self._sorted_dates = sorted(self._index)
+            self._sorted_version = self.data_version
+        return self._sorted_dates
+
+    def _range_dates(self, start: Optional[str], end: Optional[str], limit: Optional[int]) -> List[str]:
+        # Fechas del rango por bisect (y recortadas a las `limit` más recientes) antes de tocar registros
+        dates = self._ensure_sorted_dates()
+        lo = bisect.bisect_left(dates, start) if start else 0
+        hi = bisect.bisect_right(dates, end) if end else len(dates)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return dates[lo:hi]
+
+    def get_records_between(self, start: Optional[str], end: Optional[str],
+                            limit: Optional[int] = None) -> List[DailyRecord]:
+        with self._lock:
+            # Solo se copian los registros que se devuelven
+            return [copy_record(self._index[d]) for d in reversed(self._range_dates(start, end, limit))]
+
+    def scan_records(self, start: Optional[str] = None, end: Optional[str] = None) -> List[DailyRecord]:
+        with self._lock:
+            # Los mismos objetos del índice, sin copiar (solo lectura)
+            return [self._index[d] for d in reversed(self._range_dates(start, end, None))]
+
+    def iter_records(self, chunk_size: int = 500) -> Iterator[List[DailyRecord]]:
+        """Bloques de registros en el orden de la hoja, leídos por rangos A{n}:S{m}
+
+        Si la copia local ya está cargada se usa esa (sin llamadas a la API); si
+        no, se lee la hoja por rangos sin descargarla entera.
+        """
+        with self._lock:
+            loaded = self._index is not None
+            if loaded:
+                records = [self._index[d] for d in sorted(self._index, key=self._rows.__getitem__)]
+        if loaded:
+            for start in range(0, len(records), chunk_size):
+                yield [r.copy() for r in records[start:start + chunk_size]]
+            return
+        ws = self._ws_db()
+        last_row = getattr(ws, 'row_count', None)
+        first = 2
+        while last_row is None or first <= last_row:
+            rows = list(ws.get(f'A{first}:S{first + chunk_size - 1}'))
+            if not rows:
+                break
+            yield [r for r in parse_rows(rows) if r is not None]
+            first += chunk_size
+
+    def get_last_record(self, before: Optional[str] = None) -> Optional[Dict]:
+        with self._lock:
+            index = self._ensure_index()
+            if self._odo_dates is None:
+                self._odo_dates = sorted(d for d, r in index.items() if r.odo_end > 0)
+            # Búsqueda binaria en las fechas con odómetro: el día anterior más cercano a `before`
+            pos = bisect.bisect_left(self._odo_dates, before) if before else len(self._odo_dates)
+            if pos == 0:
+                return None
+            date = self._odo_dates[pos - 1]
+            return {'odo_end': index[date].odo_end, 'date': date}
+
+    def delete_record(self, date: str) -> bool:
+        with self._lock:
+            self._ensure_index()
+            ws = self._ws_db()
+            self._verify_rows(ws, [date])
+            row_num = self._rows.get(date)
+            if row_num is None:
+                return False
+            ws.delete_rows(row_num)
+            # delete_rows desplaza hacia arriba las filas siguientes: reconstruir el mapa
+            self._index.pop(date, None)
+            self._update_odometer(date, None)
+            del self._row_dates[row_num - 2]
+            self._rows = {d: (n - 1 if n > row_num else n) for d, n in self._rows.items() if d != date}
+            # Si la fecha estaba repetida, la siguiente fila con esa fecha pasa a ser la vigente
+            if date in self._row_dates:
+                self._index = None
+            self.data_version += 1
+            self._snapshot_dirty = True
+        return True
+
+
+# --- BACKEND: SQLITE LOCAL ---
+class SQLiteBackend(StorageBackend):
+    """Almacenamiento local en SQLite, con la fecha como clave primaria (indexada)"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "driver_finances.db"):
+        self.path = path
+        # Streamlit ejecuta cada sesión en su propio hilo: una conexión compartida con lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self.ensure_schema()
+
+    def init_schema(self):
+        # CREATE TABLE IF NOT EXISTS es local y barato; se ejecuta al construir el backend
+        columns = ", ".join(
+            f"{f} INTEGER NOT NULL DEFAULT 0" if f in INT_FIELDS
+            else f"{f} TEXT NOT NULL DEFAULT '[]'" if f in JSON_FIELDS
+            else f"{f} REAL NOT NULL DEFAULT 0"
+            for f in FIELDS[1:]
+        )
+        with self._lock, self._conn:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS records (date TEXT PRIMARY KEY, {columns})")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS config ("
+                "id INTEGER PRIMARY KEY CHECK (id = 1), mpg REAL, gas_price REAL, meta_neta_objetivo REAL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO config (id, mpg, gas_price, meta_neta_objetivo) VALUES (1, ?, ?, ?)",
+                (DEFAULT_CONFIG['mpg'], DEFAULT_CONFIG['gas_price'], DEFAULT_CONFIG['meta_neta_objetivo'])
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS config_history ("
+                "effective_from TEXT PRIMARY KEY, mpg REAL, gas_price REAL, meta_neta_objetivo REAL)"
+            )
+
+    def _query(self, sql: str, params=()) -> List:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get_config(self) -> Dict:
+        rows = self._query("SELECT mpg, gas_price, meta_neta_objetivo FROM config WHERE id = 1")
+        return config_from_row(list(rows[0]) if rows else [])
+
+    def cached_config(self) -> Optional[Dict]:
+        return self.get_config()  # Lectura local
+
+    def get_config_history(self) -> List[Dict]:
+        rows = self._query(
+            "SELECT effective_from, mpg, gas_price, meta_neta_objetivo FROM config_history ORDER BY effective_from"
+        )
+        return [dict(config_from_row(list(r[1:])), effective_from=r[0]) for r in rows]
+
+    def update_config(self, mpg: float, gas_price: float, meta_neta_objetivo: float,
+                      effective_from: Optional[str] = None):
+        effective_from = effective_from or datetime.now().date().isoformat()
+        with self._lock, self._conn:
+            # Primer cambio registrado: la configuración anterior rige "desde siempre"
+            self._conn.execute(
+                "INSERT INTO config_history (effective_from, mpg, gas_price, meta_neta_objetivo) "
+                "SELECT ?, mpg, gas_price, meta_neta_objetivo FROM config "
+                "WHERE id = 1 AND NOT EXISTS (SELECT 1 FROM config_history)",
+                (CONFIG_HISTORY_START,)
+            )
+            self._conn.execute(
+                "UPDATE config SET mpg = ?, gas_price = ?, meta_neta_objetivo = ? WHERE id = 1",
+                (mpg, gas_price, meta_neta_objetivo)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO config_history (effective_from, mpg, gas_price, meta_neta_objetivo) "
+                "VALUES (?, ?, ?, ?)",
+                (effective_from, mpg, gas_price, meta_neta_objetivo)
+            )
+
+    def upsert_record(self, record_date: str, row: List):
+        placeholders = ", ".join("?" for _ in FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO records ({', '.join(FIELDS)}) VALUES ({placeholders})",
+                [record_date] + list(row[1:len(FIELDS)])
+            )
+            self.data_version += 1
+
+    def upsert_records(self, rows: List[List]):
+        placeholders = ", ".join("?" for _ in FIELDS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO records ({', '.join(FIELDS)}) VALUES ({placeholders})",
+                [list(row[:len(FIELDS)]) for row in rows]
+            )
+            self.data_version += 1
+
+    def get_record(self, date: str) -> Optional[DailyRecord]:
+        rows = self._query(f"SELECT {', '.join(FIELDS)} FROM records WHERE date = ?", (date,))
+        return row_to_record(list(rows[0])) if rows else None
+
+    def get_all_records(self) -> List[DailyRecord]:
+        rows = self._query(f"SELECT {', '.join(FIELDS)} FROM records ORDER BY date DESC")
+        return [row_to_record(list(r)) for r in rows]
+
+    def get_records_between(self, start: Optional[str], end: Optional[str],
+                            limit: Optional[int] = None) -> List[DailyRecord]:
+        # La clave primaria sobre la fecha resuelve el rango con una búsqueda en el índice
+        rows = self._query(
+            f"SELECT {', '.join(FIELDS)} FROM records WHERE date >= ? AND date <= ? ORDER BY date DESC LIMIT ?",
+            (start or '', end or '\uffff', -1 if limit is None else limit)
+        )
+        return [row_to_record(list(r)) for r in rows]
+
+    def iter_records(self, chunk_size: int = 500) -> Iterator[List[DailyRecord]]:
+        # Paginación por la clave primaria: cada bloque es una consulta corta
+        last = ''
+        while True:
+            rows = self._query(
+                f"SELECT {', '.join(FIELDS)} FROM records WHERE date > ? ORDER BY date LIMIT ?",
+                (last, chunk_size)
+            )
+            if not rows:
+                return
+            yield [row_to_record(list(r)) for r in rows]
+            last = rows[-1][0]
+
+    def get_last_record(self, before: Optional[str] = None) -> Optional[Dict]:
+        # El índice de la clave primaria resuelve el día anterior a `before` sin recorrer la tabla
+        where, params = ("odo_end > 0 AND date < ?", (before,)) if before else ("odo_end > 0", ())
+        rows = self._query(f"SELECT date, odo_end FROM records WHERE {where} ORDER BY date DESC LIMIT 1", params)
+        if not rows:
+            return None
+        return {'odo_end': int(rows[0][1]), 'date': rows[0][0]}
+
+    def delete_record(self, date: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM records WHERE date = ?", (date,))
+            if cursor.rowcount > 0:
+                self.data_version += 1
+        return cursor.rowcount > 0
+
+
+def create_backend(settings: Dict, sheet_provider: Optional[Callable] = None,
+                   limiter: Optional[QuotaLimiter] = None, snapshot=None) -> StorageBackend:
+    """Crea el backend indicado en la configuración ('sheets' por defecto o 'sqlite')
+
+    `limiter` permite compartir un mismo limitador de cuota entre los backends de
+    varios conductores (la cuota de Google es por cuenta de servicio). `snapshot`
+    (snapshot.SnapshotStore) es la copia en disco con la que arranca Google Sheets.
+    `config_ttl` (segundos) es cada cuánto se relee la pestaña 'Config' por si se
+    editó a mano; los cambios hechos desde la app se aplican al momento.
+    `max_retries`, `retry_base_delay` y `retry_max_delay` ajustan los reintentos
+    ante 429 y 5xx.
+    """
+    backend = str(settings.get('backend', 'sheets')).lower()
+    if backend == 'sqlite':
+        return SQLiteBackend(settings.get('sqlite_path', 'driver_finances.db'))
+    if backend == 'sheets':
+        if limiter is None:
+            limiter = QuotaLimiter(
+                read_per_minute=float(settings.get('read_per_minute', READ_REQUESTS_PER_MINUTE)),
+                write_per_minute=float(settings.get('write_per_minute', WRITE_REQUESTS_PER_MINUTE))
+            )
+        return SheetsBackend(
+            sheet_provider,
+            worksheet_db=settings.get('worksheet_db', "Driver_Finances_DB"),
+            worksheet_config=settings.get('worksheet_config', "Config"),
+            client=QuotaAwareClient(limiter, RetryPolicy(
+                max_retries=int(settings.get('max_retries', 5)),
+                base_delay=float(settings.get('retry_base_delay', 1.0)),
+                max_delay=float(settings.get('retry_max_delay', 32.0))
+            )),
+            snapshot=snapshot,
+            config_ttl=float(settings.get('config_ttl', 3600.0))
+        )
+    raise ValueError(f"Backend de almacenamiento desconocido: {backend}")
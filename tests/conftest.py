@@ -0,0 +1,77 @@
+"""Pruebas offline contra la hoja en memoria de benchmarks/fake_gspread.py"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_gspread import FakeSpreadsheet  # noqa: E402
+from journal import ReplayWorker  # noqa: E402
+from sheets_client import QuotaAwareClient, QuotaLimiter, RetryPolicy  # noqa: E402
+from storage import CONFIG_HEADERS, DEFAULT_CONFIG, HEADERS, SheetsBackend, SQLiteBackend, record_to_row  # noqa: E402
+
+
+def make_row(day: str, net: float = 100.0, odo_end: int = 0) -> list:
+    """Fila A:S mínima de un día, con la ganancia neta indicada"""
+    return record_to_row({'total_gross': net, 'net_profit': net, 'odo_end': odo_end}, day)
+
+def fake_client() -> QuotaAwareClient:
+    # Sin límite local de cuota y con backoff corto para los 429 simulados
+    return QuotaAwareClient(QuotaLimiter(read_per_minute=1e9, write_per_minute=1e9),
+                            RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01))
+
+def config_row() -> list:
+    return [DEFAULT_CONFIG['mpg'], DEFAULT_CONFIG['gas_price'], DEFAULT_CONFIG['meta_neta_objetivo']]
+
+
+class ManualWorker(ReplayWorker):
+    """Sin hilo: la prueba llama replay_once() cuando quiere"""
+
+    def __init__(self):
+        super().__init__()
+        self.scheduled = []
+
+    def schedule(self, backend, delay=0.0):
+        self.scheduled.append(delay)
+
+
+@pytest.fixture
+def sheet():
+    """Hoja con cinco días consecutivos (2025-01-01 .. 2025-01-05) en las filas 2..6"""
+    sheet = FakeSpreadsheet()
+    sheet.seed(HEADERS, [make_row(f'2025-01-0{d}', net=d * 10.0) for d in range(1, 6)],
+               config_row(), CONFIG_HEADERS)
+    return sheet
+
+@pytest.fixture
+def backend(sheet):
+    return SheetsBackend(lambda: sheet, client=fake_client())
+
+
+@pytest.fixture(params=['sheets', 'sqlite'])
+def store(request, sheet, tmp_path):
+    """Cada backend con los mismos cinco días que `sheet` (las pruebas corren contra los dos)"""
+    if request.param == 'sheets':
+        return SheetsBackend(lambda: sheet, client=fake_client())
+    store = SQLiteBackend(str(tmp_path / 'driver_finances.db'))
+    store.upsert_records([make_row(f'2025-01-0{d}', net=d * 10.0) for d in range(1, 6)])
+    return store
+
+@pytest.fixture
+def app_db(sheet, monkeypatch, tmp_path):
+    """database.py con un solo conductor sobre `sheet` (sin diario ni copia en disco), cachés vacías"""
+    import database as db
+    settings = {
+        'spreadsheet': db.SHEET_NAME, 'worksheet_db': 'Driver_Finances_DB', 'worksheet_config': 'Config',
+        'journal': False, 'snapshot': False,
+        'read_per_minute': 1e9, 'write_per_minute': 1e9,
+        'max_retries': 3, 'retry_base_delay': 0.001, 'retry_max_delay': 0.01,
+    }
+    monkeypatch.setattr(db, 'get_storage_settings', lambda driver_id=db.DEFAULT_DRIVER: dict(settings))
+    monkeypatch.setattr(db, 'get_connection', lambda spreadsheet_name=db.SHEET_NAME: sheet)
+    db.st.cache_resource.clear()
+    yield db
+    db.st.cache_resource.clear()
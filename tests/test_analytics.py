@@ -0,0 +1,90 @@
+import pytest
+
+from analytics import WEEKDAY_NAMES, TrendAnalytics
+from storage import DailyRecord, FIELDS
+
+
+def record(day, gross, expenses, miles):
+    values = dict.fromkeys(FIELDS, 0.0)
+    values.update(date=day, additional_income=[], additional_expenses=[], odo_start=0, odo_end=0,
+                  total_gross=gross, total_expenses=expenses, net_profit=gross - expenses, miles_driven=miles)
+    return DailyRecord(*(values[f] for f in FIELDS))
+
+
+@pytest.fixture
+def analytics():
+    # Lunes 6, martes 7 y lunes 13 de enero de 2025; del 8 al 12 sin trabajar
+    return TrendAnalytics([
+        record('2025-01-13', 300.0, 100.0, 100.0),
+        record('2025-01-07', 150.0, 50.0, 0.0),
+        record('2025-01-06', 200.0, 50.0, 50.0),
+    ], version=4)
+
+
+def test_calendar_days_without_records_count_as_zero(analytics):
+    daily = analytics.daily
+    assert analytics.version == 4
+    assert len(daily) == 8
+    assert daily['worked'].tolist() == [True, True, False, False, False, False, False, True]
+    assert daily.loc['2025-01-09', 'net_profit'] == 0.0
+
+
+def test_rolling_sums_use_calendar_windows(analytics):
+    daily = analytics.daily
+    assert daily.loc['2025-01-07', 'net_7d'] == 250.0
+    # La ventana de 7 días del 13 va del 7 al 13: el 6 ya quedó fuera
+    assert daily.loc['2025-01-12', 'net_7d'] == 250.0
+    assert daily.loc['2025-01-13', 'net_7d'] == 300.0
+    assert daily.loc['2025-01-13', 'net_30d'] == 450.0
+
+
+def test_ratios_are_zero_when_the_denominator_is(analytics):
+    daily = analytics.daily
+    assert daily.loc['2025-01-06', 'profit_per_mile'] == 3.0
+    assert daily.loc['2025-01-07', 'profit_per_mile'] == 0.0  # Sin millas
+    assert daily.loc['2025-01-06', 'expense_ratio'] == 25.0
+    assert daily.loc['2025-01-09', 'expense_ratio'] == 0.0
+    assert daily.loc['2025-01-13', 'profit_per_mile_30d'] == pytest.approx(450.0 / 150.0)
+    assert daily.loc['2025-01-13', 'expense_ratio_30d'] == pytest.approx(200.0 / 650.0 * 100)
+
+
+def test_weekday_averages_only_count_worked_days(analytics):
+    weekdays = analytics.weekday_averages()
+    assert list(weekdays.index) == list(WEEKDAY_NAMES)
+    assert weekdays.loc['Lunes', 'days'] == 2
+    assert weekdays.loc['Lunes', 'net_profit'] == 175.0
+    assert weekdays.loc['Lunes', 'profit_per_mile'] == pytest.approx(350.0 / 150.0)
+    assert weekdays.loc['Martes', 'net_profit'] == 100.0
+    assert weekdays.loc['Miércoles', 'days'] == 0
+    assert weekdays.loc['Miércoles', 'net_profit'] == 0.0
+
+
+def test_series_and_latest(analytics):
+    assert list(analytics.series('2025-01-12').index.strftime('%Y-%m-%d')) == ['2025-01-12', '2025-01-13']
+    assert len(analytics.series(None, '2025-01-07')) == 2
+    latest = analytics.latest()
+    assert latest['net_7d'] == 300.0
+    assert 'worked' not in latest
+
+
+def test_empty_history():
+    analytics = TrendAnalytics([])
+    assert analytics.daily.empty
+    assert analytics.latest() == {}
+    assert analytics.series().empty
+    assert analytics.weekday_averages()['days'].tolist() == [0] * 7
+
+
+def test_single_record():
+    analytics = TrendAnalytics([record('2025-01-08', 120.0, 20.0, 40.0)])
+    assert len(analytics.daily) == 1
+    latest = analytics.latest()
+    assert latest['net_7d'] == latest['net_30d'] == 100.0
+    assert latest['profit_per_mile_30d'] == 2.5
+    assert analytics.weekday_averages().loc['Miércoles', 'days'] == 1
+
+
+def test_invalid_dates_are_ignored():
+    analytics = TrendAnalytics([record('2025-01-02', 50.0, 0.0, 0.0), record('not-a-date', 999.0, 0.0, 0.0),
+                                record('2025-01-01', 10.0, 0.0, 0.0)])
+    assert analytics.daily['net_profit'].tolist() == [10.0, 50.0]
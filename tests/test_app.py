@@ -0,0 +1,50 @@
+import os
+from datetime import date
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT, config_row
+from fake_gspread import FakeSpreadsheet
+from storage import CONFIG_HEADERS, HEADERS, record_to_row
+
+APP = os.path.join(ROOT, 'driver_profit_app.py')
+
+
+@pytest.fixture
+def two_drivers(monkeypatch, tmp_path):
+    """Dos conductores, cada uno con su hoja; 'ana' tiene el día de hoy con ingresos y gastos adicionales"""
+    import database as db
+    today = date.today().isoformat()
+    sheets = {'A': FakeSpreadsheet(), 'B': FakeSpreadsheet()}
+    sheets['A'].seed(HEADERS, [record_to_row({
+        'uber_earnings': 100.0, 'total_gross': 130.0, 'net_profit': 130.0,
+        'additional_income': [{'name': 'Bono', 'amount': 30.0}],
+        'additional_expenses': [{'name': 'Lavado', 'amount': 12.0}],
+    }, today)], config_row(), CONFIG_HEADERS)
+    sheets['B'].seed(HEADERS, [], config_row(), CONFIG_HEADERS)
+    drivers = {'ana': {'spreadsheet': 'A'}, 'beto': {'spreadsheet': 'B'}}
+
+    def storage_settings(driver_id=db.DEFAULT_DRIVER):
+        return dict(drivers.get(driver_id, drivers['ana']), worksheet_db='Driver_Finances_DB',
+                    worksheet_config='Config', journal=False, snapshot=False,
+                    read_per_minute=1e9, write_per_minute=1e9)
+
+    monkeypatch.setattr(db, 'get_driver_settings', lambda: drivers)
+    monkeypatch.setattr(db, 'get_storage_settings', storage_settings)
+    monkeypatch.setattr(db, 'get_connection', lambda spreadsheet_name=db.SHEET_NAME: sheets[spreadsheet_name])
+    db.st.cache_resource.clear()
+    yield sheets
+    db.st.cache_resource.clear()
+
+
+def test_switching_driver_on_same_date_clears_additional_items(two_drivers):
+    app = AppTest.from_file(APP, default_timeout=30).run()
+    assert not app.exception
+    assert app.session_state['additional_income'] == [{'name': 'Bono', 'amount': 30.0}]
+    assert app.session_state['additional_expenses'] == [{'name': 'Lavado', 'amount': 12.0}]
+
+    app.sidebar.selectbox(key='driver_id').set_value('beto').run()
+    assert not app.exception
+    assert app.session_state['additional_income'] == []
+    assert app.session_state['additional_expenses'] == []
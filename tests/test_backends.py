@@ -0,0 +1,68 @@
+"""Comportamiento común de SheetsBackend y SQLiteBackend (fixture `store`)"""
+from conftest import make_row
+from storage import DEFAULT_CONFIG, SQLiteBackend
+
+
+def test_get_and_upsert(store):
+    assert store.get_record('2025-01-03').net_profit == 30.0
+    assert store.get_record('2025-02-01') is None
+
+    store.upsert_record('2025-01-03', make_row('2025-01-03', net=7.5))
+    store.upsert_record('2025-01-06', make_row('2025-01-06', net=60.0))
+    assert store.get_record('2025-01-03').net_profit == 7.5
+    assert store.get_record('2025-01-06').net_profit == 60.0
+    assert len(store.get_all_records()) == 6
+
+
+def test_bulk_upsert_last_row_wins(store):
+    store.upsert_records([make_row('2025-01-02', net=1.0), make_row('2025-01-07', net=2.0),
+                          make_row('2025-01-07', net=3.0)])
+    assert store.get_record('2025-01-02').net_profit == 1.0
+    assert store.get_record('2025-01-07').net_profit == 3.0
+
+
+def test_delete(store):
+    assert store.delete_record('2025-01-02')
+    assert not store.delete_record('2025-01-02')
+    assert store.get_record('2025-01-02') is None
+    assert [r.date for r in store.get_all_records()] == ['2025-01-05', '2025-01-04', '2025-01-03', '2025-01-01']
+
+
+def test_range_is_inclusive_descending_and_limited(store):
+    assert [r.date for r in store.get_records_between('2025-01-02', '2025-01-04')] == \
+        ['2025-01-04', '2025-01-03', '2025-01-02']
+    assert [r.date for r in store.get_records_between(None, '2025-01-02')] == ['2025-01-02', '2025-01-01']
+    assert [r.date for r in store.get_records_between('2025-01-04', None, 1)] == ['2025-01-05']
+    assert store.get_records_between('2025-02-01', None) == []
+
+
+def test_data_version_changes_on_writes(store):
+    store.get_all_records()
+    version = store.current_version()
+    store.upsert_record('2025-01-06', make_row('2025-01-06'))
+    assert store.current_version() > version
+
+
+def test_iter_records_covers_everything_in_date_order(store):
+    chunks = list(store.iter_records(chunk_size=2))
+    assert [r.date for chunk in chunks for r in chunk] == [f'2025-01-0{d}' for d in range(1, 6)]
+
+
+def test_config_round_trip(store):
+    assert store.get_config() == DEFAULT_CONFIG
+    store.update_config(30.0, 3.5, 150.0, effective_from='2025-01-03')
+
+    assert store.get_config() == {'mpg': 30.0, 'gas_price': 3.5, 'meta_neta_objetivo': 150.0}
+    assert [h['effective_from'] for h in store.get_config_history()] == ['1900-01-01', '2025-01-03']
+    assert store.get_config_for_date('2025-01-02') == DEFAULT_CONFIG
+    assert store.get_config_for_date('2025-01-03')['mpg'] == 30.0
+
+
+def test_sqlite_data_persists_across_connections(tmp_path):
+    path = str(tmp_path / 'driver_finances.db')
+    SQLiteBackend(path).upsert_record('2025-01-01', make_row('2025-01-01', net=12.0))
+    SQLiteBackend(path).update_config(31.0, 3.0, 180.0, effective_from='2025-01-01')
+
+    reopened = SQLiteBackend(path)
+    assert reopened.get_record('2025-01-01').net_profit == 12.0
+    assert reopened.get_config()['mpg'] == 31.0
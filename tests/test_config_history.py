@@ -0,0 +1,47 @@
+from conftest import fake_client
+from storage import SheetsBackend
+
+
+def test_config_history_grows_past_the_config_grid(sheet, backend):
+    config_ws = sheet._worksheets['Config']
+    assert config_ws.row_count == 10
+
+    for day in range(1, 16):
+        backend.update_config(30.0 + day, 3.0, 200.0, effective_from=f'2025-02-{day:02d}')
+
+    # 15 cambios + la configuración anterior ("desde siempre") + encabezados
+    assert config_ws.row_count >= 17
+    assert [row[4] for row in config_ws.data[1:17]][-1] == '2025-02-15'
+    assert backend.get_config()['mpg'] == 45.0
+
+    # Otro proceso lee el historial completo desde la hoja
+    reread = SheetsBackend(lambda: sheet, client=fake_client())
+    history = reread.get_config_history()
+    assert len(history) == 16
+    assert reread.get_config_for_date('2025-02-10')['mpg'] == 40.0
+    assert reread.get_config_for_date('2025-01-31')['mpg'] == 35.0
+
+
+def test_config_history_only_adds_rows_when_needed(sheet, backend):
+    backend.update_config(36.0, 3.0, 200.0, effective_from='2025-02-01')
+    sheet.reset_calls()
+    backend.update_config(37.0, 3.0, 200.0, effective_from='2025-02-02')
+    assert dict(sheet.calls) == {'batch_update': 1}
+
+
+def test_cached_config_expires_with_config_ttl(sheet, backend):
+    assert backend.get_config()['mpg'] == 35.0
+    assert backend.cached_config()['mpg'] == 35.0
+    sheet._worksheets['Config'].data[1][0] = '28'  # Editada a mano en la hoja
+
+    backend.config_ttl = 0.0
+    assert backend.cached_config() is None
+    assert backend.get_config()['mpg'] == 28.0
+
+
+def test_config_for_date_reads_the_pending_config_once(app_db, monkeypatch):
+    pending = [{'mpg': 30.0, 'gas_price': 3.5, 'meta_neta_objetivo': 150.0, 'effective_from': '2025-01-01'}]
+    # La cola se vacía justo después de la primera consulta
+    monkeypatch.setattr(app_db.get_config_writer(), 'pending', lambda key: pending.pop() if pending else None)
+
+    assert app_db.get_config_for_date('2025-01-03') == {'mpg': 30.0, 'gas_price': 3.5, 'meta_neta_objetivo': 150.0}
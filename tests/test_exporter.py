@@ -0,0 +1,81 @@
+import csv
+import io
+
+import pyarrow.parquet as pq
+
+from conftest import config_row
+from exporter import EXPORT_COLUMNS, export_records
+from storage import CONFIG_HEADERS, HEADERS, record_to_row
+
+
+def seed_earnings(sheet):
+    rows = [record_to_row({'uber_earnings': 100.0 + d, 'cash_tips': 5.0, 'food_cost': 12.5, 'odo_end': 1000 + d,
+                           'total_gross': 105.0 + d, 'total_expenses': 12.5, 'net_profit': 92.5 + d,
+                           'additional_income': [{'name': 'Bono', 'amount': 25.0}, {'name': 'Extra', 'amount': 3.5}]
+                           if d == 2 else []}, f'2025-01-0{d}') for d in range(1, 4)]
+    sheet.seed(HEADERS, rows, config_row(), CONFIG_HEADERS)
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_csv_export_headers_and_values(app_db, sheet, tmp_path):
+    seed_earnings(sheet)
+    path = str(tmp_path / 'historial.csv')
+    assert app_db.export_history(path, 'csv', chunk_size=2) == 3
+
+    header, *rows = read_csv(path)
+    assert header == EXPORT_COLUMNS
+    by_date = {row[0]: dict(zip(header, row)) for row in rows}
+    assert sorted(by_date) == ['2025-01-01', '2025-01-02', '2025-01-03']
+    day = by_date['2025-01-02']
+    assert float(day['uber_earnings']) == 102.0
+    assert day['odo_end'] == '1002'
+    assert float(day['additional_income_total']) == 28.5
+    assert day['additional_income_detail'] == 'Bono: 25.00; Extra: 3.50'
+    assert float(by_date['2025-01-01']['additional_income_total']) == 0.0
+
+
+def test_parquet_export_matches_csv(app_db, sheet, tmp_path):
+    seed_earnings(sheet)
+    app_db.export_history(str(tmp_path / 'historial.csv'), 'csv')
+    app_db.export_history(str(tmp_path / 'historial.parquet'), 'parquet')
+
+    header, *rows = read_csv(str(tmp_path / 'historial.csv'))
+    table = pq.read_table(str(tmp_path / 'historial.parquet'))
+    assert table.column_names == header
+    assert table.column('date').to_pylist() == [row[0] for row in rows]
+    assert table.column('odo_end').to_pylist() == [int(row[header.index('odo_end')]) for row in rows]
+    assert table.column('net_profit').to_pylist() == [float(row[header.index('net_profit')]) for row in rows]
+
+
+def test_empty_history_exports_only_the_header():
+    out = io.StringIO()
+    assert export_records(iter([]), out, 'csv') == 0
+    assert out.getvalue().strip() == ','.join(EXPORT_COLUMNS)
+
+
+def test_export_then_reimport_earnings(app_db, sheet, tmp_path):
+    seed_earnings(sheet)
+    path = str(tmp_path / 'historial.csv')
+    app_db.export_history(path, 'csv')
+    original = {r.date: r for r in app_db.get_backend().get_all_records()}
+
+    # Hoja vacía; se reimportan las ganancias de Uber del export con el importador de CSV
+    sheet.seed(HEADERS, [], config_row(), CONFIG_HEADERS)
+    app_db.get_backend().invalidate()
+    header, *rows = read_csv(path)
+    uber_csv = io.StringIO()
+    writer = csv.writer(uber_csv)
+    writer.writerow(['Date', 'Total Earnings'])
+    writer.writerows([row[0], row[header.index('uber_earnings')]] for row in rows)
+    uber_csv.seek(0)
+    result = app_db.import_earnings_csv(uber_csv, platform='uber')
+
+    assert result['new'] == 3
+    for date, record in original.items():
+        imported = app_db.get_record_by_date(date)
+        assert imported.uber_earnings == record.uber_earnings
+        assert imported.total_gross == record.uber_earnings
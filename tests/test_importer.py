@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from importer import ImportFormatError, aggregate_earnings, parse_amount, parse_date
+from storage import record_to_row
+
+UBER_CSV = """Trip UUID,Begin Trip Time,Total Earnings
+a1,2025-01-06 08:30:00 -0500,$12.50
+a2,2025-01-06 19:10:00 -0500,"$1,000.00"
+a3,01/07/2025 9:00 AM,(2.00)
+a4,not a date,5.00
+a5,2025-01-07,n/a
+,,
+Totals,,1010.50
+"""
+
+
+def test_parse_date_and_amount_formats():
+    assert parse_date('2025-01-05 08:30:00 -0500') == '2025-01-05'
+    assert parse_date('01/05/2025 8:30 AM') == '2025-01-05'
+    assert parse_date('Jan 5, 2025') == '2025-01-05'
+    assert parse_date('31/31/2025') is None
+    assert parse_amount('$1,234.50') == 1234.5
+    assert parse_amount('(12.00)') == -12.0
+    assert parse_amount('abc') is None
+
+
+def test_aggregate_sums_by_day_and_counts_skipped_rows():
+    result = aggregate_earnings(io.StringIO(UBER_CSV))
+    assert result['platform'] == 'uber'
+    assert result['days'] == {'2025-01-06': 1012.5, '2025-01-07': -2.0}
+    assert result['trips'] == 3
+    # Fecha inválida, monto inválido y fila de totales (la vacía no cuenta)
+    assert result['skipped'] == 3
+
+
+def test_missing_columns_or_platform_is_rejected():
+    with pytest.raises(ImportFormatError):
+        aggregate_earnings(io.StringIO("Trip UUID,Fare\na1,3.0\n"))
+    with pytest.raises(ImportFormatError):
+        aggregate_earnings(io.StringIO("Date,Amount\n2025-01-01,3.0\n"))
+    assert aggregate_earnings(io.StringIO("Date,Amount\n2025-01-01,3.0\n"), platform='lyft')['days'] == \
+        {'2025-01-01': 3.0}
+
+
+def test_import_writes_new_days_with_the_computed_totals(app_db):
+    result = app_db.import_earnings_csv(io.StringIO(UBER_CSV), filename='uber_trips.csv')
+    assert (result['days'], result['new'], result['updated'], result['skipped']) == (2, 2, 0, 3)
+
+    record = app_db.get_record_by_date('2025-01-06')
+    assert record.uber_earnings == 1012.5
+    assert record.total_gross == 1012.5
+    assert record.net_profit == 1012.5
+    assert record.meta_neta_objetivo == 200.0
+
+
+def test_reimport_overwrites_the_platform_column_and_keeps_the_rest(app_db):
+    app_db.get_backend().upsert_record('2025-01-06', record_to_row(
+        {'lyft_earnings': 40.0, 'food_cost': 10.0, 'total_gross': 40.0, 'total_expenses': 10.0, 'net_profit': 30.0},
+        '2025-01-06'))
+
+    app_db.import_earnings_csv(io.StringIO(UBER_CSV), platform='uber')
+    result = app_db.import_earnings_csv(io.StringIO(UBER_CSV), platform='uber')
+    assert (result['new'], result['updated']) == (0, 2)
+
+    record = app_db.get_record_by_date('2025-01-06')
+    # Importar dos veces no duplica el monto; Lyft y gastos del día se conservan
+    assert record.uber_earnings == 1012.5
+    assert record.lyft_earnings == 40.0
+    assert record.food_cost == 10.0
+    assert record.total_gross == 1052.5
+    assert record.net_profit == 1042.5
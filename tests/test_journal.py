@@ -0,0 +1,67 @@
+import json
+
+from conftest import ManualWorker, make_row
+from fake_gspread import api_error
+from journal import JournaledBackend, WriteJournal
+
+
+def bad_request():
+    return api_error(400, "Invalid values[1][2] (simulado)", 'INVALID_ARGUMENT')
+
+
+def journaled(backend, tmp_path):
+    return JournaledBackend(backend, WriteJournal(str(tmp_path / 'journal.jsonl')),
+                            retry_delay=1.0, max_retry_delay=4.0, worker=ManualWorker())
+
+
+def test_permanent_error_moves_entry_to_failed_and_replays_the_rest(sheet, backend, tmp_path):
+    store = journaled(backend, tmp_path)
+    backend.get_all_records()
+    store.upsert_record('2025-01-02', make_row('2025-01-02', net=1.0))
+    store.upsert_record('2025-01-03', make_row('2025-01-03', net=2.0))
+    sheet.fail_next(1, error=bad_request)
+
+    assert store.replay_once() is None
+    assert store.pending_count() == 0
+    assert store.failed_count() == 1
+    assert '2025-01-02' in store.last_failure
+    # La rechazada queda en el archivo de fallidas; la siguiente sí se aplicó
+    with open(store.journal.failed_path, encoding='utf-8') as f:
+        failed = [json.loads(line) for line in f]
+    assert [e['date'] for e in failed] == ['2025-01-02']
+    assert 'Invalid values' in failed[0]['error']
+    assert store.get_record('2025-01-02').net_profit == 20.0
+    assert store.get_record('2025-01-03').net_profit == 2.0
+
+
+def test_transient_error_keeps_entries_pending_with_backoff(sheet, backend, tmp_path):
+    store = journaled(backend, tmp_path)
+    backend.get_all_records()
+    store.upsert_record('2025-01-02', make_row('2025-01-02', net=1.0))
+    sheet.fail_next(20, error=lambda: api_error(503, "Backend unavailable (simulado)", 'UNAVAILABLE'))
+
+    assert [store.replay_once() for _ in range(4)] == [1.0, 2.0, 4.0, 4.0]
+    assert store.pending_count() == 1
+    assert store.failed_count() == 0
+    assert 'Backend unavailable' in store.last_error
+    # La lectura sigue mostrando el cambio pendiente
+    assert store.get_record('2025-01-02').net_profit == 1.0
+
+    sheet._forced_errors.clear()
+    assert store.replay_once() is None
+    assert store.pending_count() == 0
+    assert store.last_error is None
+    assert backend.get_record('2025-01-02').net_profit == 1.0
+
+
+def test_journal_survives_restart_without_open_handles(sheet, backend, tmp_path):
+    store = journaled(backend, tmp_path)
+    store.upsert_record('2025-01-04', make_row('2025-01-04', net=7.0))
+
+    # Otro proceso (reinicio) ve la operación pendiente y se agenda solo
+    restarted = journaled(backend, tmp_path)
+    assert restarted.pending_count() == 1
+    assert restarted.worker.scheduled == [0.0]
+    assert restarted.replay_once() is None
+    assert backend.get_record('2025-01-04').net_profit == 7.0
+    assert WriteJournal(str(tmp_path / 'journal.jsonl')).pending() == []
@@ -0,0 +1,51 @@
+"""Odómetro del día anterior al editar una fecha pasada (get_last_record(before=...))"""
+from conftest import ManualWorker, config_row, make_row
+from journal import JournaledBackend, WriteJournal
+from storage import CONFIG_HEADERS, HEADERS
+
+
+def with_odometers(store):
+    # Odómetro en 01, 02 y 04; el 03 y el 05 sin odómetro final
+    store.upsert_records([make_row('2025-01-01', odo_end=1000), make_row('2025-01-02', odo_end=1100),
+                          make_row('2025-01-04', odo_end=1300)])
+    return store
+
+
+def test_before_a_past_date_returns_the_closest_earlier_record(store):
+    with_odometers(store)
+    assert store.get_last_record() == {'odo_end': 1300, 'date': '2025-01-04'}
+    assert store.get_last_record('2025-01-04') == {'odo_end': 1100, 'date': '2025-01-02'}
+    assert store.get_last_record('2025-01-03') == {'odo_end': 1100, 'date': '2025-01-02'}
+    assert store.get_last_record('2025-01-02') == {'odo_end': 1000, 'date': '2025-01-01'}
+
+
+def test_before_the_earliest_date_returns_none(store):
+    with_odometers(store)
+    assert store.get_last_record('2025-01-01') is None
+    assert store.get_last_record('2024-12-31') is None
+
+
+def test_index_follows_saves_and_deletes(store):
+    with_odometers(store)
+    store.get_last_record()  # Índice de odómetros construido
+    store.upsert_record('2025-01-03', make_row('2025-01-03', odo_end=1200))
+    assert store.get_last_record('2025-01-04') == {'odo_end': 1200, 'date': '2025-01-03'}
+    store.delete_record('2025-01-03')
+    assert store.get_last_record('2025-01-04') == {'odo_end': 1100, 'date': '2025-01-02'}
+
+
+def test_pending_journal_changes_are_considered(backend, tmp_path):
+    store = with_odometers(JournaledBackend(backend, WriteJournal(str(tmp_path / 'journal.jsonl')),
+                                            worker=ManualWorker()))
+    store.delete_record('2025-01-02')
+    assert store.get_last_record('2025-01-04') == {'odo_end': 1000, 'date': '2025-01-01'}
+    store.upsert_record('2025-01-03', make_row('2025-01-03', odo_end=1250))
+    assert store.get_last_record('2025-01-04') == {'odo_end': 1250, 'date': '2025-01-03'}
+    assert store.get_last_record('2025-01-01') is None
+
+
+def test_database_get_last_record_uses_the_edited_date(app_db, sheet):
+    sheet.seed(HEADERS, [make_row('2025-01-01', odo_end=500), make_row('2025-01-05', odo_end=900)],
+               config_row(), CONFIG_HEADERS)
+    assert app_db.get_last_record('2025-01-03') == {'odo_end': 500, 'date': '2025-01-01'}
+    assert app_db.get_last_record('2025-01-01') is None
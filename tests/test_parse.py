@@ -0,0 +1,46 @@
+import random
+
+from storage import FIELDS, JSON_FIELDS, VECTORIZE_MIN_ROWS, parse_rows, row_to_record
+
+# Celdas escritas a mano que float() de Python y el lector CSV de pandas tratan distinto
+TRICKY = ['1_000', '１２', '٣', '12\xa0', ' 7 ', 'True', 'false', 'NA', 'null', 'nan', 'inf', '-Infinity',
+          '1e400', '1,000', '$5', '0x10', '+3', '.5', '5.', '1e3', '', '  ', 'abc', '-0', '00012',
+          '1.7976931348623157e308', '9.3e18', '-9.3e18']
+
+
+def make_rows(n: int, seed: int, extra=None) -> list:
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        row = [f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}']
+        for field in FIELDS[1:]:
+            if field in JSON_FIELDS:
+                row.append('[]')
+            elif rng.random() < 0.4:
+                row.append(rng.choice(TRICKY))
+            else:
+                row.append(repr(rng.uniform(-1e6, 1e6)))
+        if i % 9 == 0:
+            row = row[:rng.randint(1, len(row))]  # gspread recorta las celdas vacías al final
+        rows.append(row)
+    if extra is not None:
+        rows.append(extra)
+    return rows
+
+
+def assert_same(rows):
+    assert len(rows) >= VECTORIZE_MIN_ROWS  # Que parse_rows use el camino vectorizado
+    expected = [row_to_record(row) for row in rows]
+    for got, want, row in zip(parse_rows(rows), expected, rows):
+        assert got == want, row
+
+
+def test_vectorized_parser_matches_row_by_row_parser():
+    for seed in range(5):
+        assert_same(make_rows(300, seed))
+
+
+def test_fallback_parser_matches_row_by_row_parser():
+    # Un salto de línea dentro de una celda fuerza la conversión columna a columna
+    rows = make_rows(300, 9, extra=['2026-01-01', '5\n6'])
+    assert_same(rows)
@@ -0,0 +1,45 @@
+from conftest import ManualWorker, make_row
+from journal import JournaledBackend, WriteJournal
+from storage import DailyRecord
+
+
+def count_copies(monkeypatch):
+    calls = []
+    original = DailyRecord.copy
+    monkeypatch.setattr(DailyRecord, 'copy', lambda self: calls.append(self.date) or original(self))
+    return calls
+
+
+def test_limit_copies_only_the_returned_records(backend, monkeypatch):
+    backend.get_all_records()
+    copies = count_copies(monkeypatch)
+
+    records = backend.get_records_between(None, None, 2)
+    assert [r.date for r in records] == ['2025-01-05', '2025-01-04']
+    assert copies == ['2025-01-05', '2025-01-04']
+    assert [r.date for r in backend.get_records_between('2025-01-02', '2025-01-04', 2)] == ['2025-01-04', '2025-01-03']
+
+
+def test_scan_records_does_not_copy(backend, monkeypatch):
+    backend.get_all_records()
+    copies = count_copies(monkeypatch)
+
+    records = backend.scan_records()
+    assert [r.date for r in records] == [f'2025-01-0{d}' for d in range(5, 0, -1)]
+    assert copies == []
+    assert records[0] is backend.scan_records('2025-01-05')[0]
+
+
+def test_journaled_reads_merge_pending_changes(backend, tmp_path, monkeypatch):
+    store = JournaledBackend(backend, WriteJournal(str(tmp_path / 'journal.jsonl')), worker=ManualWorker())
+    store.upsert_record('2025-01-06', make_row('2025-01-06', net=60.0))
+    store.delete_record('2025-01-05')
+    copies = count_copies(monkeypatch)
+
+    assert [r.date for r in store.scan_records()] == ['2025-01-06', '2025-01-04', '2025-01-03',
+                                                     '2025-01-02', '2025-01-01']
+    assert copies == []
+    assert [r.date for r in store.get_records_between(None, None, 2)] == ['2025-01-06', '2025-01-04']
+    assert copies == ['2025-01-06', '2025-01-04']
+    # Sin cambios pendientes en el rango se pasa el límite al remoto
+    assert [r.net_profit for r in store.get_records_between('2025-01-01', '2025-01-02', 1)] == [20.0]
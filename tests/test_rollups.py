@@ -0,0 +1,35 @@
+from datetime import date
+
+from conftest import ManualWorker, make_row
+from journal import JournaledBackend, WriteJournal
+from rollups import RollupIndex
+from storage import row_to_record
+
+
+def test_rollup_applies_consecutive_changes_and_goes_stale_on_gaps(backend):
+    index = RollupIndex(backend.get_all_records(), version=backend.data_version)
+    version = backend.data_version
+    assert index.week(date(2025, 1, 1))['total_profit'] == 150.0  # 2025-01-01..05, misma semana ISO
+
+    row = make_row('2025-01-03', net=100.0)
+    backend.upsert_record('2025-01-03', row)
+    index.set_day(row_to_record(row), version, backend.data_version)
+    assert index.version == backend.data_version
+    assert index.week(date(2025, 1, 1))['total_profit'] == 220.0
+
+    # Un cambio que el índice no vio: queda obsoleto (se reconstruye en la próxima consulta)
+    index.remove_day('2025-01-02', version, backend.data_version + 1)
+    assert index.version == -1
+
+
+def test_journal_replay_does_not_change_data_version(backend, tmp_path):
+    store = JournaledBackend(backend, WriteJournal(str(tmp_path / 'journal.jsonl')), worker=ManualWorker())
+    store.get_all_records()
+    before = store.data_version
+
+    store.upsert_record('2025-01-06', make_row('2025-01-06'))
+    assert store.data_version == before + 1
+    # La réplica solo confirma un cambio ya contado: los resúmenes construidos siguen vigentes
+    assert store.replay_once() is None
+    assert store.data_version == before + 1
+    assert backend.get_record('2025-01-06') is not None
@@ -0,0 +1,42 @@
+from conftest import make_row
+
+
+def dates_in_sheet(sheet):
+    return [row[0] for row in sheet._worksheets['Driver_Finances_DB'].data[1:]]
+
+
+def test_delete_after_external_row_removal_deletes_the_right_day(sheet, backend):
+    backend.get_all_records()  # Índice cargado: 2025-01-04 en la fila 5
+    sheet._worksheets['Driver_Finances_DB'].data.pop(2)  # Alguien borra 2025-01-02 a mano
+
+    assert backend.delete_record('2025-01-04')
+    assert dates_in_sheet(sheet) == ['2025-01-01', '2025-01-03', '2025-01-05']
+
+
+def test_update_after_external_row_removal_updates_the_right_day(sheet, backend):
+    backend.get_all_records()
+    sheet._worksheets['Driver_Finances_DB'].data.pop(2)
+
+    backend.upsert_record('2025-01-03', make_row('2025-01-03', net=999.0))
+    assert dates_in_sheet(sheet) == ['2025-01-01', '2025-01-03', '2025-01-04', '2025-01-05']
+    assert backend.get_record('2025-01-03').net_profit == 999.0
+    assert backend.get_record('2025-01-04').net_profit == 40.0
+
+
+def test_bulk_update_after_external_row_insertion(sheet, backend):
+    backend.get_all_records()
+    sheet._worksheets['Driver_Finances_DB'].data.insert(1, make_row('2024-12-31'))
+
+    backend.upsert_records([make_row('2025-01-02', net=1.0), make_row('2025-01-05', net=2.0)])
+    assert dates_in_sheet(sheet) == ['2024-12-31'] + [f'2025-01-0{d}' for d in range(1, 6)]
+    assert backend.get_record('2025-01-02').net_profit == 1.0
+    assert backend.get_record('2025-01-05').net_profit == 2.0
+    assert backend.get_record('2025-01-03').net_profit == 30.0
+
+
+def test_update_with_unchanged_sheet_is_one_read_and_one_write(sheet, backend):
+    backend.get_all_records()
+    sheet.reset_calls()
+
+    backend.upsert_record('2025-01-03', make_row('2025-01-03', net=5.0))
+    assert dict(sheet.calls) == {'get': 1, 'update': 1}
@@ -0,0 +1,46 @@
+import os
+
+from conftest import fake_client, make_row
+from snapshot import SnapshotStore
+from storage import SheetsBackend
+
+
+def with_snapshot(sheet, tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.arrow'), 'Driver_Finances_DB')
+    return SheetsBackend(lambda: sheet, client=fake_client(), snapshot=snapshot), snapshot
+
+
+def test_save_does_not_rewrite_snapshot(sheet, tmp_path):
+    backend, snapshot = with_snapshot(sheet, tmp_path)
+    backend.get_all_records()
+    saved_at = os.path.getmtime(snapshot.path)
+    sheet.reset_calls()
+
+    backend.upsert_record('2025-01-06', make_row('2025-01-06'))
+    assert 'get_lastUpdateTime' not in sheet.calls
+    assert os.path.getmtime(snapshot.path) == saved_at
+
+
+def test_sync_after_save_refreshes_snapshot_for_next_start(sheet, tmp_path):
+    backend, _ = with_snapshot(sheet, tmp_path)
+    backend.get_all_records()
+    backend.upsert_record('2025-01-03', make_row('2025-01-03', net=5.0))
+    backend.request_sync()
+    backend.get_all_records()
+
+    restarted, _ = with_snapshot(sheet, tmp_path)
+    sheet.reset_calls()
+    assert restarted.get_record('2025-01-03').net_profit == 5.0
+    assert dict(sheet.calls) == {'get_lastUpdateTime': 1}
+
+
+def test_snapshot_is_discarded_when_sheet_changed_after_save(sheet, tmp_path):
+    backend, _ = with_snapshot(sheet, tmp_path)
+    backend.get_all_records()
+    backend.upsert_record('2025-01-03', make_row('2025-01-03', net=5.0))
+
+    # Sin sincronizar, la copia es anterior al guardado: el arranque descarga la hoja
+    restarted, _ = with_snapshot(sheet, tmp_path)
+    sheet.reset_calls()
+    assert restarted.get_record('2025-01-03').net_profit == 5.0
+    assert sheet.calls['get_all_values'] == 1
@@ -0,0 +1,35 @@
+from conftest import make_row
+
+
+def test_incremental_sync_reads_only_new_rows(sheet, backend):
+    backend.get_all_records()
+    version = backend.data_version
+    sheet._worksheets['Driver_Finances_DB'].data.append(make_row('2025-01-06', net=60.0))
+    sheet.reset_calls()
+
+    backend.request_sync()
+    assert backend.get_record('2025-01-06').net_profit == 60.0
+    assert dict(sheet.calls) == {'col_values': 1, 'get': 1}
+    assert backend.data_version == version + 1
+
+
+def test_sync_without_changes_keeps_data_version(sheet, backend):
+    backend.get_all_records()
+    version = backend.data_version
+    sheet.reset_calls()
+
+    backend.request_sync()
+    backend.get_all_records()
+    assert dict(sheet.calls) == {'col_values': 1}
+    assert backend.data_version == version
+
+
+def test_sync_reloads_everything_when_rows_moved(sheet, backend):
+    backend.get_all_records()
+    sheet._worksheets['Driver_Finances_DB'].data.pop(1)
+    sheet.reset_calls()
+
+    backend.request_sync()
+    assert backend.get_record('2025-01-01') is None
+    assert backend.get_record('2025-01-02').net_profit == 20.0
+    assert sheet.calls['get_all_values'] == 1
@@ -0,0 +1,54 @@
+import threading
+
+from write_behind import WriteBehindQueue
+
+
+def test_value_stays_pending_until_the_write_is_confirmed():
+    started, release = threading.Event(), threading.Event()
+    written = []
+
+    def writer(key, value):
+        started.set()
+        release.wait(5)
+        written.append((key, value))
+
+    queue = WriteBehindQueue(writer, delay=60)
+    queue.submit('juan', {'mpg': 30})
+    flush = threading.Thread(target=queue.flush)
+    flush.start()
+    started.wait(5)
+    assert queue.pending('juan') == {'mpg': 30}  # Escribiéndose: sigue visible
+    release.set()
+    flush.join(5)
+    assert written == [('juan', {'mpg': 30})]
+    assert queue.pending('juan') is None
+
+
+def test_failed_write_keeps_value_reports_error_and_backs_off():
+    calls = []
+
+    def writer(key, value):
+        calls.append(value)
+        if len(calls) < 3:
+            raise RuntimeError("Sin conexión")
+
+    queue = WriteBehindQueue(writer, delay=60, max_delay=200)
+    queue.submit('juan', 1)
+    queue.flush()
+    assert queue.pending('juan') == 1
+    assert queue.last_error('juan') == "Sin conexión"
+    assert queue._timer.interval == 120  # 60 * 2
+    queue.flush()
+    assert queue._timer.interval == 200  # 60 * 4, con tope
+    queue.flush()
+    assert queue.pending('juan') is None
+    assert queue.last_error('juan') is None
+    assert queue._timer is None
+
+
+def test_newer_value_submitted_during_a_write_is_not_lost():
+    queue = WriteBehindQueue(lambda key, value: queue.submit(key, value + 1) if value == 1 else None, delay=60)
+    queue.submit('juan', 1)
+    queue.flush()
+    assert queue.pending('juan') == 2
+    queue._timer.cancel()
@@ -0,0 +1,80 @@
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Cola de escritura diferida que agrupa los cambios por clave
+
+    Cada submit() reemplaza el valor pendiente de su clave; cuando termina la
+    ventana de `delay` segundos (contada desde el primer cambio pendiente) se
+    escribe solo el último valor de cada clave. Un valor sigue pendiente hasta
+    que la escritura se confirma; si falla se reintenta con backoff exponencial
+    (hasta `max_delay` segundos) y el error queda disponible en last_error().
+    Los valores pendientes se escriben también al cerrar el proceso (atexit).
+    """
+
+    def __init__(self, writer: Callable[[str, Any], None], delay: float = 2.0, max_delay: float = 300.0):
+        self.writer = writer
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending: Dict[str, Any] = {}
+        self._failures: Dict[str, int] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def _schedule(self, delay: float):
+        # Llamar con self._lock tomado
+        if self._timer is None and self._pending:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def submit(self, key: str, value: Any):
+        """Encola el valor más reciente de la clave sin bloquear"""
+        with self._lock:
+            self._pending[key] = value
+            self._schedule(self.delay)
+
+    def pending(self, key: str) -> Optional[Any]:
+        """Valor aún no confirmado para la clave (None si no hay), incluso mientras se escribe"""
+        with self._lock:
+            return self._pending.get(key)
+
+    def last_error(self, key: str) -> Optional[str]:
+        """Error de la última escritura fallida de la clave (None si no falló o ya se escribió)"""
+        with self._lock:
+            return self._errors.get(key)
+
+    def flush(self):
+        """Escribe inmediatamente los últimos valores pendientes"""
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                batch = dict(self._pending)
+            for key, value in batch.items():
+                try:
+                    self.writer(key, value)
+                except Exception as e:
+                    with self._lock:
+                        failures = self._failures[key] = self._failures.get(key, 0) + 1
+                        self._errors[key] = str(e)
+                    logger.warning("Error escribiendo '%s' (intento %d), se reintentará: %s", key, failures, e)
+                    continue
+                with self._lock:
+                    # Si llegó un valor más nuevo mientras se escribía, sigue pendiente
+                    if self._pending.get(key) is value:
+                        del self._pending[key]
+                    self._failures.pop(key, None)
+                    self._errors.pop(key, None)
+            with self._lock:
+                failures = max(self._failures.values(), default=0)
+                self._schedule(min(self.max_delay, self.delay * (2 ** failures)))